@@ -1,5 +1,20 @@
 import ast
+import copy
 import dis
+import functools
+import operator
+
+from bytecode_backend import Unsupported, assemble_function
+from cpp_runtime import _printf_format, _scanf_plain
+from cpp_analysis import (cin_targets, declared_names, ends_with_terminator, escaping_jumps,
+                          has_opaque_calls, iter_children, memoizable_functions, output_chain,
+                          performs_io, quiet_functions, reference_aliases, root_name,
+                          top_level_functions, walk, with_aliases, written_names, PURE_FUNCTIONS)
+from lazy import LazyLoader
+from optimizer import PassContext, PassManager, module_bindings
+from range_analysis import INTEGER_WIDTHS, RangeAnalyzer
+from runtime_shaker import shake_runtime
+from type_checker import TypeInferencer, UNKNOWN
 
 BINARY_OP_MAP = {
     "PLUS":          ast.Add(),
@@ -32,541 +47,33 @@ UNARY_OP_MAP = {
 COMPARE_OPS = {"EQUAL", "NOT_EQUAL", "LESS", "LESS_EQUAL", "GREATER", "GREATER_EQUAL"}
 BOOL_OPS    = {"AND", "OR"}
 
+ARITHMETIC_OPS = {"PLUS", "MINUS", "STAR", "SLASH", "PERCENT",
+                  "SHIFT_LEFT", "SHIFT_RIGHT", "BITWISE_AND", "BITWISE_OR", "BITWISE_XOR"}
 
-RUNTIME_SOURCE = """
-import sys
-import math
-import copy
-import itertools
-import functools
-from collections import defaultdict, deque, OrderedDict
-from typing import Optional as _Optional
-
-# --- C++ I/O STREAM SUPPORT ---
-class _CoutStream:
-    def __lshift__(self, other):
-        if other == '\\n' or other == '\\r\\n':
-            print()
-        else:
-            try:
-                # C++ prints booleans as 0 or 1
-                if isinstance(other, bool):
-                    print(1 if other else 0, end='')
-                else:
-                    print(other, end='')
-            except Exception:
-                print(other, end='')
-        return self
-
-cout = _CoutStream()
-cerr = _CoutStream()
-
-_cin_tokens = None
-
-class _CinStream:
-    def __bool__(self):
-        global _cin_tokens
-        if _cin_tokens is None:
-            _cin_tokens = sys.stdin.read().split()
-            _cin_tokens.reverse()
-        return len(_cin_tokens) > 0
-
-cin = _CinStream()
-
-class _StdNamespace:
-    pass
-std = _StdNamespace()
-std.cout = cout
-std.cerr = cerr
-std.cin = cin
-std.endl = '\\n'
-
-def _cin_read(old_val=None):
-    global _cin_tokens
-    if _cin_tokens is None:
-        _cin_tokens = sys.stdin.read().split()
-        _cin_tokens.reverse()
-    if not _cin_tokens:
-        return None
-    token = _cin_tokens.pop()
-    
-    # Cast to the appropriate type based on variable's current value
-    if old_val is not None:
-        if isinstance(old_val, bool):
-            try: return bool(int(token))
-            except Exception: return bool(token)
-        elif isinstance(old_val, int):
-            return int(token)
-        elif isinstance(old_val, float):
-            return float(token)
-        elif isinstance(old_val, str):
-            return token
-            
-    # Fallback to guessing if variable was uninitialized
-    try: return int(token)
-    except ValueError:
-        try: return float(token)
-        except ValueError: return token
-
-def _set_item(obj, key, val):
-    if val is not None:
-        obj[key] = val
-        return True
-    return False
-
-def _set_attr(obj, attr, val):
-    if val is not None:
-        setattr(obj, attr, val)
-        return True
-    return False
-# ------------------------------
-
-def _cpp_vector(*args):
-    if len(args) == 1 and isinstance(args[0], int):
-        return [0] * args[0]
-    if len(args) == 2 and isinstance(args[0], int):
-        return [args[1]] * args[0]
-    if len(args) == 1 and hasattr(args[0], '__iter__'):
-        return list(args[0])
-    return list(args) if args else []
-
-def _cpp_array(*args):
-    return list(args)
-
-def _cpp_vector_2d(rows, cols, val=0):
-    return [[val]*cols for _ in range(rows)]
-
-def _cpp_string(s=""):
-    return str(s)
-
-def _cpp_pair(a, b):
-    return [a, b]
-
-def _cpp_tuple(*args):
-    return list(args)
-
-def _cpp_map(*args):
-    if args:
-        return dict(args[0]) if len(args) == 1 else {}
-    return {}
-
-def _cpp_set(*args):
-    if args and hasattr(args[0], '__iter__'):
-        return set(args[0])
-    return set(args) if args else set()
-
-def _cpp_stack(*args):
-    if args and hasattr(args[0], '__iter__'):
-        return list(args[0])
-    return []
-
-def _cpp_queue_new(*args):
-    if args and hasattr(args[0], '__iter__'):
-        return deque(args[0])
-    return deque()
-
-def _cpp_optional(val=None):
-    return [True, val] if val is not None else [False, None]
-
-def _cpp_variant(*args):
-    return args[0] if args else None
-
-def _cpp_any(val=None):
-    return val
-
-def _cpp_bitset(n, val=0):
-    return val & ((1 << n) - 1)
-
-def _size(container):
-    return len(container)
-
-def _empty(container):
-    return len(container) == 0
-
-def _push_back(container, val):
-    container.append(val)
-    return container
-
-def _pop_back(container):
-    if container:
-        container.pop()
-    return container
-
-def _back(container):
-    return container[-1]
-
-def _front(container):
-    return container[0]
-
-def _push(container, val):
-    container.append(val)
-    return container
-
-def _pop(container):
-    if isinstance(container, deque):
-        container.popleft()
-    else:
-        container.pop()
-    return container
-
-def _top(container):
-    return container[-1]
-
-def _insert(container, *args):
-    if isinstance(container, set):
-        container.add(args[-1])
-    elif isinstance(container, dict):
-        if len(args) == 2:
-            container[args[0]] = args[1]
-        elif len(args) == 1 and isinstance(args[0], (list, tuple)):
-            container[args[0][0]] = args[0][1]
-        else:
-            container[args[0]] = None
-    else:
-        if len(args) == 2:
-            container.insert(args[0], args[1])
-        else:
-            container.append(args[0])
-    return container
-
-def _emplace_back(container, *args):
-    container.append(list(args) if len(args) > 1 else args[0])
-    return container
-
-def _emplace(container, *args):
-    if isinstance(container, set):
-        container.add(args[-1])
-    elif isinstance(container, dict) and len(args) >= 2:
-        container[args[0]] = args[1]
-    elif isinstance(container, list) and len(args) >= 2:
-        container.insert(args[0], args[1])
-    else:
-        container.append(args[0] if len(args) == 1 else list(args))
-    return container
-
-def _erase(container, key):
-    if isinstance(container, set):
-        container.discard(key)
-    elif isinstance(container, dict):
-        container.pop(key, None)
-    elif isinstance(container, list):
-        if isinstance(key, int) and 0 <= key < len(container):
-            container.pop(key)
-    return container
-
-def _find(container, val):
-    if isinstance(container, (set, dict)):
-        return val in container
-    try:
-        return container.index(val)
-    except ValueError:
-        return -1
-
-def _count(container, val):
-    if isinstance(container, (set, dict)):
-        return 1 if val in container else 0
-    return container.count(val)
-
-def _clear(container):
-    if hasattr(container, 'clear'):
-        container.clear()
-    return container
-
-def _sort(container, reverse=False):
-    if hasattr(container, 'sort'):
-        container.sort(reverse=reverse)
-    return container
-
-def _stable_sort(container, key=None, reverse=False):
-    container.sort(key=key, reverse=reverse)
-    return container
-
-def _partial_sort(container, n, reverse=False):
-    container[:n] = sorted(container[:n], reverse=reverse)
-    return container
-
-def _nth_element(container, n):
-    container.sort()
-    return container
-
-def _reverse_container(container):
-    if hasattr(container, 'reverse'):
-        container.reverse()
-    return container
-
-def _swap(a, b):
-    return b, a
-
-def _substr(s, start, length=None):
-    if length is None:
-        return s[start:]
-    return s[start:start+length]
-
-def _to_string(val):
-    return str(val)
-
-def _stoi(s, pos=None, base=10):
-    try:
-        return int(str(s).strip(), base)
-    except (ValueError, TypeError):
-        return 0
-
-def _stol(s, pos=None, base=10):
-    return _stoi(s, pos, base)
-
-def _stoll(s, pos=None, base=10):
-    return _stoi(s, pos, base)
-
-def _stof(s, pos=None):
-    try:
-        return float(str(s).strip())
-    except (ValueError, TypeError):
-        return 0.0
-
-def _stod(s, pos=None):
-    return _stof(s)
-
-def _atoi(s):
-    return _stoi(s)
-
-def _atof(s):
-    return _stof(s)
-
-def _abs_val(x):
-    return abs(x)
-
-def _max_val(*args):
-    if len(args) == 1 and hasattr(args[0], '__iter__'):
-        return max(args[0])
-    return max(args)
-
-def _min_val(*args):
-    if len(args) == 1 and hasattr(args[0], '__iter__'):
-        return min(args[0])
-    return min(args)
-
-def _clamp(val, lo, hi):
-    return max(lo, min(hi, val))
-
-def _sqrt_val(x):
-    return math.sqrt(x)
-
-def _pow_val(x, y):
-    return x ** y
-
-def _floor_val(x):
-    return int(math.floor(x))
-
-def _ceil_val(x):
-    return int(math.ceil(x))
-
-def _round_val(x):
-    return round(x)
-
-def _log_val(x):
-    return math.log(x)
-
-def _log2_val(x):
-    return math.log2(x)
-
-def _log10_val(x):
-    return math.log10(x)
-
-def _exp_val(x):
-    return math.exp(x)
-
-def _sin_val(x):
-    return math.sin(x)
-
-def _cos_val(x):
-    return math.cos(x)
-
-def _tan_val(x):
-    return math.tan(x)
-
-def _asin_val(x):
-    return math.asin(x)
-
-def _acos_val(x):
-    return math.acos(x)
-
-def _atan_val(x):
-    return math.atan(x)
-
-def _atan2_val(y, x):
-    return math.atan2(y, x)
-
-def _gcd_val(a, b):
-    return math.gcd(a, b)
-
-def _lcm_val(a, b):
-    return abs(a * b) // math.gcd(a, b) if a and b else 0
-
-def _accumulate(container, init=0, fn=None):
-    if fn:
-        return functools.reduce(fn, container, init)
-    return sum(container) + init
-
-def _transform(container, fn):
-    return list(map(fn, container))
-
-def _for_each(container, fn):
-    for x in container:
-        fn(x)
-    return container
-
-def _fill(container, val):
-    for i in range(len(container)):
-        container[i] = val
-    return container
-
-def _copy_container(src):
-    return list(src)
-
-def _rotate(container, n):
-    if not container:
-        return container
-    n = n % len(container)
-    container[:] = container[n:] + container[:n]
-    return container
-
-def _unique_container(container):
-    seen = []
-    for x in container:
-        if not seen or seen[-1] != x:
-            seen.append(x)
-    container[:] = seen
-    return container
+# `b > i` is `i < b` with the operands swapped
+COMPARE_MIRROR = {
+    "LESS": "GREATER", "LESS_EQUAL": "GREATER_EQUAL",
+    "GREATER": "LESS", "GREATER_EQUAL": "LESS_EQUAL",
+    "NOT_EQUAL": "NOT_EQUAL", "EQUAL": "EQUAL",
+}
 
-def _remove_val(container, val):
-    container[:] = [x for x in container if x != val]
-    return container
+INTEGER_TYPES = {"int", "long", "short", "unsigned", "signed", "size_t"}
 
-def _remove_if(container, pred):
-    container[:] = [x for x in container if not pred(x)]
-    return container
 
-def _merge_containers(a, b):
-    return sorted(a + b)
+RUNTIME_MODULE = "cpp_runtime"
 
-def _binary_search(container, val):
-    import bisect
-    i = bisect.bisect_left(container, val)
-    return i < len(container) and container[i] == val
+# Default bound on entries per memoized function.
+MEMO_MAXSIZE = 1 << 20
 
-def _lower_bound(container, val):
-    import bisect
-    return bisect.bisect_left(container, val)
+# Structured switches with at most this many labels become a `match`;
+# larger ones dispatch through a dict of label -> block index.
+SWITCH_MATCH_MAX = 8
 
-def _upper_bound(container, val):
-    import bisect
-    return bisect.bisect_right(container, val)
+# Marks a case label whose value is only known at run time.
+NOT_STATIC = object()
 
-def _next_permutation(container):
-    n = len(container)
-    i = n - 2
-    while i >= 0 and container[i] >= container[i + 1]:
-        i -= 1
-    if i < 0:
-        container.sort()
-        return False
-    j = n - 1
-    while container[j] <= container[i]:
-        j -= 1
-    container[i], container[j] = container[j], container[i]
-    container[i+1:] = reversed(container[i+1:])
-    return True
-
-def _prev_permutation(container):
-    n = len(container)
-    i = n - 2
-    while i >= 0 and container[i] <= container[i + 1]:
-        i -= 1
-    if i < 0:
-        container.sort(reverse=True)
-        return False
-    j = n - 1
-    while container[j] >= container[i]:
-        j -= 1
-    container[i], container[j] = container[j], container[i]
-    container[i+1:] = reversed(container[i+1:])
-    return True
-
-def _make_shared(val):
-    return [val]
-
-def _make_unique(val):
-    return [val]
-
-def _make_optional(val):
-    return [True, val]
-
-def _optional_has_value(opt):
-    return isinstance(opt, list) and opt[0] is True
-
-def _optional_value(opt):
-    if isinstance(opt, list) and opt[0]:
-        return opt[1]
-    raise RuntimeError("bad optional access")
-
-def _optional_value_or(opt, default):
-    if isinstance(opt, list) and opt[0]:
-        return opt[1]
-    return default
-
-def _tuple_get(tup, idx):
-    return tup[idx]
-
-def _make_pair(a, b):
-    return [a, b]
-
-def _make_tuple(*args):
-    return list(args)
-
-def _iota(container, start):
-    for i in range(len(container)):
-        container[i] = start + i
-    return container
-
-def _getline(stream, s_ref):
-    try:
-        line = input()
-        return line
-    except EOFError:
-        return ""
-
-def _printf(fmt, *args):
-    try:
-        print(fmt % args if args else fmt, end='')
-    except Exception:
-        print(fmt, *args, end='')
-
-def _sprintf(fmt, *args):
-    try:
-        return fmt % args
-    except Exception:
-        return str(fmt)
-
-def _scanf(fmt, *args):
-    return input()
-
-def _sscanf(s, fmt, *args):
-    parts = s.split()
-    return parts
-
-INT_MAX = 2147483647
-INT_MIN = -2147483648
-LONG_MAX = 9223372036854775807
-LONG_MIN = -9223372036854775808
-UINT_MAX = 4294967295
-SIZE_MAX = 18446744073709551615
-DBL_MAX = 1.7976931348623157e+308
-FLT_MAX = 3.4028235e+38
-M_PI = math.pi
-M_E = math.e
-M_SQRT2 = math.sqrt(2)
-EOF_VAL = -1
-"""
+# "direct" assembles supported function bodies without going through compile()
+BACKENDS = ("ast", "direct")
 
 
 METHOD_DISPATCH = {
@@ -674,6 +181,8 @@ FREE_FUNC_DISPATCH = {
     "make_optional":      "_make_optional",
     "make_pair":          "_make_pair",
     "make_tuple":         "_make_tuple",
+    "puts":               "_puts",
+    "putchar":            "_putchar",
 }
 
 CONSTRUCTOR_DISPATCH = {
@@ -685,18 +194,18 @@ CONSTRUCTOR_DISPATCH = {
     "optional":             "_cpp_optional",
     "variant":              "_cpp_variant",
     "any":                  "_cpp_any",
-    "map":                  "_cpp_map",
+    "map":                  "_OrderedMap",
     "unordered_map":        "_cpp_map",
-    "multimap":             "_cpp_map",
+    "multimap":             "_OrderedMap",
     "unordered_multimap":   "_cpp_map",
-    "set":                  "_cpp_set",
+    "set":                  "_OrderedSet",
     "unordered_set":        "_cpp_set",
-    "multiset":             "_cpp_set",
+    "multiset":             "_OrderedSet",
     "unordered_multiset":   "_cpp_set",
     "stack":                "_cpp_stack",
     "queue":                "_cpp_queue_new",
     "deque":                "deque",
-    "priority_queue":       "_cpp_stack",
+    "priority_queue":       "_PriorityQueue",
     "forward_list":         "_cpp_vector",
     "list":                 "_cpp_vector",
     "bitset":               "_cpp_bitset",
@@ -706,15 +215,288 @@ CONSTRUCTOR_DISPATCH = {
 }
 
 
+# methods of _OrderedTree called as they are
+TREE_METHODS = {"count", "find", "lower_bound", "upper_bound", "begin", "end", "cbegin", "cend",
+                "rbegin", "rend", "erase", "try_emplace", "clear"}
+
+# free functions that map onto runtime helpers and never touch user globals
+RUNTIME_CALLEES = set(FREE_FUNC_DISPATCH) | set(CONSTRUCTOR_DISPATCH)
+
+# Output manipulators that ask for a flush; the runtime decides whether to.
+STREAM_FLUSHERS = {"endl", "std::endl", "flush", "std::flush"}
+
+# Typed readers for the scanf conversions `_scanf_plain` accepts.
+SCANF_READERS = {
+    "d": "_read_int", "u": "_read_int", "s": "_read_word", "c": "_read_char",
+    "f": "_read_float", "e": "_read_float", "g": "_read_float",
+    "F": "_read_float", "E": "_read_float", "G": "_read_float",
+}
+
+# Runtime helpers whose whole body is one expression, spelled as the
+# expression itself so calls can be expanded in place. Each entry is
+# (parameters, template, argument kind): "arith" arguments must not be
+# known to be non-numeric, "int" arguments must not be known non-integral.
+HELPER_TEMPLATES = {
+    "_abs_val":   (("x",),      "abs(x)",              "arith"),
+    "_max_val":   (("a", "b"),  "max(a, b)",           None),
+    "_min_val":   (("a", "b"),  "min(a, b)",           None),
+    "_clamp":     (("v", "lo", "hi"), "max(lo, min(hi, v))", None),
+    "_sqrt_val":  (("x",),      "math.sqrt(x)",        "arith"),
+    "_pow_val":   (("x", "y"),  "x ** y",              "arith"),
+    "_floor_val": (("x",),      "math.floor(x)",       "arith"),
+    "_ceil_val":  (("x",),      "math.ceil(x)",        "arith"),
+    "_round_val": (("x",),      "round(x)",            "arith"),
+    "_log_val":   (("x",),      "math.log(x)",         "arith"),
+    "_log2_val":  (("x",),      "math.log2(x)",        "arith"),
+    "_log10_val": (("x",),      "math.log10(x)",       "arith"),
+    "_exp_val":   (("x",),      "math.exp(x)",         "arith"),
+    "_sin_val":   (("x",),      "math.sin(x)",         "arith"),
+    "_cos_val":   (("x",),      "math.cos(x)",         "arith"),
+    "_tan_val":   (("x",),      "math.tan(x)",         "arith"),
+    "_asin_val":  (("x",),      "math.asin(x)",        "arith"),
+    "_acos_val":  (("x",),      "math.acos(x)",        "arith"),
+    "_atan_val":  (("x",),      "math.atan(x)",        "arith"),
+    "_atan2_val": (("y", "x"),  "math.atan2(y, x)",    "arith"),
+    "_gcd_val":   (("a", "b"),  "math.gcd(a, b)",      "int"),
+    "_lcm_val":   (("a", "b"),  "abs(a * b) // math.gcd(a, b) if a and b else 0", "int"),
+    "_div_trunc": (("a", "b"),  "a // b if (a < 0) == (b < 0) else -(-a // b)", "int"),
+    "_mod_trunc": (("a", "b"),  "a % b if (a < 0) == (b < 0) else -(-a % b)", "int"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _helper_template(helper):
+    """Parsed template for `helper`, stripped of source locations."""
+    params, source, _ = HELPER_TEMPLATES[helper]
+    expr = ast.parse(source, mode="eval").body
+    for node in ast.walk(expr):
+        for attr in ("lineno", "col_offset", "end_lineno", "end_col_offset"):
+            if hasattr(node, attr):
+                delattr(node, attr)
+    uses = {}
+    for node in ast.walk(expr):
+        if isinstance(node, ast.Name) and node.id in params:
+            uses[node.id] = uses.get(node.id, 0) + 1
+    return expr, uses
+
+
+class _SubstituteParams(ast.NodeTransformer):
+    def __init__(self, bindings):
+        self.bindings = bindings
+
+    def visit_Name(self, node):
+        if node.id in self.bindings:
+            return copy.deepcopy(self.bindings[node.id])
+        return node
+
+
+def _node_key(node):
+    """Hashable structure of a parser node, ignoring where it appears."""
+    if isinstance(node, dict):
+        return tuple(sorted(((k, _node_key(v)) for k, v in node.items() if k != "span"), key=lambda kv: kv[0]))
+    if isinstance(node, list):
+        return tuple(_node_key(v) for v in node)
+    return node
+
+
+def _merge_text(pieces):
+    """`pieces` with runs of adjacent literal text joined."""
+    merged = []
+    for piece in pieces:
+        if isinstance(piece, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += piece
+        else:
+            merged.append(piece)
+    return merged
+
+
+def _text_expr(parts):
+    """One string expression from constant and formatted `parts`: a constant when possible."""
+    if not parts or (len(parts) == 1 and isinstance(parts[0], ast.Constant)):
+        return parts[0] if parts else ast.Constant(value="")
+    return ast.JoinedStr(values=parts)
+
+
+def _holds_int(node):
+    """True if an integer-typed `node` also evaluates to an int, not a bool, in Python.
+
+    Library calls such as `s.count(x)` (`x in s`) and functions returning a
+    comparison produce bools where C++ has integers; stores convert bools
+    through `_coerce`.
+    """
+    kind = node.get("type")
+    if kind in ("NumberLiteral", "Identifier", "IndexExpr", "MemberAccess", "CastExpr",
+                "AssignExpr", "UpdateExpr", "DerefExpr"):
+        return True
+    if kind == "BinaryExpr":
+        if node["op"] in ("BITWISE_AND", "BITWISE_OR", "BITWISE_XOR"):
+            return _holds_int(node["left"]) or _holds_int(node["right"])
+        return True
+    if kind == "UnaryExpr":
+        return node["op"] != "LOGICAL_NOT"
+    if kind == "MethodCall":
+        return node["method"] in ("size", "length", "at", "front", "back", "top")
+    if kind == "TernaryExpr":
+        return _holds_int(node["then"]) and _holds_int(node["else"])
+    return False
+
+
+def _negatable(ctype):
+    """True if negating every number in a `ctype` value reverses its order."""
+    if ctype.name in ("pair", "tuple"):
+        return bool(ctype.args) and all(_negatable(arg) for arg in ctype.args)
+    return ctype.is_arithmetic and ctype.name not in ("bool", "char")
+
+
+def _heap_order(ctype):
+    """How a `_PriorityQueue` declared as `ctype` stores its values."""
+    args = ctype.args
+    compare = args[2].name if len(args) > 2 else "less"
+    if compare == "greater":
+        return "min"
+    if compare == "less" and args and _negatable(args[0]):
+        return "max"
+    return "ranked"
+
+
+def _iterated(first, last):
+    """The container node of a `c.begin(), c.end()` argument pair, else None."""
+    if (first.get("type") == "MethodCall" and first["method"] == "begin"
+            and last.get("type") == "MethodCall" and last["method"] == "end"
+            and first["object"].get("type") == last["object"].get("type") == "Identifier"
+            and first["object"]["name"] == last["object"]["name"]):
+        return first["object"]
+    return None
+
+
 class CppToPythonBytecode:
-    def __init__(self, parser_ast: list, debug: bool = False):
-        self.ast_nodes = parser_ast
-        self._debug    = debug
+    def __init__(self, parser_ast: list, debug: bool = False, filename: str = "<cpp_transpiler>",
+                 standalone: bool = False, opt_level: int = 1, dump_passes: bool = False,
+                 time_passes: bool = False, memoize: bool = False, memo_size: int = MEMO_MAXSIZE,
+                 tail_calls: bool = False, lazy: bool = False, backend: str = "ast"):
+        if lazy and standalone:
+            raise ValueError("lazy compilation needs the translator at run time; it cannot be standalone")
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+        self.ast_nodes  = parser_ast
+        self._debug     = debug
+        self.filename   = filename
+        self.standalone = standalone
+        self.opt_level = opt_level
+        self._enabled_passes = ("tail-calls",) if tail_calls else ()
+        self.pass_manager = PassManager(opt_level, dump=dump_passes, time_passes=time_passes,
+                                        enable=self._enabled_passes)
+        self.lazy = lazy
+        self._lazy_nodes = {}
+        self._materializing = False
+        self._pass_context = None
         self._enum_classes = {}
+        TypeInferencer().infer(self.ast_nodes)
+        RangeAnalyzer().analyze(self.ast_nodes)
+        self._function_locals = set()
+        # reference -> names it may share storage with, for the function being translated
+        self._references = {}
+        self._global_names = self._global_vars(self.ast_nodes)
+        self._switch_count = 0
+        self._temp_count = 0
+        # id(node) -> expression emitted instead of translating the node: an
+        # update target's temporaries, or a hoisted loop invariant
+        self._bound_exprs = {}
+        self._program_functions = {n["name"] for n in walk(self.ast_nodes) if n.get("type") == "FunctionDecl"}
+        # callees that cannot print, so a `cout <<` chain calling them needs one write
+        self._quiet_callees = quiet_functions(self.ast_nodes, RUNTIME_CALLEES) | \
+            (RUNTIME_CALLEES - self._program_functions)
+        # module-level lookup tables for switches with constant labels
+        self._switch_tables = []
+        self.memo_size = memo_size
+        # function name -> globals whose writes must clear its cache
+        self.memoized = memoizable_functions(self.ast_nodes, self._global_names) if memoize else {}
+        self._current_function = None
+        self._static_values = self._static_constants(self.ast_nodes)
+        # direct assembly needs the module compiled in this process, with no
+        # later rewrite of function bodies
+        self.backend = "ast" if standalone or lazy or tail_calls else backend
+        # function name -> code object assembled by the direct backend
+        self.direct_code = {}
+        self._direct_candidates = set(top_level_functions(self.ast_nodes)) if self.backend == "direct" else set()
 
     def compile(self) -> "code":
-        runtime_stmts = ast.parse(RUNTIME_SOURCE, mode='exec').body
-        body = list(runtime_stmts)
+        code = compile(self.build_module(), self.filename, "exec")
+        if self.direct_code:
+            code = self._install_direct_code(code)
+        return code
+
+    def _install_direct_code(self, module_code):
+        """Swaps the placeholder bodies compiled for directly assembled functions."""
+        consts = list(module_code.co_consts)
+        for i, const in enumerate(consts):
+            if isinstance(const, type(module_code)) and const.co_name in self.direct_code:
+                direct = self.direct_code[const.co_name]
+                assert direct.co_argcount == const.co_argcount, const.co_name
+                consts[i] = direct.replace(co_qualname=const.co_qualname)
+        return module_code.replace(co_consts=tuple(consts))
+
+    def _assemble_direct(self, node):
+        """Directly assembled code for a top-level function, or None to use the ast path."""
+        if self.backend != "direct" or self._current_function is not None:
+            return None
+        if node["name"] not in self._direct_candidates:
+            return None
+        if self.memoized and written_names(node.get("body", [])) & set().union(*self.memoized.values()):
+            return None  # needs cache_clear() calls
+        try:
+            return assemble_function(self, node, self.filename, RUNTIME_CALLEES)
+        except Unsupported:
+            return None
+
+    def build_module(self) -> ast.Module:
+        self._switch_count, self._switch_tables = 0, []
+        body = self._translate_program()
+        program = ast.Module(body=self._switch_tables + body, type_ignores=[])
+        inline_names = {n["name"] for n in walk(self.ast_nodes) if n.get("type") == "FunctionDecl" and n.get("inline")}
+        self._pass_context = PassContext(self._const_globals(self.ast_nodes), inline_names)
+        program = self.pass_manager.run(program, self._pass_context)
+        if self.lazy:
+            self._pass_context.module_names = set(module_bindings(program))
+        if self.standalone:
+            prelude = shake_runtime(program)
+        else:
+            prelude = [self._runtime_import()]
+        module = ast.Module(body=prelude + program.body, type_ignores=[])
+        ast.fix_missing_locations(module)
+        return module
+
+    def new_namespace(self, **tiers) -> dict:
+        """Globals dict to exec the compiled program in.
+
+        Lazy programs need the `__lazy__` loader that creates their stubs;
+        `tiers` are passed on to LazyLoader (hot_level, hot_threshold).
+        """
+        namespace = {}
+        if self.lazy:
+            namespace["__lazy__"] = LazyLoader(self, namespace, self.opt_level, **tiers)
+        return namespace
+
+    def compile_function(self, name: str, opt_level: int) -> "code":
+        """Translates and compiles one lazily deferred function at `opt_level`."""
+        self._materializing = True
+        self._switch_tables = []
+        try:
+            func_def = self._translate(self._lazy_nodes[name])
+        finally:
+            self._materializing = False
+        module = ast.Module(body=self._switch_tables + [func_def], type_ignores=[])
+        passes = PassManager(opt_level, enable=self._enabled_passes)
+        module = passes.run(module, self._pass_context)
+        ast.fix_missing_locations(module)
+        return compile(module, self.filename, "exec")
+
+    def emit_python_source(self) -> str:
+        """Python source for the translated program (self-contained when standalone)."""
+        return ast.unparse(self.build_module())
+
+    def _translate_program(self):
+        body = []
         for node in self.ast_nodes:
             if node is None:
                 continue
@@ -723,21 +505,65 @@ class CppToPythonBytecode:
                 body.extend(t for t in translated if t is not None)
             elif translated is not None:
                 body.append(translated)
-        module = ast.Module(body=body, type_ignores=[])
-        ast.fix_missing_locations(module)
-        return compile(module, "<cpp_transpiler>", "exec")
+        return body
 
-    def dump_python_ast(self):
-        body = []
-        for node in self.ast_nodes:
-            if node is None:
+    def _const_globals(self, nodes):
+        """Global names C++ guarantees are never reassigned: const/constexpr and enumerators."""
+        names = set()
+        for node in nodes:
+            if not node:
                 continue
-            t = self._translate(node)
-            if isinstance(t, list):
-                body.extend(x for x in t if x is not None)
-            elif t is not None:
-                body.append(t)
-        module = ast.Module(body=body, type_ignores=[])
+            kind = node.get("type")
+            if kind == "VarDecl" and node.get("isConst") and not node.get("arraySize"):
+                names.add(node["name"])
+            elif kind == "MultiVarDecl":
+                names |= self._const_globals(node["decls"])
+            elif kind == "EnumDecl":
+                names.update(e["name"] for e in node.get("enumerators", []))
+            elif kind == "Namespace":
+                names |= self._const_globals(node.get("body", []))
+        return names
+
+    def _static_constants(self, nodes):
+        """Values of enumerators and of const globals initialised with a literal."""
+        values = {}
+        for node in nodes:
+            if not node:
+                continue
+            kind = node.get("type")
+            if kind == "VarDecl" and node.get("isConst") and not node.get("arraySize"):
+                init = node.get("init")
+                if init and init.get("type") in ("NumberLiteral", "CharLiteral"):
+                    values[node["name"]] = self._translate(init).value
+            elif kind == "MultiVarDecl":
+                values.update(self._static_constants(node["decls"]))
+            elif kind == "EnumDecl":
+                values.update((e["name"], e["value"]) for e in node.get("enumerators", []))
+            elif kind == "Namespace":
+                values.update(self._static_constants(node.get("body", [])))
+        return values
+
+    def _global_vars(self, nodes):
+        """Names of variables declared at namespace scope."""
+        names = set()
+        for node in nodes:
+            if not node:
+                continue
+            kind = node.get("type")
+            if kind == "VarDecl":
+                names.add(node["name"])
+            elif kind == "MultiVarDecl":
+                names |= self._global_vars(node["decls"])
+            elif kind == "Namespace":
+                names |= self._global_vars(node.get("body", []))
+        return names
+
+    def _runtime_import(self):
+        """`from cpp_runtime import *` -- the runtime is compiled once per process."""
+        return ast.ImportFrom(module=RUNTIME_MODULE, names=[ast.alias(name="*")], level=0)
+
+    def dump_python_ast(self):
+        module = ast.Module(body=self._translate_program(), type_ignores=[])
         ast.fix_missing_locations(module)
         print(ast.dump(module, indent=2))
 
@@ -746,31 +572,151 @@ class CppToPythonBytecode:
 
     def _extract_cin_targets(self, node):
         """Recursively unwraps `cin >> x >> y` and returns the target variables `[x, y]`."""
-        if node.get("type") == "Identifier" and node.get("name") in ("cin", "std::cin"):
-            return []
-        if node.get("type") == "MemberAccess":
-            obj = node.get("object")
-            if obj.get("type") == "Identifier" and obj.get("name") == "std" and node.get("member") == "cin":
-                return []
-        if node.get("type") == "BinaryExpr" and node.get("op") == "SHIFT_RIGHT":
-            left_targets = self._extract_cin_targets(node["left"])
-            if left_targets is None:
-                return None
-            return left_targets + [node["right"]]
+        return cin_targets(node)
+
+    def _output_segments(self, items):
+        """Groups the items of a `cout << ...` chain into the text of successive writes.
+
+        Returns `(pieces, method)` pairs. A piece is literal text or
+        `(item, spec)`: spec "d" prints a bool as 0/1, "" prints str() of a
+        value of known type and None leaves the choice to `_ostr` at run time.
+        A new write starts before any item that calls code which might do I/O
+        itself, so output keeps its order. `std::endl` and `std::flush` end
+        their segment, which is then written with the stream's `endl` method
+        so the runtime can flush according to its output mode.
+        """
+        segments = [([], "write")]
+        for item in items:
+            if segments[-1][1] == "endl" or (segments[-1][0] and performs_io(item, self._quiet_callees)):
+                segments.append(([], "write"))
+            pieces = segments[-1][0]
+            manipulator = item["name"] if item.get("type") == "Identifier" else \
+                f"std::{item['member']}" if item.get("type") == "MemberAccess" and root_name(item) == "std" else None
+            if manipulator in STREAM_FLUSHERS:
+                if manipulator.endswith("endl"):
+                    pieces.append("\n")
+                segments[-1] = (pieces, "endl")
+                continue
+            if item.get("type") in ("StringLiteral", "CharLiteral", "NumberLiteral", "Identifier"):
+                value = self._translate(item)
+                if isinstance(value, ast.Constant):
+                    pieces.append(str(int(value.value)) if isinstance(value.value, bool) else str(value.value))
+                    continue
+            ctype = self._ctype(item)
+            if ctype.name == "bool":
+                pieces.append((item, "d"))
+            elif ctype.is_floating or ctype.name in ("string", "char") or (ctype.is_integral and _holds_int(item)):
+                pieces.append((item, ""))
+            else:
+                pieces.append((item, None))
+        return [(_merge_text(pieces), method) for pieces, method in segments if pieces or method == "endl"]
+
+    def _translate_output(self, stream, items):
+        """`cout << a << b` as `cout.write(f'{a}{b}')`, chaining one write per segment."""
+        result = ast.Name(id=stream, ctx=ast.Load())
+        for segment, method in self._output_segments(items):
+            parts = []
+            for piece in segment:
+                if isinstance(piece, str):
+                    parts.append(ast.Constant(value=piece))
+                    continue
+                item, spec = piece
+                value = self._translate(item)
+                if spec is None:
+                    value = ast.Call(func=ast.Name(id="_ostr", ctx=ast.Load()), args=[value], keywords=[])
+                format_spec = ast.JoinedStr(values=[ast.Constant(value=spec)]) if spec else None
+                parts.append(ast.FormattedValue(value=value, conversion=-1, format_spec=format_spec))
+            result = ast.Call(func=ast.Attribute(value=result, attr=method, ctx=ast.Load()),
+                              args=[_text_expr(parts)], keywords=[])
+        return result
+
+    def _format_text(self, fmt_node, arg_nodes):
+        """printf's output for a literal format as an f-string; None to format at run time."""
+        if fmt_node.get("type") != "StringLiteral":
+            return None
+        pieces = _printf_format(fmt_node["value"])
+        if pieces is None or sum(not isinstance(piece, str) for piece in pieces) != len(arg_nodes):
+            return None
+        args = iter(arg_nodes)
+        parts = []
+        for piece in pieces:
+            if isinstance(piece, str):
+                parts.append(ast.Constant(value=piece))
+                continue
+            kind, spec, mask = piece
+            node = next(args)
+            value = self._translate(node)
+            ctype = self._ctype(node)
+            plain_int = ctype.is_integral and ctype.name != "char"
+            if kind in ("int", "unsigned") and not plain_int:
+                value = ast.Call(func=ast.Name(id="_c_int", ctx=ast.Load()), args=[value], keywords=[])
+            if kind == "unsigned":
+                value = ast.BinOp(left=value, op=ast.BitAnd(), right=ast.Constant(value=mask))
+            elif kind == "char":
+                value = ast.Call(func=ast.Name(id="chr" if plain_int else "_c_char", ctx=ast.Load()),
+                                 args=[value], keywords=[])
+            format_spec = ast.JoinedStr(values=[ast.Constant(value=spec)]) if spec else None
+            parts.append(ast.FormattedValue(value=value, conversion=-1, format_spec=format_spec))
+        return _text_expr(parts)
+
+    def _translate_scanf(self, callee, arg_nodes, args):
+        """scanf/sscanf storing into their `&x` arguments; the value is C's return value."""
+        source = 1 if callee == "sscanf" else 0
+        targets = [t["expr"] if t.get("type") == "AddressOfExpr" else t for t in arg_nodes[source + 1:]]
+        fmt_node = arg_nodes[source]
+        convs = _scanf_plain(fmt_node["value"]) if callee == "scanf" and fmt_node.get("type") == "StringLiteral" else None
+        if convs is None or len(convs) != len(targets):
+            # match the format at run time, then hand the converted values out in order
+            head = ast.Call(func=ast.Name(id=f"_{callee}", ctx=ast.Load()), args=args[:source + 1], keywords=[])
+            reads = [self._build_cin_expr(t, ast.Call(func=ast.Name(id="_scanned", ctx=ast.Load()), args=[], keywords=[]))
+                     for t in targets]
+            if not reads:
+                return head
+            return ast.Subscript(value=ast.Tuple(elts=[head] + reads, ctx=ast.Load()),
+                                 slice=ast.Constant(value=0), ctx=ast.Load())
+        # `r1 and (r2 and 2 or 1) or _scan_nothing()`: the number of values stored,
+        # and 0 or EOF when the first read fails on a mismatch or at end of input
+        result = ast.Constant(value=len(convs))
+        for count in range(len(convs), 0, -1):
+            reader = ast.Name(id=SCANF_READERS[convs[count - 1]], ctx=ast.Load())
+            read = self._build_cin_expr(targets[count - 1], ast.Call(func=reader, args=[], keywords=[]))
+            stop = ast.Constant(value=count - 1) if count > 1 else self._call("_scan_nothing", [])
+            result = ast.BoolOp(op=ast.Or(), values=[ast.BoolOp(op=ast.And(), values=[read, result]), stop])
+        return result
+
+    def _cin_reader(self, target_node):
+        """Runtime reader for `cin >> target`, or None when the target's type is unknown."""
+        ctype = self._ctype(target_node)
+        if ctype.name == "char":
+            return "_read_char"
+        if ctype.name == "string":
+            return "_read_word"
+        if ctype.is_floating:
+            return "_read_float"
+        if ctype.is_integral and ctype.name != "bool":
+            return "_read_int"
         return None
 
-    def _build_cin_expr(self, target_node):
-        """Builds Python AST expression that dynamically reads and assigns based on target type."""
+    def _build_cin_expr(self, target_node, read_call=None):
+        """Reads into `target_node`; the expression is false once input is exhausted.
+
+        `read_call` defaults to the typed reader for the target's declared
+        type, falling back to `_cin_read`, which converts by the current value.
+        """
+        reader = self._cin_reader(target_node) if read_call is None else None
+        if reader is not None:
+            read_call = ast.Call(func=ast.Name(id=reader, ctx=ast.Load()), args=[], keywords=[])
+
+        def reading(target_load):
+            if read_call is not None:
+                return read_call
+            return ast.Call(func=ast.Name(id='_cin_read', ctx=ast.Load()), args=[target_load], keywords=[])
+
         if target_node.get("type") == "Identifier":
             target_store = ast.Name(id=target_node["name"], ctx=ast.Store())
             target_load = ast.Name(id=target_node["name"], ctx=ast.Load())
-            read_call = ast.Call(
-                func=ast.Name(id='_cin_read', ctx=ast.Load()),
-                args=[target_load],
-                keywords=[]
-            )
-            # Uses Python 3.8+ Walrus Operator (x := _cin_read(x))
-            named_expr = ast.NamedExpr(target=target_store, value=read_call)
+            # x := _read_int() is not None
+            named_expr = ast.NamedExpr(target=target_store, value=reading(target_load))
             return ast.Compare(
                 left=named_expr,
                 ops=[ast.IsNot()],
@@ -780,28 +726,18 @@ class CppToPythonBytecode:
             arr_ast = self._translate(target_node["array"])
             idx_ast = self._translate(target_node["index"])
             target_load = ast.Subscript(value=arr_ast, slice=idx_ast, ctx=ast.Load())
-            read_call = ast.Call(
-                func=ast.Name(id='_cin_read', ctx=ast.Load()),
-                args=[target_load],
-                keywords=[]
-            )
             return ast.Call(
-                func=ast.Name(id='_set_item', ctx=ast.Load()),
-                args=[arr_ast, idx_ast, read_call],
+                func=ast.Name(id='_cin_set_item', ctx=ast.Load()),
+                args=[arr_ast, idx_ast, reading(target_load)],
                 keywords=[]
             )
         elif target_node.get("type") == "MemberAccess":
             obj_ast = self._translate(target_node["object"])
             member = target_node["member"]
             target_load = ast.Attribute(value=obj_ast, attr=member, ctx=ast.Load())
-            read_call = ast.Call(
-                func=ast.Name(id='_cin_read', ctx=ast.Load()),
-                args=[target_load],
-                keywords=[]
-            )
             return ast.Call(
-                func=ast.Name(id='_set_attr', ctx=ast.Load()),
-                args=[obj_ast, ast.Constant(value=member), read_call],
+                func=ast.Name(id='_cin_set_attr', ctx=ast.Load()),
+                args=[obj_ast, ast.Constant(value=member), reading(target_load)],
                 keywords=[]
             )
         else:
@@ -811,6 +747,10 @@ class CppToPythonBytecode:
         if node is None:
             return None
 
+        bound = self._bound_exprs.get(id(node))
+        if bound is not None:
+            return copy.deepcopy(bound)
+
         node_type = node.get("type")
         if self._debug:
             print(f"[translate] {node_type}")
@@ -820,7 +760,43 @@ class CppToPythonBytecode:
             raise NotImplementedError(
                 f"No translation handler for node type: '{node_type}'\nNode: {node}"
             )
-        return handler(node)
+        result = handler(node)
+        span = node.get("span")
+        if span is not None:
+            self._apply_span(result, span)
+        if self.memoized and self._current_function and node_type in ("ExprStmt", "VarDecl", "MultiVarDecl"):
+            clears = self._memo_invalidations(node)
+            if clears:
+                result = (result if isinstance(result, list) else [result]) + clears
+        return result
+
+    def _memo_invalidations(self, node):
+        """`f.cache_clear()` for every memoized f that reads a global `node` writes."""
+        written = written_names([node])
+        return [
+            ast.Expr(value=ast.Call(
+                func=ast.Attribute(value=ast.Name(id=name, ctx=ast.Load()), attr="cache_clear", ctx=ast.Load()),
+                args=[], keywords=[]
+            ))
+            for name, reads in sorted(self.memoized.items()) if reads & written
+        ]
+
+    def _apply_span(self, result, span):
+        """Copies a parser span onto translated nodes that have no location yet.
+
+        Children without a span of their own inherit it later through
+        ``ast.fix_missing_locations``, so line tables follow the C++ source.
+        """
+        line, col, end_line, end_col = span
+        for py_node in (result if isinstance(result, list) else [result]):
+            if not isinstance(py_node, ast.AST) or "lineno" not in py_node._attributes:
+                continue
+            if getattr(py_node, "lineno", None) is not None:
+                continue
+            py_node.lineno = line
+            py_node.col_offset = col - 1
+            py_node.end_lineno = end_line
+            py_node.end_col_offset = end_col - 1
 
     def _expr_stmt(self, expr_node):
         if isinstance(expr_node, ast.expr):
@@ -828,6 +804,15 @@ class CppToPythonBytecode:
         return expr_node
 
     def _translate_FunctionDecl(self, node):
+        if self.lazy and not self._materializing and self._current_function is None:
+            # `name = __lazy__("name")`: compiled by the stub on first call
+            self._lazy_nodes[node["name"]] = node
+            return ast.Assign(
+                targets=[ast.Name(id=node["name"], ctx=ast.Store())],
+                value=ast.Call(func=ast.Name(id="__lazy__", ctx=ast.Load()),
+                               args=[ast.Constant(value=node["name"])], keywords=[])
+            )
+        direct = self._assemble_direct(node)
         params = node.get("params", [])
         py_args = []
         defaults = []
@@ -846,6 +831,19 @@ class CppToPythonBytecode:
             kwarg=None,
             defaults=defaults,
         )
+        outer_locals, outer_function = self._function_locals, self._current_function
+        outer_references = self._references
+        if direct is not None:
+            # placeholder def (plus its `global` line, which passes rely on); compile() swaps in the assembled body
+            self.direct_code[node["name"]] = direct
+            local_names = {a.arg for a in py_args} | declared_names(node.get("body", []))
+            stored = written_names(node.get("body", [])) & (self._global_names - local_names)
+            body = [ast.Global(names=sorted(stored))] if stored else []
+            return ast.FunctionDef(name=node["name"], args=args, body=body + [ast.Pass()],
+                                   decorator_list=self._function_decorators(node, outer_function), returns=None)
+        self._function_locals = {a.arg for a in py_args} | declared_names(node.get("body", []))
+        self._references = reference_aliases(node.get("params", []), node.get("body", []), self._global_names)
+        self._current_function = node["name"]
         raw_body = []
         for stmt in node.get("body", []):
             if stmt is None:
@@ -855,19 +853,47 @@ class CppToPythonBytecode:
                 raw_body.extend(t for t in translated if t is not None)
             elif translated is not None:
                 raw_body.append(translated)
+        assigned_globals = self._assigned_names(raw_body) & (self._global_names - self._function_locals)
+        self._function_locals, self._current_function = outer_locals, outer_function
+        self._references = outer_references
         body = raw_body if raw_body else [ast.Pass()]
+        if assigned_globals:
+            body.insert(0, ast.Global(names=sorted(assigned_globals)))
         return ast.FunctionDef(
             name=node["name"],
             args=args,
             body=body,
-            decorator_list=[],
+            decorator_list=self._function_decorators(node, outer_function),
             returns=None,
         )
 
+    def _function_decorators(self, node, outer_function):
+        if node["name"] in self.memoized and outer_function is None:
+            return [ast.Call(
+                func=ast.Attribute(value=ast.Name(id="functools", ctx=ast.Load()), attr="lru_cache", ctx=ast.Load()),
+                args=[], keywords=[ast.keyword(arg="maxsize", value=ast.Constant(value=self.memo_size))]
+            )]
+        return []
+
+    def _assigned_names(self, stmts):
+        """Names bound by `stmts` in their own scope (nested defs are skipped)."""
+        names = set()
+        pending = list(stmts)
+        while pending:
+            py_node = pending.pop()
+            if isinstance(py_node, ast.Name) and isinstance(py_node.ctx, (ast.Store, ast.Del)):
+                names.add(py_node.id)
+            if not isinstance(py_node, (ast.FunctionDef, ast.Lambda)):
+                pending.extend(ast.iter_child_nodes(py_node))
+        return names
+
     def _translate_VarDecl(self, node):
         target = ast.Name(id=node["name"], ctx=ast.Store())
-        if node.get("init"):
-            value = self._translate(node["init"])
+        if node.get("init") and node["init"].get("type") == "InitializerList" and self._ctype(node).is_ordered:
+            value = self._ordered_container(self._ctype(node), [node["init"]])
+        elif node.get("init"):
+            value = self._coerce(self._translate(node["init"]), self._ctype(node), self._ctype(node["init"]))
+            value = self._narrowed(node, value)
         elif node.get("arraySize"):
             size = self._translate(node["arraySize"])
             value = ast.BinOp(
@@ -885,6 +911,10 @@ class CppToPythonBytecode:
                 value = ast.Constant(value=False)
             elif type_name == "string":
                 value = ast.Constant(value="")
+            elif type_name == "priority_queue":
+                value = self._priority_queue(self._ctype(node), [])
+            elif self._ctype(node).is_ordered:
+                value = self._ordered_container(self._ctype(node), [])
             elif type_name in CONSTRUCTOR_DISPATCH:
                 fn = ast.Name(id=CONSTRUCTOR_DISPATCH[type_name], ctx=ast.Load())
                 value = ast.Call(func=fn, args=[], keywords=[])
@@ -894,6 +924,121 @@ class CppToPythonBytecode:
                 value = ast.Constant(value=None)
         return ast.Assign(targets=[target], value=value)
 
+    def _priority_queue(self, ctype, arg_nodes):
+        """`_PriorityQueue(order, before, items)` for a priority_queue of `ctype`
+        built by the C++ constructor taking `arg_nodes`: (compare), (compare,
+        container), (first, last) or (first, last, compare)."""
+        order = _heap_order(ctype)
+        items = _iterated(*arg_nodes[:2]) if len(arg_nodes) >= 2 else None
+        if items is not None:
+            compare = arg_nodes[2] if len(arg_nodes) > 2 else None
+        else:
+            compare = arg_nodes[0] if arg_nodes else None
+            items = arg_nodes[1] if len(arg_nodes) > 1 else None
+        # less<T>/greater<T> objects carry no state: `order` already says it all
+        before = self._translate(compare) if order == "ranked" and compare is not None \
+            and self._ctype(compare).name not in ("less", "greater") else None
+        args = [ast.Constant(value=order)]
+        if before is not None or items is not None:
+            args.append(before or ast.Constant(value=None))
+        if items is not None:
+            args.append(self._translate(items))
+        return self._call("_PriorityQueue", args)
+
+    def _ordered_container(self, ctype, arg_nodes):
+        """`_OrderedSet(...)` or `_OrderedMap(...)` for an ordered container of
+        `ctype` built by the C++ constructor taking `arg_nodes`: (compare),
+        (items), (items, compare), (first, last) or (first, last, compare)."""
+        is_map = ctype.container_kind == "map"
+        items = _iterated(*arg_nodes[:2]) if len(arg_nodes) >= 2 else None
+        rest = arg_nodes[2:] if items is not None else arg_nodes
+        if items is None and rest and (rest[0].get("type") == "InitializerList"
+                                       or self._ctype(rest[0]).container_kind):
+            items, rest = rest[0], rest[1:]
+        keywords = []
+        if ctype.name.startswith("multi"):
+            keywords.append(ast.keyword(arg="multi", value=ast.Constant(value=True)))
+        order = self._tree_order(ctype, rest[0] if rest else None)
+        if order is not None:
+            keywords.append(ast.keyword(arg="order", value=order))
+        if items is not None:
+            keywords.append(ast.keyword(arg="items", value=self._translate(items)))
+        mapped = ctype.args[1] if is_map and len(ctype.args) > 1 else UNKNOWN
+        args = [self._default_factory(mapped)] if is_map else []
+        return ast.Call(func=ast.Name(id="_OrderedMap" if is_map else "_OrderedSet", ctx=ast.Load()),
+                        args=args, keywords=keywords)
+
+    def _tree_order(self, ctype, compare):
+        """Key encoding that sorts an ordered container of `ctype` by its
+        comparator, or None for the natural order of less<T>."""
+        args = ctype.args
+        index = 2 if ctype.container_kind == "map" else 1
+        name = args[index].name if len(args) > index else "less"
+        if name == "less":
+            return None
+        if name == "greater":
+            return ast.Name(id="_negated" if _negatable(args[0]) else "_greater_key", ctx=ast.Load())
+        if compare is not None:
+            return self._call("_comparator_key", [self._translate(compare)])
+        return None
+
+    def _default_value(self, ctype):
+        """Value-initialized `ctype`: what `m[key]` stores for a missing key."""
+        if ctype.is_floating:
+            return ast.Constant(value=0.0)
+        if ctype.name == "bool":
+            return ast.Constant(value=False)
+        if ctype.name == "string":
+            return ast.Constant(value="")
+        if ctype.name in ("pair", "tuple"):
+            return ast.List(elts=[self._default_value(arg) for arg in ctype.args], ctx=ast.Load())
+        if ctype.is_ordered:
+            return self._ordered_container(ctype, [])
+        if ctype.name == "priority_queue":
+            return self._priority_queue(ctype, [])
+        if ctype.container_kind and ctype.name in CONSTRUCTOR_DISPATCH:
+            return self._call(CONSTRUCTOR_DISPATCH[ctype.name], [])
+        return ast.Constant(value=0)
+
+    def _default_factory(self, ctype):
+        """Zero-argument callable returning `_default_value(ctype)`."""
+        value = self._default_value(ctype)
+        if isinstance(value, ast.Constant):
+            return ast.Name(id=type(value.value).__name__, ctx=ast.Load())
+        if isinstance(value, ast.Call) and not value.args and not value.keywords:
+            return value.func
+        no_args = ast.arguments(posonlyargs=[], args=[], vararg=None, kwonlyargs=[],
+                                kw_defaults=[], kwarg=None, defaults=[])
+        return ast.Lambda(args=no_args, body=value)
+
+    def _ctype(self, node):
+        """Type attached to a parser node by TypeInferencer."""
+        return node.get("ctype", UNKNOWN) if isinstance(node, dict) else UNKNOWN
+
+    def _coerce(self, value, target_type, value_type):
+        """C++ truncates when a floating value is stored into an integer and
+        stores a bool into any other arithmetic type as 0 or 1."""
+        if target_type.is_integral and target_type.name not in ("bool", "char") and value_type.is_floating:
+            return ast.Call(func=ast.Name(id="int", ctx=ast.Load()), args=[value], keywords=[])
+        if target_type.is_arithmetic and target_type.name not in ("bool", "char") and value_type.name == "bool":
+            return ast.Call(func=ast.Name(id="int", ctx=ast.Load()), args=[value], keywords=[])
+        return value
+
+    def _wrap(self, value, ctype):
+        """Reduces an exact integer to `ctype`'s width, two's complement for signed types."""
+        bits, signed = INTEGER_WIDTHS[ctype.name]
+        mask = ast.Constant(value=(1 << bits) - 1)
+        if not signed:
+            return ast.BinOp(left=value, op=ast.BitAnd(), right=mask)
+        half = ast.Constant(value=1 << bits - 1)
+        shifted = ast.BinOp(left=value, op=ast.Add(), right=half)
+        return ast.BinOp(left=ast.BinOp(left=shifted, op=ast.BitAnd(), right=mask), op=ast.Sub(), right=half)
+
+    def _narrowed(self, node, value, key="narrow"):
+        """`value` wrapped to the type range analysis found it may not fit (see range_analysis)."""
+        target = node.get(key) if isinstance(node, dict) else None
+        return self._wrap(value, target) if target else value
+
     def _translate_MultiVarDecl(self, node):
         stmts = []
         for decl in node["decls"]:
@@ -901,14 +1046,35 @@ class CppToPythonBytecode:
         return stmts
 
     def _translate_ReturnStmt(self, node):
-        value = self._translate(node["expr"]) if node.get("expr") else None
+        value = self._narrowed(node, self._translate(node["expr"])) if node.get("expr") else None
         return ast.Return(value=value)
 
     def _translate_ExprStmt(self, node):
-        expr_node = self._translate(node["expr"])
-        if isinstance(expr_node, ast.expr):
-            return ast.Expr(value=expr_node)
-        return expr_node
+        return self._translate_effect(node["expr"])
+
+    def _translate_effect(self, node):
+        """Statements evaluating `node` only for its side effects.
+
+        Assignments and ++/-- become plain (augmented) assignment statements
+        here; `_translate` gives their value-producing forms.
+        """
+        kind = node.get("type")
+        if kind == "ExprList":
+            stmts = []
+            for expr in node.get("exprs", []):
+                result = self._translate_effect(expr)
+                stmts.extend(result if isinstance(result, list) else [result])
+            return stmts
+        if kind == "AssignExpr":
+            result = self._assign_statement(node)
+        elif kind == "UpdateExpr":
+            result = self._update_statement(node)
+        else:
+            result = self._translate(node)
+            return ast.Expr(value=result) if isinstance(result, ast.expr) else result
+        if node.get("span") is not None:
+            self._apply_span(result, node["span"])
+        return result
 
     def _translate_BlockStmt(self, node):
         stmts = []
@@ -926,7 +1092,7 @@ class CppToPythonBytecode:
         stmts = []
 
         if node.get("init"):
-            init_node = self._translate(node["init"])
+            init_node = self._translate_effect(node["init"])
             if isinstance(init_node, list):
                 stmts.extend(x for x in init_node if x is not None)
             elif init_node is not None:
@@ -944,56 +1110,93 @@ class CppToPythonBytecode:
         return stmts if len(stmts) > 1 else if_node
 
     def _translate_WhileStmt(self, node):
-        test = self._translate(node["condition"])
-        body = self._build_body(node.get("body", []))
-        return ast.While(
+        raw_body = node.get("body", [])
+        hoisted, bound = self._hoist_invariants([node["condition"]], raw_body, [node["condition"]] + raw_body)
+        try:
+            test = self._translate(node["condition"])
+            body = self._build_body(raw_body)
+        finally:
+            self._release_bindings(bound)
+        loop = ast.While(
             test=test,
             body=body if body else [ast.Pass()],
             orelse=[]
         )
+        return hoisted + [loop] if hoisted else loop
 
     def _translate_DoWhileStmt(self, node):
-        body = self._build_body(node.get("body", []))
-        condition = self._translate(node["condition"])
+        raw_body = node.get("body", [])
+        # the body runs before the first test: nothing hoisted may raise
+        hoisted, bound = self._hoist_invariants([], raw_body + [node["condition"]], raw_body + [node["condition"]])
+        try:
+            body = self._build_body(raw_body)
+            condition = self._translate(node["condition"])
+        finally:
+            self._release_bindings(bound)
         break_stmt = ast.If(
             test=ast.UnaryOp(op=ast.Not(), operand=condition),
             body=[ast.Break()],
             orelse=[]
         )
         full_body = body + [break_stmt] if body else [break_stmt]
-        return ast.While(
+        loop = ast.While(
             test=ast.Constant(value=True),
             body=full_body,
             orelse=[]
         )
+        return hoisted + [loop] if hoisted else loop
 
     def _translate_ForStmt(self, node):
+        raw_body = node.get("body", [])
+        loop_nodes = [node.get("condition"), node.get("update")] + raw_body
+        counted = self._match_counted_loop(node)
+        if counted is not None:
+            var_name, start, stop, step = counted
+            hoisted, bound = self._hoist_invariants([], raw_body, loop_nodes)
+            try:
+                body = self._build_body(raw_body)
+            finally:
+                self._release_bindings(bound)
+            range_args = [start, stop] if step == 1 else [start, stop, ast.Constant(value=step)]
+            loop = ast.For(
+                target=ast.Name(id=var_name, ctx=ast.Store()),
+                iter=ast.Call(func=ast.Name(id="range", ctx=ast.Load()), args=range_args, keywords=[]),
+                body=body if body else [ast.Pass()],
+                orelse=[]
+            )
+            return hoisted + [loop] if hoisted else loop
+
         stmts = []
         if node.get("init"):
-            init_node = self._translate(node["init"])
+            init_node = self._translate_effect(node["init"])
             if isinstance(init_node, list):
                 stmts.extend(x for x in init_node if x is not None)
             elif init_node is not None:
                 stmts.append(init_node)
 
-        condition = self._translate(node["condition"]) if node.get("condition") else ast.Constant(value=True)
-        body = self._build_body(node.get("body", []))
-
-        if node.get("update"):
-            update_raw = node["update"]
-            if update_raw.get("type") == "ExprList":
-                for e in update_raw["exprs"]:
-                    update_node = self._translate(e)
-                    if isinstance(update_node, ast.expr):
-                        body.append(ast.Expr(value=update_node))
+        tests = [node["condition"]] if node.get("condition") else []
+        hoisted, bound = self._hoist_invariants(tests, raw_body + [node.get("update")], loop_nodes)
+        stmts.extend(hoisted)
+        try:
+            condition = self._translate(node["condition"]) if node.get("condition") else ast.Constant(value=True)
+            body = self._build_body(raw_body)
+
+            update_stmts = []
+            if node.get("update"):
+                update_raw = node["update"]
+                exprs = update_raw["exprs"] if update_raw.get("type") == "ExprList" else [update_raw]
+                for e in exprs:
+                    update_node = self._translate_effect(e)
+                    if isinstance(update_node, list):
+                        update_stmts.extend(update_node)
                     elif update_node is not None:
-                        body.append(update_node)
-            else:
-                update_node = self._translate(update_raw)
-                if isinstance(update_node, ast.expr):
-                    update_node = ast.Expr(value=update_node)
-                if update_node is not None:
-                    body.append(update_node)
+                        update_stmts.append(update_node)
+        finally:
+            self._release_bindings(bound)
+
+        # `continue` must still run the update expression
+        if update_stmts:
+            body = self._update_before_continue(body, update_stmts) + update_stmts
 
         stmts.append(ast.While(
             test=condition,
@@ -1002,6 +1205,214 @@ class CppToPythonBytecode:
         ))
         return stmts
 
+    def _update_before_continue(self, stmts, update_stmts):
+        result = []
+        for stmt in stmts:
+            if isinstance(stmt, ast.Continue):
+                result.extend(copy.deepcopy(update_stmts))
+                result.append(stmt)
+                continue
+            if not isinstance(stmt, (ast.For, ast.While, ast.FunctionDef, ast.ClassDef)):
+                for field in ("body", "orelse", "finalbody"):
+                    block = getattr(stmt, field, None)
+                    if isinstance(block, list):
+                        setattr(stmt, field, self._update_before_continue(block, update_stmts))
+                for handler in getattr(stmt, "handlers", []):
+                    handler.body = self._update_before_continue(handler.body, update_stmts)
+                for case in getattr(stmt, "cases", []):
+                    case.body = self._update_before_continue(case.body, update_stmts)
+            elif isinstance(stmt, (ast.For, ast.While)):
+                stmt.orelse = self._update_before_continue(stmt.orelse, update_stmts)
+            result.append(stmt)
+        return result
+
+    def _match_counted_loop(self, node):
+        """Recognizes `for (int i = a; i < b; i += k)` with constant k.
+
+        Returns ``(name, start, stop, step)`` when the loop can become
+        ``for i in range(start, stop, step)``: the bound must be invariant and
+        the body must not write the induction variable. Otherwise None.
+        """
+        init, cond, update = node.get("init"), node.get("condition"), node.get("update")
+        if not (init and cond and update) or init.get("type") != "VarDecl" or init.get("init") is None:
+            return None
+        if init.get("arraySize") or init.get("varType") not in INTEGER_TYPES:
+            return None
+        var_name = init["name"]
+
+        step = self._counted_loop_step(update, var_name)
+        if step is None or cond.get("type") != "BinaryExpr":
+            return None
+
+        op, left, right = cond["op"], cond["left"], cond["right"]
+        if self._is_name(right, var_name) and not self._is_name(left, var_name):
+            op, left, right = COMPARE_MIRROR.get(op), right, left
+        if not self._is_name(left, var_name):
+            return None
+
+        body = node.get("body", [])
+        written = with_aliases(written_names(body), self._references)
+        if var_name in written or not self._is_loop_invariant(right, body, written):
+            return None
+        if self._ctype(right).is_floating:
+            return None
+
+        bound = self._translate(right)
+        if isinstance(bound, ast.Constant) and not isinstance(bound.value, int):
+            return None
+        if op == "LESS" and step > 0 or op == "GREATER" and step < 0:
+            stop = bound
+        elif op == "LESS_EQUAL" and step > 0:
+            stop = self._offset(bound, 1)
+        elif op == "GREATER_EQUAL" and step < 0:
+            stop = self._offset(bound, -1)
+        elif op == "NOT_EQUAL" and step in (1, -1):
+            stop = bound
+        else:
+            return None
+        return var_name, self._translate(init["init"]), stop, step
+
+    def _offset(self, expr, delta):
+        if isinstance(expr, ast.Constant):
+            return ast.Constant(value=expr.value + delta)
+        op = ast.Add() if delta > 0 else ast.Sub()
+        return ast.BinOp(left=expr, op=op, right=ast.Constant(value=abs(delta)))
+
+    def _counted_loop_step(self, update, var_name):
+        if update.get("type") == "UpdateExpr" and self._is_name(update["expr"], var_name):
+            return 1 if update["op"] == "INCREMENT" else -1
+        if update.get("type") != "AssignExpr" or not self._is_name(update["left"], var_name):
+            return None
+        rhs = update["right"]
+        if rhs.get("type") != "BinaryExpr" or rhs["op"] not in ("PLUS", "MINUS"):
+            return None
+        if self._is_name(rhs["left"], var_name):
+            amount = rhs["right"]
+        elif rhs["op"] == "PLUS" and self._is_name(rhs["right"], var_name):
+            amount = rhs["left"]
+        else:
+            return None
+        value = self._translate(amount)
+        if isinstance(value, ast.UnaryOp) and isinstance(value.op, ast.USub) and isinstance(value.operand, ast.Constant):
+            value = ast.Constant(value=-value.operand.value)
+        if not isinstance(value, ast.Constant) or type(value.value) is not int or value.value == 0:
+            return None
+        return value.value if rhs["op"] == "PLUS" else -value.value
+
+    def _is_name(self, expr, name):
+        return isinstance(expr, dict) and expr.get("type") == "Identifier" and expr.get("name") == name
+
+    def _is_loop_invariant(self, expr, body, written):
+        """True if evaluating `expr` once before the loop gives the same value every iteration."""
+        kind = expr.get("type")
+        if kind == "NumberLiteral":
+            return True
+        if kind == "Identifier":
+            name = expr["name"]
+            if name in written:
+                return False
+            # a call we cannot see into may assign any global, also through a reference
+            return (name in self._function_locals and name not in self._references
+                    or not has_opaque_calls(body, RUNTIME_CALLEES))
+        if kind == "BinaryExpr" and expr["op"] in ARITHMETIC_OPS:
+            if expr["op"] in ("SHIFT_LEFT", "SHIFT_RIGHT") and not self._ctype(expr["left"]).is_integral:
+                return False  # stream insertion or extraction
+            return (self._is_loop_invariant(expr["left"], body, written)
+                    and self._is_loop_invariant(expr["right"], body, written))
+        if kind == "UnaryExpr" and expr["op"] in ("MINUS", "PLUS", "BITWISE_NOT"):
+            return self._is_loop_invariant(expr["expr"], body, written)
+        if kind == "CastExpr":
+            return self._is_loop_invariant(expr["expr"], body, written)
+        if kind == "MethodCall" and expr["method"] in ("size", "length", "empty") and not expr.get("args"):
+            return self._is_loop_invariant(expr["object"], body, written)
+        if kind == "MemberAccess":
+            # fields of locals only; `this` members are also written as bare names
+            return (root_name(expr) in self._function_locals - {"this"} - set(self._references)
+                    and self._is_loop_invariant(expr["object"], body, written))
+        if kind == "IndexExpr":
+            return (self._is_loop_invariant(expr["array"], body, written)
+                    and self._is_loop_invariant(expr["index"], body, written))
+        if kind == "CallExpr" and expr["callee"] in PURE_FUNCTIONS and expr["callee"] not in self._program_functions:
+            return all(self._is_loop_invariant(arg, body, written) for arg in expr.get("args", []))
+        return False
+
+    def _hoist_invariants(self, tests, others, loop_nodes):
+        """Binds the loop-invariant subexpressions of a loop to `_invariant_N` temporaries.
+
+        `tests` are evaluated before the first iteration, so anything
+        invariant in them may move; from `others` (the body, the update)
+        only expressions that cannot raise do, since they might never run.
+        Returns the assignments to place before the loop and the bindings to
+        release once the loop is translated.
+        """
+        loop_nodes = [n for n in loop_nodes if n]
+        written = with_aliases(written_names(loop_nodes), self._references)
+        found = []
+        for test in tests:
+            self._invariant_candidates(test, loop_nodes, written, False, found)
+        for node in others:
+            self._invariant_candidates(node, loop_nodes, written, True, found)
+        assigns, bound, temps = [], [], {}
+        for expr in found:
+            key = _node_key(expr)
+            if key not in temps:
+                temps[key] = f"_invariant_{self._temp_count}"
+                self._temp_count += 1
+                assigns.append(ast.Assign(targets=[ast.Name(id=temps[key], ctx=ast.Store())],
+                                          value=self._translate(expr)))
+            self._bound_exprs[id(expr)] = ast.Name(id=temps[key], ctx=ast.Load())
+            bound.append(id(expr))
+        return assigns, bound
+
+    def _release_bindings(self, bound):
+        for node_id in bound:
+            del self._bound_exprs[node_id]
+
+    def _invariant_candidates(self, expr, loop_nodes, written, safe_only, found):
+        """Collects the largest hoistable subexpressions of `expr` into `found`."""
+        if not isinstance(expr, dict) or id(expr) in self._bound_exprs:
+            return
+        kind = expr.get("type")
+        if kind in ("LambdaExpr", "FunctionDecl", "ClassDecl", "StructDecl"):
+            return
+        if (self._worth_hoisting(expr) and self._is_loop_invariant(expr, loop_nodes, written)
+                and not (safe_only and self._may_raise(expr))):
+            found.append(expr)
+            return
+        if kind == "BinaryExpr" and expr["op"] in ("AND", "OR"):
+            self._invariant_candidates(expr["left"], loop_nodes, written, safe_only, found)
+            self._invariant_candidates(expr["right"], loop_nodes, written, True, found)
+            return
+        if kind == "TernaryExpr":
+            self._invariant_candidates(expr["condition"], loop_nodes, written, safe_only, found)
+            safe_only = True
+        for child in iter_children(expr):
+            self._invariant_candidates(child, loop_nodes, written, safe_only, found)
+
+    def _worth_hoisting(self, expr):
+        """Whether `expr` does any work per evaluation (and is not just constants)."""
+        kind = expr.get("type")
+        if kind in ("UnaryExpr", "CastExpr"):
+            return self._worth_hoisting(expr["expr"])
+        if kind not in ("BinaryExpr", "MethodCall", "MemberAccess", "IndexExpr", "CallExpr"):
+            return False
+        return any(sub.get("type") == "Identifier" for sub in walk(expr))
+
+    def _may_raise(self, expr):
+        for sub in walk(expr):
+            kind = sub.get("type")
+            if kind == "BinaryExpr" and sub["op"] in ("SLASH", "PERCENT", "SHIFT_LEFT", "SHIFT_RIGHT"):
+                # a literal divisor or shift count is checked here instead
+                right = sub["right"]
+                amount = self._case_value(right) if right.get("type") in ("NumberLiteral", "Identifier") else None
+                if not isinstance(amount, int) or amount < 0 or amount == 0 and sub["op"] in ("SLASH", "PERCENT"):
+                    return True
+            if kind == "IndexExpr" or kind == "CallExpr" and sub["callee"] not in ("abs", "max", "min"):
+                return True
+            if kind == "CastExpr" and self._ctype(sub).is_integral and self._ctype(sub["expr"]).is_floating:
+                return True
+        return False
+
     def _translate_RangeForStmt(self, node):
         var_name = node["varName"]
         iterable = self._translate(node["iterable"])
@@ -1016,41 +1427,186 @@ class CppToPythonBytecode:
         )
 
     def _translate_SwitchStmt(self, node):
-        expr = self._translate(node["expr"])
-        tmp_var = "_switch_val"
-        assign = ast.Assign(
-            targets=[ast.Name(id=tmp_var, ctx=ast.Store())],
-            value=expr
+        """Lowers a switch without nesting one `if` per case.
+
+        Labels sharing a body form one block. A small switch whose blocks
+        never fall through and only `break` as their last statement becomes
+        a `match`. Anything else looks its block up in a dict from label to
+        block index (hoisted to module level when every label is a
+        compile-time constant) and binary-searches that index, running
+        consecutive blocks for fall-through. A `break` anywhere but at the
+        end of a block leaves a `while True` wrapper; a `continue` inside it
+        is carried out past the wrapper through a flag.
+        """
+        subject = self._translate(node["expr"])
+        blocks = self._switch_blocks(node.get("cases", []))
+        if not blocks:
+            return [self._expr_stmt(subject)]
+        bodies = [body for _, body in blocks]
+        last = len(blocks) - 1
+        structured = all(
+            len(escaping_jumps(body, "break")) == (1 if self._ends_with_break(body) else 0)
+            and (i == last or ends_with_terminator(body))
+            for i, body in enumerate(bodies)
         )
+        translated = []
+        for _, body in blocks:
+            stmts = self._build_body(body)
+            if structured and self._ends_with_break(body):
+                stmts.pop()
+            translated.append(stmts)
+
+        labels = [(label, self._case_value(label)) for block_labels, _ in blocks
+                  for label in block_labels if label is not None]
+        static = all(value is not NOT_STATIC for _, value in labels)
+        if (structured and static and len(labels) <= SWITCH_MATCH_MAX
+                and all(type(value) in (int, str) for _, value in labels)):
+            return self._switch_match(subject, blocks, translated)
+
+        n = self._switch_count
+        self._switch_count += 1
+        index = f"_switch_{n}"
+        default = next((i for i, (block_labels, _) in enumerate(blocks) if None in block_labels), len(blocks))
+        keys, values = [], []
+        for i, (block_labels, _) in enumerate(blocks):
+            for label in block_labels:
+                if label is not None:
+                    # a hoisted table runs before the globals are bound: key it by value
+                    keys.append(ast.Constant(value=self._case_value(label)) if static else self._translate(label))
+                    values.append(ast.Constant(value=i))
+        table = ast.Dict(keys=keys, values=values)
+        if static:
+            table_name = f"_switch_table_{n}"
+            self._switch_tables.append(ast.Assign(targets=[ast.Name(id=table_name, ctx=ast.Store())], value=table))
+            table = ast.Name(id=table_name, ctx=ast.Load())
+        stmts = [ast.Assign(
+            targets=[ast.Name(id=index, ctx=ast.Store())],
+            value=self._method(table, "get", [subject, ast.Constant(value=default)])
+        )]
+
+        # runs of blocks that fall into each other, keyed by their first block
+        runs, start = [], 0
+        for i, body in enumerate(bodies):
+            if i == last or ends_with_terminator(body):
+                runs.append((start, self._switch_run(index, start, translated[start:i + 1])))
+                start = i + 1
+        if default == len(blocks):
+            runs.append((len(blocks), []))
+        dispatch = self._switch_dispatch(index, runs)
+        if structured:
+            return stmts + dispatch
+
+        flag = f"_switch_{n}_continue"
+        continues = any(escaping_jumps(body, "continue") for body in bodies)
+        if continues:
+            dispatch = self._continue_via_flag(dispatch, flag)
+            stmts.append(ast.Assign(targets=[ast.Name(id=flag, ctx=ast.Store())], value=ast.Constant(value=False)))
+        stmts.append(ast.While(test=ast.Constant(value=True), body=dispatch + [ast.Break()], orelse=[]))
+        if continues:
+            stmts.append(ast.If(test=ast.Name(id=flag, ctx=ast.Load()), body=[ast.Continue()], orelse=[]))
+        return stmts
 
-        cases = node.get("cases", [])
-        if not cases:
-            return [assign]
-
-        def build_if_chain(idx):
-            if idx >= len(cases):
-                return []
-            case = cases[idx]
-            body = self._build_body(case.get("body", []))
-
-            filtered_body = [s for s in body if not isinstance(s, ast.Break)]
-            if not filtered_body:
-                filtered_body = [ast.Pass()]
-
-            rest = build_if_chain(idx + 1)
-
-            if case["value"] is None:
-                return filtered_body + rest
+    def _switch_blocks(self, cases):
+        """[(labels, body)]: labels with an empty body share the next case's body."""
+        blocks, labels = [], []
+        for case in cases:
+            labels.append(case["value"])
+            if case.get("body"):
+                blocks.append((labels, case["body"]))
+                labels = []
+        if labels:
+            blocks.append((labels, []))
+        return blocks
+
+    def _ends_with_break(self, stmts):
+        stmts = [s for s in stmts if s and s.get("type") != "NoOp"]
+        if not stmts:
+            return False
+        if stmts[-1].get("type") == "BlockStmt":
+            return self._ends_with_break(stmts[-1].get("body", []))
+        return stmts[-1].get("type") == "BreakContinueStmt" and stmts[-1]["keyword"] == "break"
+
+    def _case_value(self, label):
+        """Compile-time value of a case label, or NOT_STATIC."""
+        if label.get("type") == "Identifier":
+            name = label["name"]
+            if name in self._static_values and name not in self._function_locals:
+                return self._static_values[name]
+        value = self._translate(label)
+        if isinstance(value, ast.UnaryOp) and isinstance(value.op, (ast.USub, ast.UAdd, ast.Invert)):
+            operand = value.operand
+            if isinstance(operand, ast.Constant) and type(operand.value) is int:
+                return {ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Invert: operator.invert}[
+                    type(value.op)](operand.value)
+        if isinstance(value, ast.Constant) and value.value is not None:
+            return value.value
+        return NOT_STATIC
+
+    def _switch_match(self, subject, blocks, translated):
+        cases = []
+        for (labels, _), body in zip(blocks, translated):
+            values = [ast.MatchValue(value=ast.Constant(value=self._case_value(label)))
+                      for label in labels if label is not None]
+            if None in labels:
+                pattern = ast.MatchAs(pattern=None, name=None)
+            elif len(values) == 1:
+                pattern = values[0]
             else:
-                cond = ast.Compare(
-                    left=ast.Name(id=tmp_var, ctx=ast.Load()),
-                    ops=[ast.Eq()],
-                    comparators=[self._translate(case["value"])]
-                )
-                return [ast.If(test=cond, body=filtered_body, orelse=rest)]
+                pattern = ast.MatchOr(patterns=values)
+            cases.append(ast.match_case(pattern=pattern, guard=None, body=body or [ast.Pass()]))
+        # `case _` must come last; C++ allows `default` anywhere when nothing falls through
+        cases.sort(key=lambda case: isinstance(case.pattern, ast.MatchAs))
+        return ast.Match(subject=subject, cases=cases)
+
+    def _switch_run(self, index, start, bodies):
+        """Blocks start.. that fall into each other: later blocks run whenever an earlier one does."""
+        stmts = []
+        for offset, body in enumerate(bodies):
+            if not body:
+                continue
+            if offset == len(bodies) - 1:
+                stmts.extend(body)
+            else:
+                stmts.append(ast.If(
+                    test=ast.Compare(left=ast.Name(id=index, ctx=ast.Load()), ops=[ast.LtE()],
+                                     comparators=[ast.Constant(value=start + offset)]),
+                    body=body, orelse=[]
+                ))
+        return stmts
 
-        result = build_if_chain(0)
-        return [assign] + result
+    def _switch_dispatch(self, index, runs):
+        """Binary search over `runs` [(first block, stmts)] by block index."""
+        if len(runs) == 1:
+            return runs[0][1]
+        mid = len(runs) // 2
+        return [ast.If(
+            test=ast.Compare(left=ast.Name(id=index, ctx=ast.Load()), ops=[ast.Lt()],
+                             comparators=[ast.Constant(value=runs[mid][0])]),
+            body=self._switch_dispatch(index, runs[:mid]) or [ast.Pass()],
+            orelse=self._switch_dispatch(index, runs[mid:])
+        )]
+
+    def _continue_via_flag(self, stmts, flag):
+        """Replaces `continue`s aimed at the enclosing loop with setting `flag` and breaking out."""
+        result = []
+        for stmt in stmts:
+            if isinstance(stmt, ast.Continue):
+                result.append(ast.Assign(targets=[ast.Name(id=flag, ctx=ast.Store())], value=ast.Constant(value=True)))
+                result.append(ast.Break())
+                continue
+            if not isinstance(stmt, (ast.For, ast.While, ast.FunctionDef, ast.ClassDef)):
+                for field in ("body", "orelse", "finalbody"):
+                    block = getattr(stmt, field, None)
+                    if isinstance(block, list):
+                        setattr(stmt, field, self._continue_via_flag(block, flag))
+                for handler in getattr(stmt, "handlers", []):
+                    handler.body = self._continue_via_flag(handler.body, flag)
+                for case in getattr(stmt, "cases", []):
+                    case.body = self._continue_via_flag(case.body, flag)
+            elif isinstance(stmt, (ast.For, ast.While)):
+                stmt.orelse = self._continue_via_flag(stmt.orelse, flag)
+            result.append(stmt)
+        return result
 
     def _translate_TryStmt(self, node):
         try_body = self._build_body(node.get("body", []))
@@ -1212,24 +1768,133 @@ class CppToPythonBytecode:
         return result
 
     def _translate_AssignExpr(self, node):
+        """An assignment used as a value: a walrus, or `_set_item`/`_set_attr`."""
         left = node["left"]
-        right_val = self._translate(node["right"])
-
-        if left.get("type") == "Identifier":
-            target = ast.Name(id=left["name"], ctx=ast.Store())
-        elif left.get("type") == "IndexExpr":
-            arr = self._translate(left["array"])
-            idx = self._translate(left["index"])
-            target = ast.Subscript(value=arr, slice=idx, ctx=ast.Store())
-        elif left.get("type") == "MemberAccess":
-            obj = self._translate(left["object"])
-            target = ast.Attribute(value=obj, attr=left["member"], ctx=ast.Store())
-        elif left.get("type") == "DerefExpr":
-            target = ast.Name(id="_deref_target", ctx=ast.Store())
+        if left.get("type") == "DerefExpr":
+            return ast.NamedExpr(target=ast.Name(id="_deref_target", ctx=ast.Store()),
+                                 value=self._assigned_value(node))
+        if self._is_compound(node):
+            _, first, later = self._lvalue(left, hoist=False)
+            value = self._with_bound_lvalue(left, self._lvalue_load(later), self._assigned_value, node)
         else:
-            raise NotImplementedError(f"Assignment to {left.get('type')} not supported")
+            first = self._lvalue_parts(left)
+            value = self._assigned_value(node)
+        return self._store_value(first, value, "_set")
 
-        return ast.Assign(targets=[target], value=right_val)
+    def _assign_statement(self, node):
+        left = node["left"]
+        if left.get("type") == "DerefExpr":
+            return ast.Assign(targets=[ast.Name(id="_deref_target", ctx=ast.Store())],
+                              value=self._assigned_value(node))
+        if not self._is_compound(node):
+            target = self._lvalue_store(self._lvalue_parts(left))
+            return ast.Assign(targets=[target], value=self._assigned_value(node))
+        augmented = self._augmented(node)
+        if augmented is not None:
+            return augmented
+        setup, first, later = self._lvalue(left, hoist=True)
+        value = self._with_bound_lvalue(left, self._lvalue_load(later), self._assigned_value, node)
+        assign = ast.Assign(targets=[self._lvalue_store(first)], value=value)
+        return setup + [assign] if setup else assign
+
+    def _assigned_value(self, node):
+        left, right = node["left"], node["right"]
+        value = self._coerce(self._translate(right), self._ctype(left), self._ctype(right))
+        return self._narrowed(node, value)
+
+    def _is_compound(self, node):
+        """Whether `node` came from `x op= y`, which the parser desugars to `x = x op y`."""
+        right = node["right"]
+        return right.get("type") == "BinaryExpr" and right["left"] is node["left"]
+
+    def _augmented(self, node):
+        """`x op= y` as an ast.AugAssign when Python's in-place op computes the same value."""
+        right = node["right"]
+        if node.get("narrow") or right.get("overflow") or right.get("truncate") or right["left"].get("convert"):
+            return None
+        value = self._translate(right)
+        if type(value) is not ast.BinOp or not isinstance(value.left, (ast.Name, ast.Subscript, ast.Attribute)):
+            return None
+        if self._coerce(value, self._ctype(node["left"]), self._ctype(right)) is not value:
+            return None
+        return ast.AugAssign(target=self._as_store(value.left), op=value.op, value=value.right)
+
+    # --- lvalues ---------------------------------------------------------------
+
+    def _lvalue_parts(self, left):
+        """("name", id) / ("item", container, key) / ("attr", object, attr) for storing into `left`."""
+        if left.get("type") == "MemberAccess" and left["member"] not in ("first", "second"):
+            # a struct field, even one named like a container method
+            return ("attr", self._translate(left["object"]), left["member"])
+        loaded = self._translate(left)
+        if isinstance(loaded, ast.Name):
+            return ("name", loaded.id)
+        if isinstance(loaded, ast.Subscript):
+            return ("item", loaded.value, loaded.slice)
+        if isinstance(loaded, ast.Attribute):
+            return ("attr", loaded.value, loaded.attr)
+        raise NotImplementedError(f"Assignment to {left.get('type')} not supported")
+
+    def _lvalue(self, left, hoist):
+        """(setup, first, later) parts of `left` for a read-modify-write.
+
+        Containers and indices that are not plain names or constants are
+        bound to temporaries so they are evaluated once: by `setup`
+        statements when `hoist`, otherwise by walruses in `first`, which must
+        then be evaluated before anything built from `later`.
+        """
+        parts = self._lvalue_parts(left)
+        if parts[0] == "name":
+            return [], parts, parts
+        setup, first, later = [], [parts[0]], [parts[0]]
+        for index, part in enumerate(parts[1:]):
+            if index == 1 and parts[0] == "attr" or self._is_trivial(part):
+                first.append(part)
+                later.append(part)
+                continue
+            temp = f"_lvalue_{self._temp_count}"
+            self._temp_count += 1
+            if hoist:
+                setup.append(ast.Assign(targets=[ast.Name(id=temp, ctx=ast.Store())], value=part))
+                first.append(ast.Name(id=temp, ctx=ast.Load()))
+            else:
+                first.append(ast.NamedExpr(target=ast.Name(id=temp, ctx=ast.Store()), value=part))
+            later.append(ast.Name(id=temp, ctx=ast.Load()))
+        return setup, tuple(first), tuple(later)
+
+    def _is_trivial(self, expr):
+        if isinstance(expr, ast.UnaryOp) and isinstance(expr.op, ast.USub):
+            expr = expr.operand
+        return isinstance(expr, (ast.Name, ast.Constant))
+
+    def _lvalue_load(self, parts):
+        kind = parts[0]
+        if kind == "name":
+            return ast.Name(id=parts[1], ctx=ast.Load())
+        if kind == "item":
+            return ast.Subscript(value=copy.deepcopy(parts[1]), slice=copy.deepcopy(parts[2]), ctx=ast.Load())
+        return ast.Attribute(value=copy.deepcopy(parts[1]), attr=parts[2], ctx=ast.Load())
+
+    def _lvalue_store(self, parts):
+        return self._as_store(self._lvalue_load(parts))
+
+    def _store_value(self, parts, value, helper):
+        """Expression storing `value` into `parts`; `helper` is "_set" (yields the
+        new value) or "_exchange" (yields the old one, names excepted)."""
+        kind = parts[0]
+        if kind == "name":
+            return ast.NamedExpr(target=ast.Name(id=parts[1], ctx=ast.Store()), value=value)
+        key = parts[2] if kind == "item" else ast.Constant(value=parts[2])
+        return ast.Call(func=ast.Name(id=f"{helper}_{kind}", ctx=ast.Load()),
+                        args=[parts[1], key, value], keywords=[])
+
+    def _with_bound_lvalue(self, left, load, fn, *args):
+        """Calls `fn(*args)` with every translation of `left` replaced by `load`."""
+        self._bound_exprs[id(left)] = load
+        try:
+            return fn(*args)
+        finally:
+            del self._bound_exprs[id(left)]
 
     def _translate_BinaryExpr(self, node):
         op_name = node["op"]
@@ -1245,8 +1910,22 @@ class CppToPythonBytecode:
                     return conditions[0]
                 return ast.BoolOp(op=ast.And(), values=conditions)
 
-        left = self._translate(node["left"])
-        right = self._translate(node["right"])
+        if op_name == "SHIFT_LEFT":
+            chain = output_chain(node)
+            if chain is not None:
+                return self._translate_output(*chain)
+
+        if op_name in ("EQUAL", "NOT_EQUAL"):
+            membership = self._match_find_end(node["left"], node["right"]) \
+                or self._match_find_end(node["right"], node["left"])
+            if membership is not None:
+                key, container = membership
+                op = ast.In() if op_name == "NOT_EQUAL" else ast.NotIn()
+                return ast.Compare(left=self._translate(key), ops=[op],
+                                   comparators=[self._translate(container)])
+
+        left = self._narrowed(node["left"], self._translate(node["left"]), "convert")
+        right = self._narrowed(node["right"], self._translate(node["right"]), "convert")
 
         if op_name in COMPARE_OPS:
             return ast.Compare(left=left, ops=[BINARY_OP_MAP[op_name]], comparators=[right])
@@ -1259,9 +1938,33 @@ class CppToPythonBytecode:
             raise NotImplementedError(f"Unsupported binary operator: '{op_name}'")
 
         if op_name == "SLASH":
-            return ast.BinOp(left=left, op=ast.FloorDiv(), right=right)
+            if self._ctype(node["left"]).is_floating or self._ctype(node["right"]).is_floating:
+                return ast.BinOp(left=left, op=ast.Div(), right=right)
+            py_op = ast.FloorDiv()
+
+        if node.get("truncate"):
+            # operands of different signs: floor and truncation disagree
+            helper = "_div_trunc" if op_name == "SLASH" else "_mod_trunc"
+            result = self._inline_helper(helper, [node["left"], node["right"]], [left, right]) \
+                or ast.Call(func=ast.Name(id=helper, ctx=ast.Load()), args=[left, right], keywords=[])
+        else:
+            result = ast.BinOp(left=left, op=py_op, right=right)
+        if node.get("overflow"):
+            result = self._wrap(result, self._ctype(node))
+        return result
 
-        return ast.BinOp(left=left, op=py_op, right=right)
+    def _match_find_end(self, find, end):
+        """(key, container) for `c.find(key)` compared with `c.end()`, else None."""
+        if not (find.get("type") == "MethodCall" and find["method"] == "find"
+                and len(find.get("args", [])) == 1):
+            return None
+        if not (end.get("type") == "MethodCall" and end["method"] in ("end", "cend")):
+            return None
+        if self._ctype(find["object"]).container_kind in ("sequence", "string"):
+            return None
+        if root_name(find["object"]) is None or root_name(find["object"]) != root_name(end["object"]):
+            return None
+        return find["args"][0], find["object"]
 
     def _translate_UnaryExpr(self, node):
         op_name = node["op"]
@@ -1269,42 +1972,67 @@ class CppToPythonBytecode:
         py_op   = UNARY_OP_MAP.get(op_name)
         if py_op is None:
             raise NotImplementedError(f"Unsupported unary operator: '{op_name}'")
-        return ast.UnaryOp(op=py_op, operand=operand)
+        ctype = self._ctype(node)
+        if op_name == "BITWISE_NOT" and ctype.is_unsigned:
+            bits, _ = INTEGER_WIDTHS[ctype.name]
+            return ast.BinOp(left=operand, op=ast.BitXor(), right=ast.Constant(value=(1 << bits) - 1))
+        result = ast.UnaryOp(op=py_op, operand=operand)
+        if node.get("overflow"):
+            result = self._wrap(result, ctype)
+        return result
 
     def _translate_DerefExpr(self, node):
-        return self._translate(node["expr"])
+        inner = node["expr"]
+        if self._ctype(inner).name != "iterator":
+            return self._translate(inner)
+        if inner.get("type") == "MethodCall" and inner["method"] in ("begin", "rbegin") and not inner.get("args"):
+            # the first or last element, without making an iterator
+            return self._method(self._translate(inner["object"]), "front" if inner["method"] == "begin" else "back", [])
+        return self._method(self._translate(inner), "deref", [])
 
     def _translate_AddressOfExpr(self, node):
         return self._translate(node["expr"])
 
     def _translate_UpdateExpr(self, node):
+        """++/-- used as a value."""
+        target = self._update_target(node)
+        _, first, later = self._lvalue(target, hoist=False)
+        value = self._updated_value(node, self._lvalue_load(later))
+        if first[0] != "name":
+            return self._store_value(first, value, "_set" if node.get("prefix") else "_exchange")
+        walrus = self._store_value(first, value, "_set")
+        if node.get("prefix"):
+            return walrus
+        if not node.get("overflow"):
+            undo = ast.Sub() if node["op"] == "INCREMENT" else ast.Add()
+            return ast.BinOp(left=walrus, op=undo, right=ast.Constant(value=1))
+        # the old value, read before the walrus rebinds the name
+        pair = ast.Tuple(elts=[self._lvalue_load(first), walrus], ctx=ast.Load())
+        return ast.Subscript(value=pair, slice=ast.Constant(value=0), ctx=ast.Load())
+
+    def _update_statement(self, node):
+        target = self._update_target(node)
+        op = ast.Add() if node["op"] == "INCREMENT" else ast.Sub()
+        if not node.get("overflow"):
+            store = self._lvalue_store(self._lvalue_parts(target))
+            return ast.AugAssign(target=store, op=op, value=ast.Constant(value=1))
+        setup, first, later = self._lvalue(target, hoist=True)
+        assign = ast.Assign(targets=[self._lvalue_store(first)],
+                            value=self._updated_value(node, self._lvalue_load(later)))
+        return setup + [assign] if setup else assign
+
+    def _update_target(self, node):
         target = node["expr"]
         if target.get("type") not in ("Identifier", "IndexExpr", "MemberAccess"):
             raise NotImplementedError("++/-- only on identifiers/indices/members")
+        return target
 
-        if target["type"] == "Identifier":
-            name = target["name"]
-            lhs = ast.Name(id=name, ctx=ast.Store())
-            rhs_load = ast.Name(id=name, ctx=ast.Load())
-        elif target["type"] == "MemberAccess":
-            obj = self._translate(target["object"])
-            lhs = ast.Attribute(value=obj, attr=target["member"], ctx=ast.Store())
-            rhs_load = ast.Attribute(value=self._translate(target["object"]), attr=target["member"], ctx=ast.Load())
-        else:
-            arr = self._translate(target["array"])
-            idx = self._translate(target["index"])
-            lhs = ast.Subscript(value=arr, slice=idx, ctx=ast.Store())
-            rhs_load = ast.Subscript(
-                value=self._translate(target["array"]),
-                slice=self._translate(target["index"]),
-                ctx=ast.Load()
-            )
-
+    def _updated_value(self, node, load):
         op = ast.Add() if node["op"] == "INCREMENT" else ast.Sub()
-        return ast.Assign(
-            targets=[lhs],
-            value=ast.BinOp(left=rhs_load, op=op, right=ast.Constant(value=1))
-        )
+        value = ast.BinOp(left=load, op=op, right=ast.Constant(value=1))
+        if node.get("overflow"):
+            value = self._wrap(value, self._ctype(node["expr"]))
+        return value
 
     def _translate_TernaryExpr(self, node):
         return ast.IfExp(
@@ -1314,7 +2042,8 @@ class CppToPythonBytecode:
         )
 
     def _translate_CastExpr(self, node):
-        return self._translate(node["expr"])
+        value = self._coerce(self._translate(node["expr"]), self._ctype(node), self._ctype(node["expr"]))
+        return self._narrowed(node, value)
 
     def _translate_NumberLiteral(self, node):
         raw = node["value"]
@@ -1373,6 +2102,8 @@ class CppToPythonBytecode:
             "std::cout":ast.Name(id="cout", ctx=ast.Load()),
             "std::cerr":ast.Name(id="cerr", ctx=ast.Load()),
             "EOF":      ast.Name(id="EOF_VAL", ctx=ast.Load()),
+            # str.find reports a miss as -1
+            "npos":     ast.Constant(value=-1),
         }
         if name in special:
             return special[name]
@@ -1425,7 +2156,11 @@ class CppToPythonBytecode:
         if method in ("size", "length"):
             return ast.Call(func=ast.Name(id="len", ctx=ast.Load()), args=[obj], keywords=[])
 
+        obj_type = self._ctype(node["object"])
+
         if method == "empty":
+            if obj_type.container_kind:
+                return ast.UnaryOp(op=ast.Not(), operand=obj)
             return ast.Compare(
                 left=ast.Call(func=ast.Name(id="len", ctx=ast.Load()), args=[obj], keywords=[]),
                 ops=[ast.Eq()],
@@ -1441,7 +2176,16 @@ class CppToPythonBytecode:
         if method == "second":
             return ast.Subscript(value=obj, slice=ast.Constant(value=1), ctx=ast.Load())
 
+        lowered = self._lower_container_method(obj_type, obj, method, args)
+        if lowered is not None:
+            return lowered
+
         if method == "count":
+            if obj_type.container_kind in ("sequence", "string"):
+                return ast.Call(
+                    func=ast.Attribute(value=obj, attr="count", ctx=ast.Load()),
+                    args=args, keywords=[]
+                )
             return ast.Compare(left=args[0], ops=[ast.In()], comparators=[obj])
 
         if method == "find":
@@ -1493,24 +2237,18 @@ class CppToPythonBytecode:
                 args=[], keywords=[]
             )
 
-        if method in ("push", "emplace"):
-            return ast.Call(
-                func=ast.Attribute(value=obj, attr="append", ctx=ast.Load()),
-                args=args, keywords=[]
-            )
+        # container kind unknown at compile time: let the runtime dispatch
+        if method == "push":
+            return self._call("_push", [obj] + args)
+
+        if method == "emplace":
+            return self._call("_emplace", [obj] + args)
 
         if method == "pop":
-            return ast.Call(
-                func=ast.Attribute(value=obj, attr="pop", ctx=ast.Load()),
-                args=[], keywords=[]
-            )
+            return self._call("_pop", [obj])
 
         if method == "top":
-            return ast.Subscript(
-                value=obj,
-                slice=ast.UnaryOp(op=ast.USub(), operand=ast.Constant(value=1)),
-                ctx=ast.Load()
-            )
+            return self._call("_top", [obj])
 
         if method == "front":
             return ast.Subscript(value=obj, slice=ast.Constant(value=0), ctx=ast.Load())
@@ -1523,16 +2261,10 @@ class CppToPythonBytecode:
             )
 
         if method == "insert":
-            if len(args) == 1:
-                return ast.Call(
-                    func=ast.Attribute(value=obj, attr="add", ctx=ast.Load()),
-                    args=args, keywords=[]
-                )
-            else:
-                return ast.Call(
-                    func=ast.Attribute(value=obj, attr="insert", ctx=ast.Load()),
-                    args=args, keywords=[]
-                )
+            return self._call("_insert", [obj] + args)
+
+        if method == "erase" and len(args) == 1:
+            return self._call("_erase", [obj] + args)
 
         if method == "erase":
             return ast.Call(
@@ -1705,10 +2437,140 @@ class CppToPythonBytecode:
             args=args, keywords=[]
         )
 
+    def _call(self, func, args):
+        return ast.Call(func=ast.Name(id=func, ctx=ast.Load()), args=args, keywords=[])
+
+    def _method(self, obj, method, args):
+        return ast.Call(func=ast.Attribute(value=obj, attr=method, ctx=ast.Load()), args=args, keywords=[])
+
+    def _lower_container_method(self, obj_type, obj, method, args):
+        """Exact Python operation for an STL method on a container of known kind.
+
+        Returns None when the kind is unknown or the call has no direct
+        equivalent, leaving it to the generic lowering below.
+        """
+        kind = obj_type.container_kind
+        if kind is None:
+            return None
+        last = args[-1] if args else None
+
+        if obj_type.is_ordered:
+            multi = obj_type.name.startswith("multi")
+            if method == "insert" and args:
+                # insert(hint, value) ignores the hint
+                return self._method(obj, "insert", [last])
+            if method in ("emplace", "emplace_hint") and args:
+                values = args[1:] if method == "emplace_hint" else args
+                if kind == "map" and len(values) == 2:
+                    return self._method(obj, "emplace", values)
+                value = values[0] if len(values) == 1 else ast.List(elts=values, ctx=ast.Load())
+                return self._method(obj, "insert", [value])
+            if (method == "contains" or method == "count" and not multi) and len(args) == 1:
+                return ast.Compare(left=args[0], ops=[ast.In()], comparators=[obj])
+            if method in TREE_METHODS:
+                return self._method(obj, method, args)
+
+        if kind == "set":
+            if method in ("insert", "emplace") and args:
+                return self._method(obj, "add", [last])
+            if method == "erase" and len(args) == 1:
+                return self._method(obj, "discard", args)
+            if method in ("count", "find", "contains") and len(args) == 1:
+                return ast.Compare(left=args[0], ops=[ast.In()], comparators=[obj])
+
+        elif kind == "map":
+            if method == "insert" and args:
+                # map::insert never overwrites an existing key
+                return self._method(obj, "setdefault", [ast.Starred(value=last, ctx=ast.Load())])
+            if method in ("emplace", "try_emplace") and len(args) == 2:
+                return self._method(obj, "setdefault", args)
+            if method == "erase" and len(args) == 1:
+                return self._method(obj, "pop", [args[0], ast.Constant(value=None)])
+            if method in ("count", "find", "contains") and len(args) == 1:
+                return ast.Compare(left=args[0], ops=[ast.In()], comparators=[obj])
+
+        elif kind == "sequence":
+            is_deque = obj_type.name == "deque"
+            if method in ("insert", "emplace") and len(args) == 2:
+                return self._method(obj, "insert", args)
+            if method == "erase" and len(args) == 1:
+                return self._method(obj, "pop", args)
+            if method == "erase" and len(args) == 2:
+                return self._method(obj, "__delitem__", [self._call("slice", args)])
+            if method in ("push_front", "emplace_front") and len(args) == 1:
+                if is_deque:
+                    return self._method(obj, "appendleft", args)
+                return self._method(obj, "insert", [ast.Constant(value=0)] + args)
+            if method == "pop_front":
+                if is_deque:
+                    return self._method(obj, "popleft", [])
+                return self._method(obj, "pop", [ast.Constant(value=0)])
+
+        elif kind == "string":
+            if method == "find":
+                return self._method(obj, "find", args)
+            if method == "rfind":
+                return self._method(obj, "rfind", args)
+            if method == "erase" and 1 <= len(args) <= 2:
+                # strings are immutable in Python: rebuild and rebind
+                head = ast.Subscript(value=obj, slice=ast.Slice(upper=args[0]), ctx=ast.Load())
+                if len(args) == 1:
+                    value = head
+                else:
+                    tail_start = ast.BinOp(left=copy.deepcopy(args[0]), op=ast.Add(), right=args[1])
+                    tail = ast.Subscript(value=copy.deepcopy(obj), slice=ast.Slice(lower=tail_start), ctx=ast.Load())
+                    value = ast.BinOp(left=head, op=ast.Add(), right=tail)
+                return ast.Assign(targets=[self._as_store(copy.deepcopy(obj))], value=value)
+            if method == "insert" and len(args) == 2:
+                head = ast.Subscript(value=obj, slice=ast.Slice(upper=args[0]), ctx=ast.Load())
+                tail = ast.Subscript(value=copy.deepcopy(obj), slice=ast.Slice(lower=copy.deepcopy(args[0])), ctx=ast.Load())
+                value = ast.BinOp(left=ast.BinOp(left=head, op=ast.Add(), right=args[1]), op=ast.Add(), right=tail)
+                return ast.Assign(targets=[self._as_store(copy.deepcopy(obj))], value=value)
+
+        elif kind in ("stack", "queue"):
+            if method in ("push", "emplace") and len(args) == 1:
+                return self._method(obj, "append", args)
+            if method == "pop":
+                return self._method(obj, "popleft" if kind == "queue" else "pop", [])
+            if method == "top" and kind == "stack":
+                return ast.Subscript(value=obj, slice=ast.Constant(value=-1), ctx=ast.Load())
+
+        elif kind == "priority_queue":
+            order = _heap_order(obj_type)
+            # "min" stores values as they are and "max" scalars just negated:
+            # both skip the method call and go straight to heapq
+            inline = order == "min" or (order == "max" and obj_type.args[0].is_arithmetic)
+            if method == "emplace" and len(args) > 1:
+                method, args = "push", [ast.List(elts=args, ctx=ast.Load())]
+            if method in ("push", "emplace") and len(args) == 1:
+                if not inline:
+                    return self._method(obj, "push", args)
+                value = args[0] if order == "min" else ast.UnaryOp(op=ast.USub(), operand=args[0])
+                return self._call("_heappush", [obj, value])
+            if method == "pop":
+                return self._call("_heappop", [obj])
+            if method == "top":
+                if not inline:
+                    return self._method(obj, "top", [])
+                top = ast.Subscript(value=obj, slice=ast.Constant(value=0), ctx=ast.Load())
+                return top if order == "min" else ast.UnaryOp(op=ast.USub(), operand=top)
+        return None
+
     def _translate_CallExpr(self, node):
         callee = node["callee"]
         args   = [self._translate(a) for a in node.get("args", [])]
 
+        if callee == "priority_queue":
+            return self._priority_queue(self._ctype(node), node.get("args", []))
+
+        if callee in CONSTRUCTOR_DISPATCH and self._ctype(node).is_ordered:
+            return self._ordered_container(self._ctype(node), node.get("args", []))
+
+        if callee in ("next", "prev") and self._ctype(node).name == "iterator":
+            # iterators of ordered containers step with + and -
+            step = args[1] if len(args) > 1 else ast.Constant(value=1)
+            return ast.BinOp(left=args[0], op=ast.Add() if callee == "next" else ast.Sub(), right=step)
+
         if callee in CONSTRUCTOR_DISPATCH:
             fn = ast.Name(id=CONSTRUCTOR_DISPATCH[callee], ctx=ast.Load())
             return ast.Call(func=fn, args=args, keywords=[])
@@ -1717,6 +2579,9 @@ class CppToPythonBytecode:
             mapped = FREE_FUNC_DISPATCH[callee]
             if mapped is None:
                 return ast.Constant(value=None)
+            inlined = self._inline_helper(mapped, node.get("args", []), args)
+            if inlined is not None:
+                return inlined
             fn = ast.Name(id=mapped, ctx=ast.Load())
             return ast.Call(func=fn, args=args, keywords=[])
 
@@ -1746,9 +2611,55 @@ class CppToPythonBytecode:
         if callee == "ignore":
             return ast.Constant(value=None)
 
+        if callee == "printf" and args:
+            text = self._format_text(node["args"][0], node["args"][1:])
+            if text is None:
+                return ast.Call(func=ast.Name(id="_printf", ctx=ast.Load()), args=args, keywords=[])
+            return ast.Call(func=ast.Name(id="_printf_text", ctx=ast.Load()), args=[text], keywords=[])
+
+        if callee == "sprintf" and len(args) >= 2:
+            text = self._format_text(node["args"][1], node["args"][2:]) or \
+                ast.Call(func=ast.Name(id="_sprintf", ctx=ast.Load()), args=args[1:], keywords=[])
+            _, first, _ = self._lvalue(node["args"][0], hoist=False)
+            return ast.Call(func=ast.Name(id="len", ctx=ast.Load()),
+                            args=[self._store_value(first, text, "_set")], keywords=[])
+
+        if (callee == "scanf" and args) or (callee == "sscanf" and len(args) >= 2):
+            return self._translate_scanf(callee, node["args"], args)
+
+        if callee == "getline" and len(args) in (2, 3):
+            read_call = ast.Call(func=ast.Name(id="_read_line", ctx=ast.Load()), args=args[2:], keywords=[])
+            return self._build_cin_expr(node["args"][1], read_call)
+
         fn = ast.Name(id=callee, ctx=ast.Load())
         return ast.Call(func=fn, args=args, keywords=[])
 
+    def _inline_helper(self, helper, arg_nodes, args):
+        """Expands a call to a one-expression runtime helper in place.
+
+        Returns None (keep the call) when the arity differs, an argument's
+        type rules the template out, or a parameter used more than once is
+        bound to an expression that is not a plain name or constant.
+        """
+        if helper not in HELPER_TEMPLATES:
+            return None
+        params, _, kind = HELPER_TEMPLATES[helper]
+        if len(args) != len(params):
+            return None
+        for arg_node in arg_nodes:
+            ctype = self._ctype(arg_node)
+            if arg_node.get("type") == "InitializerList":
+                return None
+            if ctype.is_known and kind == "arith" and not ctype.is_arithmetic:
+                return None
+            if ctype.is_known and kind == "int" and not ctype.is_integral:
+                return None
+        expr, uses = _helper_template(helper)
+        for param, arg in zip(params, args):
+            if uses.get(param, 0) > 1 and not isinstance(arg, (ast.Name, ast.Constant)):
+                return None
+        return _SubstituteParams(dict(zip(params, args))).visit(copy.deepcopy(expr))
+
     def _translate_InitializerList(self, node):
         elements = [self._translate(e) for e in node.get("elements", [])]
         if elements and all(isinstance(e, ast.Constant) and isinstance(e.value, (int, float)) for e in elements):
@@ -1759,16 +2670,21 @@ class CppToPythonBytecode:
         exprs = node.get("exprs", [])
         if not exprs:
             return ast.Constant(value=None)
-        last = self._translate(exprs[-1])
-        return last
+        if len(exprs) == 1:
+            return self._translate(exprs[0])
+        # the comma operator: evaluate every operand, yield the last
+        values = ast.Tuple(elts=[self._translate(e) for e in exprs], ctx=ast.Load())
+        return ast.Subscript(value=values, slice=ast.Constant(value=-1), ctx=ast.Load())
 
 
-def transpile(source_code: str, debug: bool = False) -> "code":
+def transpile(source_code: str, debug: bool = False, filename: str = "<cpp_transpiler>",
+              standalone: bool = False, opt_level: int = 1, memoize: bool = False) -> "code":
     from scanner import Scanner
     from parser  import Parser
     tokens    = Scanner(source_code).scan()
     ast_nodes = Parser(tokens).parse()
-    return CppToPythonBytecode(ast_nodes, debug=debug).compile()
+    return CppToPythonBytecode(ast_nodes, debug=debug, filename=filename, standalone=standalone,
+                               opt_level=opt_level, memoize=memoize).compile()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,582 @@
+"""Experimental backend assembling CPython 3.11 code objects straight from the parser AST.
+
+Only a subset of C++ is handled: scalar locals, arithmetic, comparisons,
+`&&`/`||`, `?:`, if/while/for, break/continue, return, stream output via
+`<<` and calls to free functions. Everything else raises `Unsupported`
+and the translator falls back to its `ast` path for that function. The
+emitted code mirrors what the `ast` path would compute (same division and
+truncation rules, the same masks where range analysis marks a value that
+may wrap, same runtime names), which `main.py --diff-backends` checks by
+running both.
+"""
+import dis
+import opcode
+import sys
+import types
+
+from cpp_analysis import cin_targets, declared_names, output_chain
+from range_analysis import INTEGER_WIDTHS
+
+SUPPORTED_VERSION = (3, 11)
+
+CO_OPTIMIZED = 0x1
+CO_NEWLOCALS = 0x2
+
+# location-table entry kind carrying only a line delta
+LOCATION_NO_COLUMNS = 13
+
+NB = {name: index for index, (name, _) in enumerate(dis._nb_ops)}
+BINARY_NB = {
+    "PLUS": NB["NB_ADD"], "MINUS": NB["NB_SUBTRACT"], "STAR": NB["NB_MULTIPLY"],
+    "PERCENT": NB["NB_REMAINDER"], "SHIFT_LEFT": NB["NB_LSHIFT"], "SHIFT_RIGHT": NB["NB_RSHIFT"],
+    "BITWISE_AND": NB["NB_AND"], "BITWISE_OR": NB["NB_OR"], "BITWISE_XOR": NB["NB_XOR"],
+}
+COMPARE_ARGS = {
+    "LESS": dis.cmp_op.index("<"), "LESS_EQUAL": dis.cmp_op.index("<="),
+    "EQUAL": dis.cmp_op.index("=="), "NOT_EQUAL": dis.cmp_op.index("!="),
+    "GREATER": dis.cmp_op.index(">"), "GREATER_EQUAL": dis.cmp_op.index(">="),
+}
+UNARY_OPS = {
+    "MINUS": "UNARY_NEGATIVE", "PLUS": "UNARY_POSITIVE",
+    "LOGICAL_NOT": "UNARY_NOT", "BITWISE_NOT": "UNARY_INVERT",
+}
+SCALAR_DEFAULTS = {
+    "int": 0, "long": 0, "short": 0, "char": 0, "unsigned": 0, "signed": 0,
+    "float": 0.0, "double": 0.0, "bool": False, "string": "",
+}
+# callees _translate_CallExpr rewrites instead of calling by name
+SPECIAL_CALLEES = {"abs", "max", "min", "get", "tie", "ignore", "getline",
+                   "printf", "sprintf", "scanf", "sscanf", "next", "prev"}
+
+# FORMAT_VALUE flag: a format spec is on the stack above the value
+FORMAT_WITH_SPEC = 0x04
+
+# pseudo jumps resolved to a forward or backward opcode during layout
+RELATIVE_JUMPS = {
+    "JUMP": ("JUMP_FORWARD", "JUMP_BACKWARD"),
+    "POP_JUMP_IF_FALSE": ("POP_JUMP_FORWARD_IF_FALSE", "POP_JUMP_BACKWARD_IF_FALSE"),
+    "POP_JUMP_IF_TRUE": ("POP_JUMP_FORWARD_IF_TRUE", "POP_JUMP_BACKWARD_IF_TRUE"),
+    "JUMP_IF_FALSE_OR_POP": ("JUMP_IF_FALSE_OR_POP", None),
+    "JUMP_IF_TRUE_OR_POP": ("JUMP_IF_TRUE_OR_POP", None),
+}
+UNCONDITIONAL = {"JUMP_FORWARD", "JUMP_BACKWARD", "RETURN_VALUE"}
+
+
+class Unsupported(Exception):
+    """The function uses something this backend cannot assemble."""
+
+
+def available() -> bool:
+    return sys.version_info[:2] == SUPPORTED_VERSION
+
+
+class Label:
+    __slots__ = ("offset",)
+
+    def __init__(self):
+        self.offset = None
+
+
+class Assembler:
+    """Collects instructions and lays them out as 3.11 bytecode."""
+
+    def __init__(self, first_line):
+        self.items = []
+        self.first_line = first_line
+        self.line = first_line
+
+    def emit(self, name, arg=0):
+        self.items.append([name, arg, self.line])
+
+    def place(self, label):
+        self.items.append(label)
+
+    def _size(self, name, arg):
+        extended = 0
+        while arg > 0xFF:
+            arg >>= 8
+            extended += 1
+        return 1 + extended + opcode._inline_cache_entries[opcode.opmap[name]]
+
+    def _layout(self):
+        """Picks jump directions and arguments until instruction sizes settle."""
+        instrs = [item for item in self.items if not isinstance(item, Label)]
+        resolved = {id(i): (RELATIVE_JUMPS[i[0]][0], 0) if i[0] in RELATIVE_JUMPS else (i[0], i[1])
+                    for i in instrs}
+        while True:
+            offset = 0
+            for item in self.items:
+                if isinstance(item, Label):
+                    item.offset = offset
+                else:
+                    offset += self._size(*resolved[id(item)])
+            changed = False
+            offset = 0
+            for item in self.items:
+                if isinstance(item, Label):
+                    continue
+                name, arg = resolved[id(item)]
+                after = offset + self._size(name, arg)
+                if item[0] in RELATIVE_JUMPS:
+                    forward, backward = RELATIVE_JUMPS[item[0]]
+                    target = item[1].offset
+                    if target >= after:
+                        new = (forward, target - after)
+                    elif backward is None:
+                        raise Unsupported(f"{item[0]} cannot jump backwards")
+                    else:
+                        new = (backward, after - target)
+                    if new != (name, arg):
+                        resolved[id(item)] = new
+                        changed = True
+                offset = after
+            if not changed:
+                return [(resolved[id(i)][0], resolved[id(i)][1], i[2], i[1] if i[0] in RELATIVE_JUMPS else None)
+                        for i in instrs]
+
+    def assemble(self):
+        """Returns (co_code, co_linetable, stack size, first line)."""
+        instrs = self._layout()
+        code = bytearray()
+        units = []
+        for name, arg, line, _ in instrs:
+            op = opcode.opmap[name]
+            shifts = []
+            value = arg >> 8
+            while value:
+                shifts.append(value & 0xFF)
+                value >>= 8
+            for ext in reversed(shifts):
+                code += bytes((opcode.EXTENDED_ARG, ext))
+            code += bytes((op, arg & 0xFF))
+            code += bytes(2 * opcode._inline_cache_entries[op])
+            units.append((self._size(name, arg), line))
+        return bytes(code), self._linetable(units), self._stack_size(instrs)
+
+    def _linetable(self, units):
+        table = bytearray()
+        previous = self.first_line
+        for count, line in units:
+            while count:
+                chunk = min(count, 8)
+                table.append(0x80 | (LOCATION_NO_COLUMNS << 3) | (chunk - 1))
+                _write_svarint(table, line - previous)
+                previous = line
+                count -= chunk
+        return bytes(table)
+
+    def _stack_size(self, instrs):
+        labels = {}
+        index = 0
+        for item in self.items:
+            if isinstance(item, Label):
+                labels[id(item)] = index
+            else:
+                index += 1
+        depth_at = {0: 0}
+        pending = [0]
+        deepest = 0
+        while pending:
+            i = pending.pop()
+            depth = depth_at[i]
+            while i < len(instrs):
+                name, arg, _, target = instrs[i]
+                op = opcode.opmap[name]
+                if op < opcode.HAVE_ARGUMENT:
+                    arg = None
+                if target is not None:
+                    jumped = depth + dis.stack_effect(op, arg, jump=True)
+                    j = labels[id(target)]
+                    if depth_at.get(j, -1) < jumped:
+                        depth_at[j] = jumped
+                        pending.append(j)
+                    deepest = max(deepest, jumped)
+                    depth += dis.stack_effect(op, arg, jump=False)
+                else:
+                    depth += dis.stack_effect(op, arg)
+                deepest = max(deepest, depth)
+                if name in UNCONDITIONAL:
+                    break
+                i += 1
+                if depth_at.get(i, -1) >= depth:
+                    break
+                depth_at[i] = depth
+        return max(deepest, 1)
+
+
+def _write_svarint(table, value):
+    value = ((-value) << 1) | 1 if value < 0 else value << 1
+    while value >= 0x40:
+        table.append(0x40 | (value & 0x3F))
+        value >>= 6
+    table.append(value)
+
+
+class FunctionAssembler:
+    """Assembles one FunctionDecl; `translator` supplies literal and type helpers."""
+
+    def __init__(self, translator, node, library_callees):
+        self.translator = translator
+        self.library_callees = library_callees
+        self.node = node
+        params = [p["name"] for p in node.get("params", []) if p.get("type") != "..."]
+        if len(set(params)) != len(params):
+            raise Unsupported("duplicate parameter names")
+        self.argcount = len(params)
+        self.varnames = params + sorted(declared_names(node["body"]) - set(params))
+        self.local = set(self.varnames)
+        self.consts = [None]
+        self.names = []
+        self.loops = []
+        span = node.get("span")
+        self.first_line = span[0] if span else 1
+        self.asm = Assembler(self.first_line)
+
+    def build(self, filename):
+        self.asm.emit("RESUME", 0)
+        self._stmts(self.node["body"])
+        self.asm.emit("LOAD_CONST", 0)
+        self.asm.emit("RETURN_VALUE")
+        code, linetable, stacksize = self.asm.assemble()
+        name = self.node["name"]
+        return types.CodeType(
+            self.argcount, 0, 0, len(self.varnames), stacksize, CO_OPTIMIZED | CO_NEWLOCALS,
+            code, tuple(self.consts), tuple(self.names), tuple(self.varnames),
+            filename, name, name, self.first_line, linetable, b"",
+        )
+
+    # --- helpers ---------------------------------------------------------------
+
+    def _const(self, value):
+        for index, existing in enumerate(self.consts):
+            if type(existing) is type(value) and existing == value:
+                return index
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def _name(self, name):
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+    def _at(self, node):
+        span = node.get("span") if isinstance(node, dict) else None
+        if span:
+            self.asm.line = span[0]
+
+    def _load(self, name):
+        if name in self.local:
+            self.asm.emit("LOAD_FAST", self.varnames.index(name))
+        else:
+            self.asm.emit("LOAD_GLOBAL", self._name(name) << 1)
+
+    def _store(self, name):
+        if name in self.local:
+            self.asm.emit("STORE_FAST", self.varnames.index(name))
+        else:
+            self.asm.emit("STORE_GLOBAL", self._name(name))
+
+    def _wrap(self, ctype):
+        """Mirrors CppToPythonBytecode._wrap on the value on top of the stack:
+        `x & mask` for unsigned types, `(x + half & mask) - half` for signed."""
+        bits, signed = INTEGER_WIDTHS[ctype.name]
+        if signed:
+            self.asm.emit("LOAD_CONST", self._const(1 << bits - 1))
+            self.asm.emit("BINARY_OP", NB["NB_ADD"])
+        self.asm.emit("LOAD_CONST", self._const((1 << bits) - 1))
+        self.asm.emit("BINARY_OP", NB["NB_AND"])
+        if signed:
+            self.asm.emit("LOAD_CONST", self._const(1 << bits - 1))
+            self.asm.emit("BINARY_OP", NB["NB_SUBTRACT"])
+
+    def _narrow(self, node, key="narrow"):
+        """Mirrors CppToPythonBytecode._narrowed: wraps to the type range analysis stored under `key`."""
+        if node.get(key):
+            self._wrap(node[key])
+
+    def _coerced(self, expr, target_type):
+        """Mirrors CppToPythonBytecode._coerce: int() around floats stored into
+        integers and bools stored into other arithmetic types."""
+        value_type = self.translator._ctype(expr)
+        if target_type.name not in ("bool", "char") and (
+                (target_type.is_integral and value_type.is_floating)
+                or (target_type.is_arithmetic and value_type.name == "bool")):
+            self.asm.emit("LOAD_GLOBAL", (self._name("int") << 1) | 1)
+            self._expr(expr)
+            self.asm.emit("PRECALL", 1)
+            self.asm.emit("CALL", 1)
+        else:
+            self._expr(expr)
+
+    # --- statements ------------------------------------------------------------
+
+    def _stmts(self, stmts):
+        for stmt in stmts:
+            if stmt is not None:
+                self._stmt(stmt)
+
+    def _stmt(self, node):
+        self._at(node)
+        handler = getattr(self, f"_stmt_{node.get('type')}", None)
+        if handler is None:
+            raise Unsupported(node.get("type"))
+        handler(node)
+
+    def _stmt_VarDecl(self, node):
+        if node.get("arraySize"):
+            raise Unsupported("array declaration")
+        if node.get("init"):
+            self._coerced(node["init"], self.translator._ctype(node))
+            self._narrow(node)
+        elif node.get("varType") in SCALAR_DEFAULTS:
+            self.asm.emit("LOAD_CONST", self._const(SCALAR_DEFAULTS[node["varType"]]))
+        else:
+            raise Unsupported(f"default-constructed {node.get('varType')}")
+        self._store(node["name"])
+
+    def _stmt_MultiVarDecl(self, node):
+        for decl in node["decls"]:
+            self._stmt(decl)
+
+    def _stmt_ExprStmt(self, node):
+        self._effect(node["expr"])
+
+    def _effect(self, expr):
+        """Evaluates `expr` for its side effect only."""
+        self._at(expr)
+        kind = expr.get("type")
+        if kind == "AssignExpr":
+            left = expr["left"]
+            if left.get("type") != "Identifier":
+                raise Unsupported("assignment to a non-variable")
+            self._coerced(expr["right"], self.translator._ctype(left))
+            self._narrow(expr)
+            self._store(left["name"])
+        elif kind == "UpdateExpr":
+            target = expr["expr"]
+            if target.get("type") != "Identifier":
+                raise Unsupported("++/-- on a non-variable")
+            self._load(target["name"])
+            self.asm.emit("LOAD_CONST", self._const(1))
+            self.asm.emit("BINARY_OP", NB["NB_ADD"] if expr["op"] == "INCREMENT" else NB["NB_SUBTRACT"])
+            if expr.get("overflow"):
+                self._wrap(self.translator._ctype(target))
+            self._store(target["name"])
+        elif kind == "ExprList":
+            for item in expr.get("exprs", []):
+                self._effect(item)
+        else:
+            self._expr(expr)
+            self.asm.emit("POP_TOP")
+
+    def _stmt_ReturnStmt(self, node):
+        if node.get("expr"):
+            self._expr(node["expr"])
+            self._narrow(node)
+        else:
+            self.asm.emit("LOAD_CONST", 0)
+        self.asm.emit("RETURN_VALUE")
+
+    def _stmt_BlockStmt(self, node):
+        self._stmts(node.get("body", []))
+
+    def _stmt_NoOp(self, node):
+        pass
+
+    def _stmt_IfStmt(self, node):
+        if node.get("init"):
+            raise Unsupported("if with initializer")
+        orelse, end = Label(), Label()
+        self._expr(node["condition"])
+        self.asm.emit("POP_JUMP_IF_FALSE", orelse)
+        self._stmts(node.get("then") or [])
+        if node.get("else"):
+            self.asm.emit("JUMP", end)
+        self.asm.place(orelse)
+        if node.get("else"):
+            self._stmts(node["else"])
+        self.asm.place(end)
+
+    def _loop(self, condition, body, update=None):
+        top, resume, end = Label(), Label(), Label()
+        self.asm.place(top)
+        if condition is not None:
+            self._expr(condition)
+            self.asm.emit("POP_JUMP_IF_FALSE", end)
+        self.loops.append((end, resume))
+        self._stmts(body)
+        self.loops.pop()
+        self.asm.place(resume)
+        if update is not None:
+            self._effect(update)
+        self.asm.emit("JUMP", top)
+        self.asm.place(end)
+
+    def _stmt_WhileStmt(self, node):
+        self._loop(node["condition"], node.get("body") or [])
+
+    def _stmt_ForStmt(self, node):
+        init = node.get("init")
+        if init:
+            if init.get("type") in ("VarDecl", "MultiVarDecl", "ExprStmt"):
+                self._stmt(init)
+            else:
+                self._effect(init)
+        self._at(node)
+        self._loop(node.get("condition"), node.get("body") or [], node.get("update"))
+
+    def _stmt_BreakContinueStmt(self, node):
+        if not self.loops:
+            raise Unsupported("break/continue outside a loop")
+        end, resume = self.loops[-1]
+        self.asm.emit("JUMP", end if node["keyword"] == "break" else resume)
+
+    # --- expressions -----------------------------------------------------------
+
+    def _expr(self, node):
+        line = self.asm.line
+        self._at(node)
+        handler = getattr(self, f"_expr_{node.get('type')}", None)
+        if handler is None:
+            raise Unsupported(node.get("type"))
+        handler(node)
+        self.asm.line = line
+
+    def _literal(self, node):
+        value = getattr(self.translator, f"_translate_{node['type']}")(node)
+        self.asm.emit("LOAD_CONST", self._const(value.value))
+
+    _expr_NumberLiteral = _literal
+    _expr_StringLiteral = _literal
+    _expr_CharLiteral = _literal
+
+    def _expr_Identifier(self, node):
+        translated = self.translator._translate_Identifier(node)
+        if hasattr(translated, "value"):
+            self.asm.emit("LOAD_CONST", self._const(translated.value))
+        else:
+            self._load(translated.id)
+
+    def _expr_BinaryExpr(self, node):
+        op = node["op"]
+        if op == "SHIFT_RIGHT" and cin_targets(node) is not None:
+            raise Unsupported("cin")
+        if op == "SHIFT_LEFT" and output_chain(node) is not None:
+            self._output(*output_chain(node))
+            return
+        if op in ("AND", "OR"):
+            end = Label()
+            self._expr(node["left"])
+            self.asm.emit("JUMP_IF_FALSE_OR_POP" if op == "AND" else "JUMP_IF_TRUE_OR_POP", end)
+            self._expr(node["right"])
+            self.asm.place(end)
+            return
+        if op in ("EQUAL", "NOT_EQUAL") and any(
+                side.get("type") == "MethodCall" for side in (node["left"], node["right"])):
+            raise Unsupported("method call comparison")
+        if node.get("truncate"):
+            # operands of different signs: floor and truncation disagree
+            helper = "_div_trunc" if op == "SLASH" else "_mod_trunc"
+            self.asm.emit("LOAD_GLOBAL", (self._name(helper) << 1) | 1)
+        self._expr(node["left"])
+        self._narrow(node["left"], "convert")
+        self._expr(node["right"])
+        self._narrow(node["right"], "convert")
+        if node.get("truncate"):
+            self.asm.emit("PRECALL", 2)
+            self.asm.emit("CALL", 2)
+        elif op in COMPARE_ARGS:
+            self.asm.emit("COMPARE_OP", COMPARE_ARGS[op])
+        elif op == "SLASH":
+            floating = (self.translator._ctype(node["left"]).is_floating
+                        or self.translator._ctype(node["right"]).is_floating)
+            self.asm.emit("BINARY_OP", NB["NB_TRUE_DIVIDE"] if floating else NB["NB_FLOOR_DIVIDE"])
+        elif op in BINARY_NB:
+            self.asm.emit("BINARY_OP", BINARY_NB[op])
+        else:
+            raise Unsupported(op)
+        if node.get("overflow"):
+            self._wrap(self.translator._ctype(node))
+
+    def _output(self, stream, items):
+        """Mirrors CppToPythonBytecode._translate_output: `stream.write(f'...')` per segment."""
+        self._load(stream)
+        for segment, method in self.translator._output_segments(items):
+            self.asm.emit("LOAD_METHOD", self._name(method))
+            if not segment:
+                self.asm.emit("LOAD_CONST", self._const(""))
+            for piece in segment:
+                if isinstance(piece, str):
+                    self.asm.emit("LOAD_CONST", self._const(piece))
+                    continue
+                item, spec = piece
+                if spec is None:
+                    self.asm.emit("LOAD_GLOBAL", (self._name("_ostr") << 1) | 1)
+                    self._expr(item)
+                    self.asm.emit("PRECALL", 1)
+                    self.asm.emit("CALL", 1)
+                    self.asm.emit("FORMAT_VALUE", 0)
+                elif spec:
+                    self._expr(item)
+                    self.asm.emit("LOAD_CONST", self._const(spec))
+                    self.asm.emit("FORMAT_VALUE", FORMAT_WITH_SPEC)
+                else:
+                    self._expr(item)
+                    self.asm.emit("FORMAT_VALUE", 0)
+            if len(segment) > 1:
+                self.asm.emit("BUILD_STRING", len(segment))
+            self.asm.emit("PRECALL", 1)
+            self.asm.emit("CALL", 1)
+
+    def _expr_UnaryExpr(self, node):
+        if node["op"] not in UNARY_OPS:
+            raise Unsupported(node["op"])
+        ctype = self.translator._ctype(node)
+        self._expr(node["expr"])
+        if node["op"] == "BITWISE_NOT" and ctype.is_unsigned:
+            bits, _ = INTEGER_WIDTHS[ctype.name]
+            self.asm.emit("LOAD_CONST", self._const((1 << bits) - 1))
+            self.asm.emit("BINARY_OP", NB["NB_XOR"])
+            return
+        self.asm.emit(UNARY_OPS[node["op"]])
+        if node.get("overflow"):
+            self._wrap(ctype)
+
+    def _expr_TernaryExpr(self, node):
+        orelse, end = Label(), Label()
+        self._expr(node["condition"])
+        self.asm.emit("POP_JUMP_IF_FALSE", orelse)
+        self._expr(node["then"])
+        self.asm.emit("JUMP", end)
+        self.asm.place(orelse)
+        self._expr(node["else"])
+        self.asm.place(end)
+
+    def _expr_CastExpr(self, node):
+        self._coerced(node["expr"], self.translator._ctype(node))
+        self._narrow(node)
+
+    def _expr_CallExpr(self, node):
+        callee = node["callee"]
+        if callee in SPECIAL_CALLEES or callee in self.library_callees:
+            raise Unsupported(f"library call {callee}")
+        if callee in self.local:
+            self.asm.emit("PUSH_NULL")
+            self._load(callee)
+        else:
+            self.asm.emit("LOAD_GLOBAL", (self._name(callee) << 1) | 1)
+        args = node.get("args", [])
+        for arg in args:
+            self._expr(arg)
+        self.asm.emit("PRECALL", len(args))
+        self.asm.emit("CALL", len(args))
+
+
+def assemble_function(translator, node, filename, library_callees=()):
+    """Code object for FunctionDecl `node`; raises Unsupported if out of subset.
+
+    `library_callees` are names the translator maps to runtime helpers.
+    """
+    if not available():
+        raise Unsupported(f"direct backend targets Python {'.'.join(map(str, SUPPORTED_VERSION))}")
+    return FunctionAssembler(translator, node, library_callees).build(filename)
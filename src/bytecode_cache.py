@@ -0,0 +1,122 @@
+"""On-disk cache of compiled programs, in the spirit of __pycache__.
+
+Entries are `marshal`ed `(code, metadata)` pairs named after a key that
+covers everything the compiled code depends on: the C++ source (and with
+it every `#define`), the file name baked into tracebacks, the translator
+options, the translator's own sources and the interpreter's bytecode magic
+number. Writes go to a temporary file that is atomically renamed into
+place, so concurrent readers see either the old entry or the new one,
+never a torn file. Hits refresh the entry's mtime and the directory is
+trimmed oldest-first once it outgrows `max_bytes`.
+"""
+import functools
+import hashlib
+import importlib.util
+import marshal
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cpp_transpiler")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+SUFFIX = ".cppc"
+
+# Modules whose source decides what a program compiles to.
+TRANSLATOR_MODULES = (
+    "scanner", "tokens", "parser", "type_checker", "cpp_analysis",
+    "optimizer", "runtime_shaker", "cpp_runtime", "lazy", "bytecode_backend", "range_analysis",
+    "CppToPythonBytecode", "main",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def translator_version() -> str:
+    """Digest of the translator's sources; any edit invalidates the cache."""
+    digest = hashlib.sha256()
+    for name in TRANSLATOR_MODULES:
+        spec = importlib.util.find_spec(name)
+        if spec is None or not spec.origin:
+            continue
+        with open(spec.origin, "rb") as f:
+            digest.update(name.encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+class BytecodeCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, source: str, filename: str, options: dict) -> str:
+        digest = hashlib.sha256()
+        for part in (importlib.util.MAGIC_NUMBER, translator_version().encode(),
+                     filename.encode(), repr(sorted(options.items())).encode(),
+                     source.encode("utf-8")):
+            digest.update(len(part).to_bytes(8, "little") + part)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key):
+        """`(code, metadata)` for `key`, or None on a miss or unreadable entry."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        magic = importlib.util.MAGIC_NUMBER
+        try:
+            if not data.startswith(magic):
+                raise ValueError("stale magic number")
+            code, metadata = marshal.loads(data[len(magic):])
+        except (EOFError, ValueError, TypeError):
+            self._discard(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return code, metadata
+
+    def store(self, key, code, metadata=None):
+        os.makedirs(self.directory, exist_ok=True)
+        data = importlib.util.MAGIC_NUMBER + marshal.dumps((code, metadata or {}))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._discard(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits `max_bytes`."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    def _discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
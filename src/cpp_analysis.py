@@ -0,0 +1,383 @@
+"""Analyses over the parser's dict AST shared by the code generator."""
+from type_checker import parse_type_spec
+
+# Methods that only read their object; every other method call is assumed to
+# mutate the container it is called on.
+READONLY_METHODS = {
+    'size', 'length', 'empty', 'at', 'front', 'back', 'top', 'find', 'count',
+    'contains', 'starts_with', 'ends_with', 'substr', 'c_str', 'data',
+    'begin', 'end', 'cbegin', 'cend', 'rbegin', 'rend', 'capacity',
+    'first', 'second', 'has_value', 'value', 'value_or', 'get', 'compare',
+    'find_first_of', 'find_last_of', 'lower_bound', 'upper_bound',
+}
+
+# Free functions that never write through their arguments.
+PURE_FUNCTIONS = {
+    'max', 'min', 'abs', 'fabs', 'sqrt', 'pow', 'floor', 'ceil', 'round',
+    'log', 'log2', 'log10', 'exp', 'sin', 'cos', 'tan', 'asin', 'acos',
+    'atan', 'atan2', 'gcd', 'lcm', 'clamp', 'to_string', 'stoi', 'stol',
+    'stoll', 'stof', 'stod', 'atoi', 'atof', 'make_pair', 'make_tuple',
+    'binary_search', 'lower_bound', 'upper_bound', 'accumulate',
+}
+
+CIN_NAMES = ('cin', 'std::cin')
+# Output streams by every spelling a `<<` chain may start with.
+COUT_NAMES = {'cout': 'cout', 'std::cout': 'cout', 'cerr': 'cerr', 'std::cerr': 'cerr'}
+
+# Identifiers whose mere mention means a function performs I/O.
+IO_NAMES = {
+    'cin', 'cout', 'cerr', 'clog', 'std::cin', 'std::cout', 'std::cerr',
+    'printf', 'scanf', 'puts', 'putchar', 'getchar', 'getline',
+}
+
+# Statement fields evaluated outside the statement's own body.
+HEADER_FIELDS = {
+    "IfStmt": ("init", "condition"),
+    "WhileStmt": ("condition",),
+    "DoWhileStmt": ("condition",),
+    "ForStmt": ("init", "condition", "update"),
+    "SwitchStmt": ("expr",),
+    "ReturnStmt": ("expr",),
+    "RangeForStmt": ("iterable",),
+}
+
+LOOP_STATEMENTS = ("WhileStmt", "DoWhileStmt", "ForStmt", "RangeForStmt")
+
+# Statements that end a switch case without falling into the next one.
+TERMINATORS = ("BreakContinueStmt", "ReturnStmt", "ThrowStmt")
+
+
+def iter_children(node):
+    """Yields the dict nodes directly below `node` (or below every item of a list)."""
+    values = node if isinstance(node, list) else node.values()
+    for value in values:
+        if isinstance(value, dict):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    yield item
+                elif isinstance(item, list):
+                    yield from iter_children(item)
+
+
+def walk(node):
+    """Pre-order traversal of every dict node reachable from `node`."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+        stack.extend(reversed(list(iter_children(current))))
+
+
+def root_name(expr):
+    """Name of the variable an lvalue-ish expression ultimately refers to."""
+    while isinstance(expr, dict):
+        kind = expr.get("type")
+        if kind == "Identifier":
+            return expr["name"]
+        if kind == "IndexExpr":
+            expr = expr["array"]
+        elif kind in ("MemberAccess", "MethodCall"):
+            expr = expr["object"]
+        elif kind in ("DerefExpr", "AddressOfExpr", "CastExpr"):
+            expr = expr["expr"]
+        else:
+            return None
+    return None
+
+
+def cin_targets(node):
+    """Unwraps `cin >> x >> y` into `[x, y]`; None if `node` is not a cin chain."""
+    if node.get("type") == "Identifier" and node.get("name") in CIN_NAMES:
+        return []
+    if node.get("type") == "MemberAccess":
+        obj = node.get("object")
+        if obj.get("type") == "Identifier" and obj.get("name") == "std" and node.get("member") == "cin":
+            return []
+    if node.get("type") == "BinaryExpr" and node.get("op") == "SHIFT_RIGHT":
+        left_targets = cin_targets(node["left"])
+        if left_targets is None:
+            return None
+        return left_targets + [node["right"]]
+    return None
+
+
+def output_chain(node):
+    """Unwraps `cout << a << b` into `("cout", [a, b])`; None if `node` is not an output chain."""
+    if node.get("type") == "Identifier" and node.get("name") in COUT_NAMES:
+        return COUT_NAMES[node["name"]], []
+    if node.get("type") == "MemberAccess":
+        obj = node.get("object")
+        if obj.get("type") == "Identifier" and obj.get("name") == "std" and node.get("member") in ("cout", "cerr"):
+            return node["member"], []
+    if node.get("type") == "BinaryExpr" and node.get("op") == "SHIFT_LEFT":
+        chain = output_chain(node["left"])
+        if chain is None:
+            return None
+        return chain[0], chain[1] + [node["right"]]
+    return None
+
+
+def written_names(nodes):
+    """Conservative set of variable names that `nodes` may write or mutate.
+
+    Besides plain assignments this counts increments, `cin >>` targets,
+    declarations (which shadow in the flattened Python scope), mutating method
+    calls on containers and every lvalue passed to a non-pure call, since it
+    may bind to a reference parameter.
+    """
+    written = set()
+
+    def add(expr):
+        name = root_name(expr)
+        if name is not None:
+            written.add(name)
+
+    for node in walk(nodes):
+        kind = node.get("type")
+        if kind == "AssignExpr":
+            add(node["left"])
+        elif kind in ("UpdateExpr", "AddressOfExpr", "DeleteExpr"):
+            add(node["expr"])
+        elif kind == "VarDecl":
+            written.add(node["name"])
+        elif kind == "RangeForStmt":
+            written.add(node["varName"])
+        elif kind == "MethodCall":
+            if node["method"] not in READONLY_METHODS:
+                add(node["object"])
+            if node["method"] == "swap":
+                for arg in node.get("args", []):
+                    add(arg)
+        elif kind == "CallExpr" and node["callee"] not in PURE_FUNCTIONS:
+            for arg in node.get("args", []):
+                add(arg)
+        elif kind == "BinaryExpr" and node.get("op") == "SHIFT_RIGHT":
+            for target in cin_targets(node) or []:
+                add(target)
+    return written
+
+
+def reference_aliases(params, body, global_names):
+    """{reference: names whose storage it may share} for one function body.
+
+    A reference parameter may be bound to any global or to the same object
+    as another reference parameter; a local `T& r = x` shares storage with
+    `x` and with whatever `x` itself refers to.
+    """
+    ref_params = {p["name"] for p in params if p.get("ref") and p.get("name")}
+    aliases = {name: (global_names | ref_params) - {name} for name in ref_params}
+    for node in walk(body):
+        if node.get("type") == "VarDecl" and node.get("isRef") and node.get("init"):
+            target = root_name(node["init"])
+            if target is not None:
+                aliases[node["name"]] = {target} | aliases.get(target, set())
+    return aliases
+
+
+def with_aliases(written, aliases):
+    """`written` plus every name a write to one of them may change through a reference."""
+    written = set(written)
+    changed = True
+    while changed:
+        changed = False
+        for name, targets in aliases.items():
+            if name in written and not targets <= written:
+                written |= targets
+                changed = True
+            elif name not in written and written & targets:
+                written.add(name)
+                changed = True
+    return written
+
+
+def declared_names(nodes):
+    """Names introduced by declarations anywhere inside `nodes`."""
+    names = set()
+    for node in walk(nodes):
+        if node.get("type") == "VarDecl":
+            names.add(node["name"])
+        elif node.get("type") == "RangeForStmt":
+            names.add(node["varName"])
+    return names
+
+
+def escaping_jumps(nodes, keyword):
+    """`break` or `continue` statements in `nodes` that leave the enclosing statement.
+
+    Loops nested in `nodes` own both kinds, nested switches own their breaks.
+    """
+    found = []
+    stack = list(iter_children(nodes))
+    while stack:
+        node = stack.pop()
+        kind = node.get("type")
+        if kind == "BreakContinueStmt":
+            if node["keyword"] == keyword:
+                found.append(node)
+        elif kind in LOOP_STATEMENTS or kind in ("FunctionDecl", "LambdaExpr"):
+            continue
+        elif kind == "SwitchStmt" and keyword == "break":
+            continue
+        else:
+            stack.extend(iter_children(node))
+    return found
+
+
+def ends_with_terminator(stmts):
+    """True if the last statement of `stmts` unconditionally leaves the block."""
+    stmts = [s for s in stmts if s and s.get("type") != "NoOp"]
+    if not stmts:
+        return False
+    last = stmts[-1]
+    if last.get("type") == "BlockStmt":
+        return ends_with_terminator(last.get("body", []))
+    return last.get("type") in TERMINATORS
+
+
+def has_opaque_calls(nodes, known_callees=()):
+    """True if `nodes` call something whose effect on globals is unknown."""
+    for node in walk(nodes):
+        if node.get("type") == "CallExpr" and node["callee"] not in known_callees:
+            return True
+        if node.get("type") == "LambdaExpr":
+            return True
+    return False
+
+
+def performs_io(nodes, quiet_callees=()):
+    """True if `nodes` may read or write a stream, directly or through a call.
+
+    Calls count as I/O unless the callee is in `quiet_callees` or PURE_FUNCTIONS.
+    """
+    for node in walk(nodes):
+        kind = node.get("type")
+        if kind == "Identifier" and node["name"] in IO_NAMES:
+            return True
+        if kind == "MemberAccess" and node.get("member") in ("cin", "cout", "cerr"):
+            return True
+        if kind == "CallExpr" and node["callee"] not in quiet_callees and node["callee"] not in PURE_FUNCTIONS:
+            return True
+        if kind == "LambdaExpr":
+            return True
+    return False
+
+
+def quiet_functions(nodes, library_callees=()):
+    """Free functions that never do I/O, even through the functions they call."""
+    functions = top_level_functions(nodes)
+    quiet = set(functions)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(quiet):
+            if performs_io(functions[name]["body"], quiet | (set(library_callees) - set(functions))):
+                quiet.discard(name)
+                changed = True
+    return quiet
+
+
+def top_level_functions(nodes):
+    """Defined free functions by name; overloaded names are left out."""
+    functions, seen = {}, set()
+    for node in nodes:
+        if not node:
+            continue
+        if node.get("type") == "Namespace":
+            inner = top_level_functions(node.get("body", []))
+            seen.update(name for name in inner if name in functions)
+            functions.update(inner)
+        elif node.get("type") == "FunctionDecl" and node.get("body") is not None:
+            if node["name"] in functions:
+                seen.add(node["name"])
+            functions[node["name"]] = node
+    return {name: fn for name, fn in functions.items() if name not in seen}
+
+
+def _memo_signature(func):
+    """True if every argument is a by-value scalar or string, so it is hashable."""
+    if func.get("returnType") in (None, "void") or not func.get("params"):
+        return False
+    for param in func["params"]:
+        if param.get("ref") or param.get("type") == "...":
+            return False
+        ctype = parse_type_spec(param.get("typeSpec", param.get("type")))
+        if not (ctype.is_arithmetic or ctype.name == "string"):
+            return False
+    return True
+
+
+def memoizable_functions(nodes, global_vars):
+    """Recursive free functions whose result depends only on their arguments and on globals.
+
+    A function qualifies when it calls itself, directly or through other
+    functions, takes hashable by-value arguments, returns a value, performs
+    no I/O, writes no global (or anything through a reference) and only
+    calls pure library functions or other qualifying functions. Returns ``{name: globals it reads, transitively}``; callers
+    must invalidate the function's cache whenever one of those changes.
+    Globals written where a cache clear cannot be placed right after the
+    write (loop and if headers, return expressions, or the same statement
+    as the call) disqualify every function that reads them.
+    """
+    functions = top_level_functions(nodes)
+    reads, calls = {}, {}
+    for name, func in functions.items():
+        if not _memo_signature(func):
+            continue
+        body = func["body"]
+        local = {p["name"] for p in func["params"]} | declared_names(body)
+        if written_names(body) - local:
+            continue
+        callees, impure = set(), False
+        for node in walk(body):
+            kind = node.get("type")
+            if kind == "Identifier" and node["name"] in IO_NAMES:
+                impure = True
+            elif kind in ("LambdaExpr", "NewExpr", "NewArrayExpr", "DeleteExpr"):
+                impure = True
+            elif kind == "MemberAccess" and node.get("member") in ("cin", "cout", "cerr"):
+                impure = True
+            elif kind == "CallExpr":
+                if node["callee"] in functions:
+                    callees.add(node["callee"])
+                elif node["callee"] not in PURE_FUNCTIONS:
+                    impure = True
+        if impure:
+            continue
+        reads[name] = {n["name"] for n in walk(body)
+                       if n.get("type") == "Identifier" and n["name"] in global_vars} - local
+        calls[name] = callees
+
+    changed = True
+    while changed:
+        changed = False
+        for name in list(reads):
+            if not calls[name] <= set(reads):
+                del reads[name]
+                changed = True
+
+    watched = {}
+    for name in reads:
+        seen, pending = set(), list(calls[name])
+        while pending:
+            current = pending.pop()
+            if current not in seen:
+                seen.add(current)
+                pending.extend(calls[current])
+        # only recursion repays a cache: plain helpers would pay a lookup per call
+        if name in seen:
+            watched[name] = set().union(*(reads[f] for f in seen))
+
+    unsafe = set()
+    for func in functions.values():
+        for node in walk(func["body"]):
+            fields = HEADER_FIELDS.get(node.get("type"))
+            if fields:
+                unsafe |= written_names([node[f] for f in fields if isinstance(node.get(f), dict)])
+            elif node.get("type") in ("ExprStmt", "VarDecl", "MultiVarDecl"):
+                called = {n["callee"] for n in walk(node) if n.get("type") == "CallExpr"}
+                for name in called & set(watched):
+                    unsafe |= written_names([node]) & watched[name]
+    return {name: globs for name, globs in watched.items() if not globs & unsafe}
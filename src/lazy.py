@@ -0,0 +1,82 @@
+"""Lazy, tiered compilation of translated functions.
+
+In lazy mode the translator emits `name = __lazy__("name")` instead of a
+`def` for every top-level function. The stub translates and compiles the
+function on its first call (tier 1, the translator's own -O level) and
+keeps counting calls; once a function has been called `hot_threshold`
+times it is recompiled at `hot_level` (tier 2) and installed directly in
+the module namespace, so later calls no longer go through the stub.
+"""
+
+HOT_THRESHOLD = 1000
+HOT_LEVEL = 2
+
+
+class LazyFunction:
+    __slots__ = ("name", "loader", "impl", "calls", "tier")
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.impl = None
+        self.calls = 0
+        self.tier = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.impl is None:
+            self._compile()
+        elif self.tier == 1 and self.calls >= self.loader.hot_threshold:
+            self.impl = self.loader.materialize(self, self.loader.hot_level, install=True)
+            self.tier = 2
+        return self.impl(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        # e.g. `f.cache_clear()` on a memoized function
+        if self.impl is None:
+            self._compile()
+        return getattr(self.impl, attr)
+
+    def _compile(self):
+        self.impl = self.loader.materialize(self, self.loader.base_level)
+        self.tier = 1
+
+    def __repr__(self):
+        return f"<lazy {self.name}: tier {self.tier}, {self.calls} calls>"
+
+
+class LazyLoader:
+    """Creates stubs for one program namespace and compiles them on demand."""
+
+    def __init__(self, translator, namespace, base_level, hot_level=HOT_LEVEL,
+                 hot_threshold=HOT_THRESHOLD):
+        self.translator = translator
+        self.namespace = namespace
+        self.base_level = base_level
+        self.hot_level = max(base_level, hot_level)
+        self.hot_threshold = hot_threshold
+        self.stubs = {}
+
+    def __call__(self, name):
+        stub = self.stubs[name] = LazyFunction(name, self)
+        return stub
+
+    def materialize(self, stub, level, install=False):
+        """Compiles `stub`'s function at `level` and returns the function object.
+
+        Executing the `def` rebinds the name in the namespace; tier 1 puts
+        the stub back so it keeps counting calls, tier 2 leaves the compiled
+        function in place.
+        """
+        if install and level == self.base_level and stub.impl is not None:
+            function = stub.impl
+        else:
+            code = self.translator.compile_function(stub.name, level)
+            exec(code, self.namespace)
+            function = self.namespace[stub.name]
+        self.namespace[stub.name] = function if install else stub
+        return function
+
+    def stats(self):
+        """{name: (calls through the stub, tier)} for every lazy function."""
+        return {name: (stub.calls, stub.tier) for name, stub in self.stubs.items()}
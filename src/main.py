@@ -1,8 +1,18 @@
 from scanner import Scanner
 from parser import Parser
-from CppToPythonBytecode import CppToPythonBytecode
+from CppToPythonBytecode import BACKENDS, CppToPythonBytecode, MEMO_MAXSIZE
+from bytecode_cache import BytecodeCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
 from pprint import pp
+import argparse
+import contextlib
+import copy
+import difflib
+import io
 import re
+import sys
+import threading
+
+import cpp_runtime
 
 KNOWN_HEADERS = {
     'stdio.h', 'cstdio', 'iostream', 'string', 'cstring',
@@ -12,8 +22,25 @@ KNOWN_HEADERS = {
     'cassert', 'stdexcept', 'sstream', 'fstream', 'bitset',
 }
 
+# identifiers outside string/char literals and // comments
+TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|//.*|[A-Za-z_]\w*')
+DEFINE_RE = re.compile(r'#\s*define\s+([A-Za-z_]\w*)(\(?)\s*(.*)')
+UNDEF_RE = re.compile(r'#\s*undef\s+([A-Za-z_]\w*)')
+
+
+def expand_macros(line: str, macros: dict) -> str:
+    """Substitutes object-like macros, rescanning until nothing changes."""
+    def substitute(match, active):
+        word = match.group(0)
+        if word in macros and word not in active:
+            return TOKEN_RE.sub(lambda m: substitute(m, active | {word}), macros[word])
+        return word
+    return TOKEN_RE.sub(lambda m: substitute(m, frozenset()), line)
+
+
 def preprocess(source: str) -> str:
     includes = set()
+    macros = {}
     lines = []
     for line in source.splitlines():
         stripped = line.strip()
@@ -24,30 +51,207 @@ def preprocess(source: str) -> str:
                 includes.add(header)
                 if header not in KNOWN_HEADERS:
                     print(f"[warn] unsupported header: <{header}>")
+            # keep an empty line so parser spans still match the original source
+            lines.append('')
+        elif DEFINE_RE.match(stripped):
+            name, paren, value = DEFINE_RE.match(stripped).groups()
+            if paren:
+                print(f"[warn] function-like macro {name} is not supported")
+            else:
+                macros[name] = value.split('//')[0].strip()
+            lines.append('')
+        elif UNDEF_RE.match(stripped):
+            macros.pop(UNDEF_RE.match(stripped).group(1), None)
+            lines.append('')
         else:
-            lines.append(line)
+            lines.append(expand_macros(line, macros) if macros else line)
     return '\n'.join(lines)
 
-def main():
-    source = """
-        #include <stdio.h>
-        #include <vector>
-
-        int main() {
-            cout << "Hello " << 67 << endl;
-            return 0;
-        }
+def run_deep(fn, stack_size_mb: int = 512, recursion_limit: int = 1_000_000):
+    """Calls `fn` on a worker thread with a large C stack and recursion limit.
+
+    Translated DFS-style code recurses as deep as the C++ original did, which
+    overflows both CPython's default recursion limit and the main thread's
+    stack. Exceptions raised by `fn` are re-raised in the caller.
     """
-    source = preprocess(source)
-    tokens = Scanner(source).scan()
-    ast_nodes = Parser(tokens).parse()
-    translator = CppToPythonBytecode(ast_nodes)
-    code_obj = translator.compile()
-    namespace = {}
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = fn()
+        except BaseException as exc:
+            outcome["error"] = exc
+
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, recursion_limit))
+    old_stack_size = threading.stack_size(stack_size_mb * 1024 * 1024)
+    try:
+        worker = threading.Thread(target=target, name="cpp-main")
+        worker.start()
+        worker.join()
+    finally:
+        threading.stack_size(old_stack_size)
+        sys.setrecursionlimit(old_limit)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("value")
+
+def run_captured(code_obj, namespace, stdin_data):
+    """Runs a compiled program on `stdin_data`; returns its output and main()'s outcome."""
+    cpp_runtime._output.flush()
+    cpp_runtime._input.reset()
+    cpp_runtime._cin_tie = cpp_runtime.cout
+    old_stdin, sys.stdin = sys.stdin, io.StringIO(stdin_data)
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            try:
+                exec(code_obj, namespace)
+                outcome = repr(namespace["main"]()) if "main" in namespace else None
+            finally:
+                cpp_runtime._output.drain()
+    except Exception as exc:
+        outcome = f"{type(exc).__name__}: {exc}"
+    finally:
+        sys.stdin = old_stdin
+        cpp_runtime._input.reset()
+        cpp_runtime._cin_tie = cpp_runtime.cout
+    return out.getvalue(), outcome
+
+def diff_backends(ast_nodes, filename, options):
+    """Runs the program under every backend on the same input; True if all agree."""
+    stdin_data = sys.stdin.read()
+    results = {}
+    for backend in BACKENDS:
+        translator = CppToPythonBytecode(copy.deepcopy(ast_nodes), filename=filename,
+                                         **dict(options, backend=backend))
+        code_obj = translator.compile()
+        if backend == "direct":
+            print(f"[backend] assembled directly: {', '.join(sorted(translator.direct_code)) or 'nothing'}",
+                  file=sys.stderr)
+        results[backend] = run_captured(code_obj, translator.new_namespace(), stdin_data)
+    (reference, expected), *others = results.items()
+    agree = True
+    for backend, actual in others:
+        if actual == expected:
+            continue
+        agree = False
+        print(f"[backend] {backend} differs from {reference}:", file=sys.stderr)
+        sys.stderr.writelines(difflib.unified_diff(
+            expected[0].splitlines(True), actual[0].splitlines(True), reference, backend))
+        if actual[1] != expected[1]:
+            print(f"[backend] main(): {expected[1]} != {actual[1]}", file=sys.stderr)
+    if agree:
+        print(f"[backend] {', '.join(BACKENDS)} agree", file=sys.stderr)
+    sys.stdout.write(expected[0])
+    return agree
+
+DEMO_SOURCE = """
+    #include <stdio.h>
+    #include <vector>
+
+    int main() {
+        cout << "Hello " << 67 << endl;
+        return 0;
+    }
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a C++ program through the Python bytecode translator.")
+    parser.add_argument("source", nargs="?", help="C++ source file (runs a built-in demo if omitted)")
+    parser.add_argument("-O", dest="opt_level", type=int, choices=(0, 1, 2), default=1,
+                        help="optimization level (default: 1)")
+    parser.add_argument("--dump-passes", action="store_true",
+                        help="print the generated Python after every optimization pass")
+    parser.add_argument("--time-passes", action="store_true",
+                        help="report how long each optimization pass took")
+    parser.add_argument("--deep-recursion", action="store_true",
+                        help="run main() on a worker thread with a large stack")
+    parser.add_argument("--stack-size", type=int, default=512, metavar="MB",
+                        help="worker thread stack size for --deep-recursion (default: 512)")
+    parser.add_argument("--recursion-limit", type=int, default=1_000_000,
+                        help="recursion limit for --deep-recursion (default: 1000000)")
+    parser.add_argument("--tail-calls", action="store_true",
+                        help="turn self tail calls into loops")
+    parser.add_argument("--lazy", action="store_true",
+                        help="compile each function on its first call, recompiling hot ones at -O2")
+    parser.add_argument("--lazy-stats", action="store_true",
+                        help="with --lazy, report call counts and tiers after the run")
+    parser.add_argument("--memoize", action="store_true",
+                        help="cache results of pure recursive functions")
+    parser.add_argument("--memo-size", type=int, default=MEMO_MAXSIZE,
+                        help=f"entries kept per memoized function (default: {MEMO_MAXSIZE})")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse compiled bytecode from earlier runs of the same source")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"bytecode cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), metavar="MB",
+                        help="evict least recently used entries beyond this size (default: %(default)s)")
+    parser.add_argument("--backend", choices=BACKENDS, default="ast",
+                        help="code generator; 'direct' assembles supported functions without compile() "
+                             "(experimental, Python 3.11 only)")
+    parser.add_argument("--diff-backends", action="store_true",
+                        help="run the program under every backend and report any difference in output")
+    parser.add_argument("--io-mode", choices=("auto", "batch", "interactive"), default="auto",
+                        help="batch buffers output until exit or input; interactive also flushes on "
+                             "endl/flush and reads input a line at a time (default: auto, interactive "
+                             "when stdin is a terminal)")
+    parser.add_argument("--output-buffer", type=int, default=cpp_runtime.OUTPUT_BUFFER_SIZE, metavar="CHARS",
+                        help="program output collected before it is written out (default: %(default)s)")
+    args = parser.parse_args()
+    cpp_runtime._output.configure(None if args.io_mode == "auto" else args.io_mode, args.output_buffer)
+
+    filename = "<cpp_transpiler>"
+    source = DEMO_SOURCE
+    if args.source:
+        filename = args.source
+        with open(args.source, encoding="utf-8") as f:
+            source = f.read()
+
+    options = {"opt_level": args.opt_level, "memoize": args.memoize, "memo_size": args.memo_size,
+               "tail_calls": args.tail_calls, "backend": args.backend}
+    if args.diff_backends:
+        ast_nodes = Parser(Scanner(preprocess(source)).scan()).parse()
+        sys.exit(0 if diff_backends(ast_nodes, filename, options) else 1)
+    # lazy programs need the live translator; dumps and timings need the passes to run
+    cache, key, cached = None, None, None
+    if args.cache and not (args.lazy or args.dump_passes or args.time_passes):
+        cache = BytecodeCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        key = cache.key(source, filename, options)
+        cached = cache.load(key)
+
+    if cached is not None:
+        code_obj, metadata = cached
+        memoized = metadata.get("memoized", [])
+        namespace = {}
+    else:
+        source = preprocess(source)
+        tokens = Scanner(source).scan()
+        ast_nodes = Parser(tokens).parse()
+        translator = CppToPythonBytecode(ast_nodes, filename=filename, dump_passes=args.dump_passes,
+                                         time_passes=args.time_passes, lazy=args.lazy, **options)
+        code_obj = translator.compile()
+        memoized = sorted(translator.memoized)
+        if cache is not None:
+            cache.store(key, code_obj, {"memoized": memoized})
+        namespace = translator.new_namespace()
+    if args.memoize:
+        print(f"[memo] memoized functions: {', '.join(memoized) or 'none'}", file=sys.stderr)
     exec(code_obj, namespace)
     if "main" in namespace:
-        result = namespace["main"]()
+        if args.deep_recursion:
+            result = run_deep(namespace["main"], args.stack_size, args.recursion_limit)
+        else:
+            result = namespace["main"]()
+        cpp_runtime._output.flush()
         print("Program Output:", result)
+    if args.lazy and args.lazy_stats:
+        for name, (calls, tier) in sorted(namespace["__lazy__"].stats().items()):
+            print(f"[lazy] {name}: tier {tier}, {calls} calls through stub", file=sys.stderr)
+    for name in memoized:
+        info = namespace[name].cache_info()
+        print(f"[memo] {name}: {info.hits} hits, {info.misses} misses, {info.currsize} cached",
+              file=sys.stderr)
 
 if __name__ == "__main__":
     main()
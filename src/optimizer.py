@@ -0,0 +1,1034 @@
+"""Optimization passes over the Python AST produced by CppToPythonBytecode.
+
+Passes are registered with the minimum optimization level that enables them
+and run in registration order by PassManager:
+
+    -O0  no passes
+    -O1  constant folding, unreachable-code removal, algebraic simplification
+    -O2  everything in -O1 plus inlining of small functions, constant
+         propagation, dead-store removal, common subexpression elimination
+         and binding of hot runtime helpers to fast locals
+
+Passes with `min_level = None` never run by default; they are switched on
+by name through PassManager's `enable` argument.
+"""
+import ast
+import builtins
+import copy
+import operator
+import time
+
+from runtime_shaker import stable_runtime_names
+
+# Largest integer (in bits) or string a folded constant may produce.
+MAX_FOLDED_BITS = 4096
+MAX_FOLDED_LEN = 4096
+
+BIN_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+    ast.Pow: operator.pow, ast.LShift: operator.lshift, ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_, ast.BitXor: operator.xor,
+}
+UNARY_OPS = {
+    ast.USub: operator.neg, ast.UAdd: operator.pos,
+    ast.Not: operator.not_, ast.Invert: operator.invert,
+}
+COMPARE_OPS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+TERMINATORS = (ast.Return, ast.Raise, ast.Break, ast.Continue)
+FOLDABLE_TYPES = (bool, int, float, str)
+
+
+class PassContext:
+    """State shared by the passes of one PassManager run.
+
+    `const_names` are module-level names the translator knows are never
+    reassigned (`const`/`constexpr` globals and enumerators), `inline_names`
+    the functions it declares `inline` or `constexpr`. When passes
+    run over a single function compiled apart from its module (lazy mode),
+    `module_names` holds every name the full module binds.
+    """
+
+    def __init__(self, const_names=(), inline_names=()):
+        self.const_names = set(const_names)
+        self.inline_names = set(inline_names)
+        self.constants = {}
+        self.module_names = None
+
+
+class Pass:
+    name = "pass"
+    # None: opt-in only, see PassManager(enable=...)
+    min_level = 1
+
+    def run(self, module: ast.Module, context: PassContext) -> ast.Module:
+        raise NotImplementedError
+
+
+PASSES = []
+
+
+def register_pass(pass_cls):
+    """Class decorator adding a pass to the default pipeline."""
+    PASSES.append(pass_cls)
+    return pass_cls
+
+
+class PassManager:
+    def __init__(self, level: int = 1, passes=None, dump: bool = False, time_passes: bool = False,
+                 enable=()):
+        self.level = level
+        self.passes = [p() for p in (PASSES if passes is None else passes)
+                       if (p.min_level is None and p.name in enable)
+                       or (p.min_level is not None and p.min_level <= level)]
+        self.dump = dump
+        self.time_passes = time_passes
+        self.timings = []
+
+    def run(self, module: ast.Module, context: PassContext = None) -> ast.Module:
+        context = context or PassContext()
+        self.timings = []
+        for p in self.passes:
+            start = time.perf_counter()
+            module = p.run(module, context)
+            self.timings.append((p.name, time.perf_counter() - start))
+            if self.dump:
+                ast.fix_missing_locations(module)
+                print(f"=== after {p.name} ===")
+                print(ast.unparse(module))
+        if self.time_passes:
+            self.report()
+        return module
+
+    def report(self):
+        total = sum(t for _, t in self.timings)
+        for name, seconds in self.timings:
+            print(f"[pass] {name:<24} {seconds * 1000:8.3f} ms")
+        print(f"[pass] {'total':<24} {total * 1000:8.3f} ms")
+
+
+# --- helpers -----------------------------------------------------------------
+
+def _is_const(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, FOLDABLE_TYPES)
+
+
+def _fits(value):
+    if isinstance(value, bool) or value is None:
+        return True
+    if isinstance(value, int):
+        return value.bit_length() <= MAX_FOLDED_BITS
+    if isinstance(value, float):
+        return True
+    if isinstance(value, str):
+        return len(value) <= MAX_FOLDED_LEN
+    return False
+
+
+def _evaluate(fn, *operands):
+    """Applies `fn` at compile time; None if it would raise or blow up."""
+    if fn in (operator.pow, operator.lshift) and isinstance(operands[1], int) \
+            and not isinstance(operands[0], str) and abs(operands[1]) > MAX_FOLDED_BITS:
+        return None
+    if fn is operator.mul and any(isinstance(o, str) for o in operands) \
+            and any(isinstance(o, int) and o > MAX_FOLDED_LEN for o in operands):
+        return None
+    try:
+        value = fn(*operands)
+    except Exception:
+        return None
+    if not _fits(value) or isinstance(value, complex):
+        return None
+    return ast.Constant(value=value)
+
+
+def _stored_names(node):
+    """Names bound anywhere inside `node` (targets, params, imports, defs)."""
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            names.add(child.id)
+        elif isinstance(child, ast.arg):
+            names.add(child.arg)
+        elif isinstance(child, (ast.Global, ast.Nonlocal)):
+            names.update(child.names)
+        elif isinstance(child, (ast.FunctionDef, ast.ClassDef)):
+            names.add(child.name)
+    return names
+
+
+def _is_pure(node):
+    """True if evaluating `node` cannot have side effects we must preserve."""
+    if isinstance(node, (ast.Constant, ast.Name)):
+        return True
+    if isinstance(node, ast.BinOp):
+        return _is_pure(node.left) and _is_pure(node.right)
+    if isinstance(node, ast.UnaryOp):
+        return _is_pure(node.operand)
+    if isinstance(node, ast.BoolOp):
+        return all(_is_pure(v) for v in node.values)
+    if isinstance(node, ast.Compare):
+        return _is_pure(node.left) and all(_is_pure(c) for c in node.comparators)
+    if isinstance(node, ast.IfExp):
+        return _is_pure(node.test) and _is_pure(node.body) and _is_pure(node.orelse)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return all(_is_pure(e) for e in node.elts)
+    return False
+
+
+def module_bindings(module):
+    """{name: indexes of the top-level statements of `module` that bind it}."""
+    bindings = {}
+    for index, stmt in enumerate(module.body):
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = {stmt.name}
+        elif isinstance(stmt, (ast.Import, ast.ImportFrom)):
+            names = {(a.asname or a.name).split(".")[0] for a in stmt.names}
+        else:
+            names = {n.id for n in ast.walk(stmt)
+                     if isinstance(n, ast.Name) and isinstance(n.ctx, (ast.Store, ast.Del))}
+        for name in names:
+            bindings.setdefault(name, []).append(index)
+    return bindings
+
+
+def _functions(module):
+    return [n for n in ast.walk(module) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+
+def _map_blocks(node, fn):
+    """Applies `fn` to every statement list nested in `node`, innermost first."""
+    for child in ast.iter_child_nodes(node):
+        _map_blocks(child, fn)
+    for field in ("body", "orelse", "finalbody"):
+        block = getattr(node, field, None)
+        if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+            setattr(node, field, fn(block) or [ast.Pass()] if field == "body" else fn(block))
+
+
+# --- passes --------------------------------------------------------------------
+
+class _Folder(ast.NodeTransformer):
+    def __init__(self, constants):
+        self.constants = constants
+        self.shadowed = [set()]
+
+    def visit_FunctionDef(self, node):
+        self.shadowed.append(self.shadowed[-1] | _stored_names(node))
+        self.generic_visit(node)
+        self.shadowed.pop()
+        return node
+
+    visit_Lambda = visit_FunctionDef
+
+    def visit_Name(self, node):
+        if (isinstance(node.ctx, ast.Load) and node.id in self.constants
+                and node.id not in self.shadowed[-1]):
+            return ast.copy_location(ast.Constant(value=self.constants[node.id]), node)
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        fn = BIN_OPS.get(type(node.op))
+        if fn and _is_const(node.left) and _is_const(node.right):
+            folded = _evaluate(fn, node.left.value, node.right.value)
+            if folded is not None:
+                return ast.copy_location(folded, node)
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        fn = UNARY_OPS.get(type(node.op))
+        if fn and _is_const(node.operand):
+            folded = _evaluate(fn, node.operand.value)
+            if folded is not None:
+                return ast.copy_location(folded, node)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        operands = [node.left] + node.comparators
+        fns = [COMPARE_OPS.get(type(op)) for op in node.ops]
+        if all(_is_const(o) for o in operands) and all(fns):
+            result = True
+            for fn, a, b in zip(fns, operands, operands[1:]):
+                folded = _evaluate(fn, a.value, b.value)
+                if folded is None:
+                    return node
+                result = result and folded.value
+            return ast.copy_location(ast.Constant(value=bool(result)), node)
+        return node
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        values = []
+        is_and = isinstance(node.op, ast.And)
+        for value in node.values:
+            if _is_const(value):
+                # `x and <falsy>`-style short circuit decides the result here
+                if bool(value.value) != is_and:
+                    values.append(value)
+                    break
+                if value is node.values[-1]:
+                    values.append(value)
+                continue
+            values.append(value)
+        if len(values) == 1:
+            return values[0]
+        node.values = values
+        return node
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        if _is_const(node.test):
+            return node.body if node.test.value else node.orelse
+        return node
+
+    def visit_JoinedStr(self, node):
+        values = []
+        for value in node.values:
+            if isinstance(value, ast.FormattedValue):
+                # the format spec is a JoinedStr too, but must stay one
+                value.value = self.visit(value.value)
+            if (isinstance(value, ast.FormattedValue) and _is_const(value.value) and value.conversion == -1
+                    and (value.format_spec is None or all(_is_const(v) for v in value.format_spec.values))):
+                spec = "".join(v.value for v in value.format_spec.values) if value.format_spec else ""
+                folded = _evaluate(format, value.value.value, spec)
+                if folded is not None:
+                    value = folded
+            if isinstance(value, ast.Constant) and values and isinstance(values[-1], ast.Constant):
+                values[-1] = ast.Constant(value=values[-1].value + value.value)
+            else:
+                values.append(value)
+        if len(values) == 1 and isinstance(values[0], ast.Constant):
+            return ast.copy_location(values[0], node)
+        node.values = values
+        return node
+
+
+@register_pass
+class ConstantFolding(Pass):
+    """Evaluates constant expressions and substitutes known constants.
+
+    Module-level assignments to names in `context.const_names` whose value
+    folds to a literal become part of the constant table, so `const`,
+    `constexpr` and enumerator values are folded into every use.
+    """
+    name = "constant-folding"
+    min_level = 1
+
+    def run(self, module, context):
+        folder = _Folder(context.constants)
+        body = []
+        for stmt in module.body:
+            stmt = folder.visit(stmt)
+            if (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                    and isinstance(stmt.targets[0], ast.Name)
+                    and stmt.targets[0].id in context.const_names and _is_const(stmt.value)):
+                context.constants[stmt.targets[0].id] = stmt.value.value
+            body.append(stmt)
+        module.body = body
+        return module
+
+
+@register_pass
+class UnreachableCode(Pass):
+    """Drops statements after return/raise/break/continue and resolves
+    `if`/`while` statements whose test folded to a constant."""
+    name = "unreachable-code"
+    min_level = 1
+
+    def run(self, module, context):
+        _map_blocks(module, self._prune)
+        return module
+
+    def _prune(self, stmts):
+        result = []
+        for stmt in stmts:
+            if isinstance(stmt, ast.If) and _is_const(stmt.test):
+                branch = stmt.body if stmt.test.value else stmt.orelse
+                result.extend(s for s in branch if not isinstance(s, ast.Pass))
+                if result and isinstance(result[-1], TERMINATORS):
+                    break
+                continue
+            if isinstance(stmt, ast.While) and _is_const(stmt.test) and not stmt.test.value:
+                result.extend(stmt.orelse)
+                continue
+            result.append(stmt)
+            if isinstance(stmt, TERMINATORS):
+                break
+        return result
+
+
+class _Simplifier(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        left, right, op = node.left, node.right, node.op
+        # list repetition (`[0] * n`) must keep producing a fresh list
+        if isinstance(left, (ast.List, ast.ListComp)) or isinstance(right, (ast.List, ast.ListComp)):
+            return node
+        if _is_const(right) and type(right.value) is int:
+            k = right.value
+            if k == 0 and isinstance(op, (ast.Add, ast.Sub, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift)):
+                return left
+            if k == 1 and isinstance(op, (ast.Mult, ast.FloorDiv, ast.Pow)):
+                return left
+            if k == 2 and isinstance(op, ast.Pow) and isinstance(left, ast.Name):
+                return ast.copy_location(ast.BinOp(left=left, op=ast.Mult(), right=ast.Name(id=left.id, ctx=ast.Load())), node)
+        if _is_const(left) and type(left.value) is int:
+            k = left.value
+            if k == 0 and isinstance(op, (ast.Add, ast.BitOr, ast.BitXor)):
+                return right
+            if k == 0 and isinstance(op, ast.Sub):
+                return ast.copy_location(ast.UnaryOp(op=ast.USub(), operand=right), node)
+            if k == 1 and isinstance(op, ast.Mult):
+                return right
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        inner = node.operand
+        if isinstance(inner, ast.UnaryOp) and type(inner.op) is type(node.op) \
+                and isinstance(node.op, (ast.USub, ast.Invert)):
+            return inner.operand
+        return node
+
+
+@register_pass
+class AlgebraicSimplification(Pass):
+    """Removes arithmetic identities such as `x + 0`, `x * 1` and `-(-x)`."""
+    name = "algebraic-simplification"
+    min_level = 1
+
+    def run(self, module, context):
+        return _Simplifier().visit(module)
+
+
+# Largest function body (in AST nodes) inlined into its callers; functions
+# the C++ source declares `inline` or `constexpr` get the larger budget.
+INLINE_BUDGET = 40
+INLINE_HINT_BUDGET = 120
+
+# Nodes an inlined body may consist of: no nested scopes, and nothing whose
+# evaluation order _events cannot follow.
+INLINABLE_NODES = (
+    ast.Name, ast.Constant, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.keyword, ast.Subscript, ast.Slice, ast.Attribute, ast.Tuple, ast.List,
+    ast.NamedExpr, ast.expr_context, ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+)
+
+
+def _events(expr, conditional, out):
+    """Appends what evaluating `expr` does, in order, to `out`.
+
+    Entries are `("load", name, conditional)`, `("store", name, conditional)`
+    and `("effect", node, conditional)` for calls, subscripts and attribute
+    reads, which may run arbitrary code or raise.
+    """
+    if isinstance(expr, ast.Name):
+        out.append(("store" if isinstance(expr.ctx, ast.Store) else "load", expr.id, conditional))
+    elif isinstance(expr, ast.BoolOp):
+        _events(expr.values[0], conditional, out)
+        for value in expr.values[1:]:
+            _events(value, True, out)
+    elif isinstance(expr, ast.Compare):
+        _events(expr.left, conditional, out)
+        for i, comparator in enumerate(expr.comparators):
+            _events(comparator, conditional or i > 0, out)
+    elif isinstance(expr, ast.IfExp):
+        _events(expr.test, conditional, out)
+        _events(expr.body, True, out)
+        _events(expr.orelse, True, out)
+    elif isinstance(expr, ast.NamedExpr):
+        _events(expr.value, conditional, out)
+        _events(expr.target, conditional, out)
+    else:
+        for child in ast.iter_child_nodes(expr):
+            _events(child, conditional, out)
+        if isinstance(expr, (ast.Call, ast.Subscript, ast.Attribute)):
+            out.append(("effect", expr, conditional))
+
+
+class _Rename(ast.NodeTransformer):
+    """Replaces names: a string renames, an expression is copied in for each load."""
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+
+    def visit_Name(self, node):
+        new = self.mapping.get(node.id)
+        if new is None:
+            return node
+        if isinstance(new, str):
+            return ast.Name(id=new, ctx=node.ctx)
+        return copy.deepcopy(new)
+
+
+class _InlineTemplate:
+    """A small function reduced to `steps`: `(local, expression)` pairs
+    evaluated in order, the last one, with local None, being the result."""
+
+    def __init__(self, func, steps):
+        self.params = [a.arg for a in func.args.args]
+        self.defaults = func.args.defaults
+        self.steps = steps
+        self.locals = {local for local, _ in steps if local}
+        self.events = []
+        for _, expr in steps:
+            _events(expr, False, self.events)
+        self.stored = {name for kind, name, _ in self.events if kind == "store"} | self.locals
+        self.free = {name for kind, name, _ in self.events
+                     if kind == "load" and name not in self.params and name not in self.locals}
+
+
+def _fold_locals(steps):
+    """Substitutes locals assigned once and read once into their use when
+    their value is pure and reads nothing assigned in between."""
+    steps = list(steps)
+    i = 0
+    while i < len(steps) - 1:
+        local, value = steps[i]
+        rest = steps[i + 1:]
+        later_stores = {local for local, _ in rest if local} | {
+            n.id for _, expr in rest for n in ast.walk(expr)
+            if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+        loads = sum(1 for _, expr in rest for n in ast.walk(expr)
+                    if isinstance(n, ast.Name) and n.id == local and isinstance(n.ctx, ast.Load))
+        read = {n.id for n in ast.walk(value) if isinstance(n, ast.Name)}
+        if (loads == 1 and local not in later_stores and _is_pure(value)
+                and not read & later_stores and sum(1 for l, _ in steps if l == local) == 1):
+            renamer = _Rename({local: value})
+            steps[i + 1:] = [(l, renamer.visit(expr)) for l, expr in rest]
+            del steps[i]
+            continue
+        i += 1
+    return steps
+
+
+@register_pass
+class FunctionInlining(Pass):
+    """Substitutes small non-recursive functions into their call sites.
+
+    A candidate is a top-level function whose body is a few local
+    assignments followed by a `return`, within INLINE_BUDGET nodes
+    (INLINE_HINT_BUDGET for names in `context.inline_names`). Arguments that
+    are constants or caller locals are substituted directly, as is any
+    argument used once where moving its evaluation into the body keeps the
+    original order of side effects. Other arguments and the callee's locals
+    are bound to fresh `_inline{n}_<name>` temporaries in
+    `(_inline1_a := ..., ..., result)[-1]`. Call sites are left alone where
+    the callee's globals are shadowed by the caller or a temporary would be
+    needed inside a lambda or comprehension. The `def` itself stays for
+    calls that are not inlined and for uses as a value.
+    """
+    name = "function-inlining"
+    min_level = 2
+
+    def run(self, module, context):
+        bindings = module_bindings(module)
+        shadowing = context.module_names if context.module_names is not None else set(bindings)
+        self.stable = (stable_runtime_names() | set(dir(builtins))) - shadowing
+        self.templates = {}
+        for stmt in module.body:
+            if isinstance(stmt, ast.FunctionDef) and len(bindings.get(stmt.name, ())) == 1:
+                budget = INLINE_HINT_BUDGET if stmt.name in context.inline_names else INLINE_BUDGET
+                template = self._template(stmt, budget)
+                if template is not None:
+                    self.templates[stmt.name] = template
+        if not self.templates:
+            return module
+        self.count = 0
+        return _CallInliner(self).visit(module)
+
+    def _template(self, func, budget):
+        args = func.args
+        if (func.decorator_list or args.vararg or args.kwarg or args.posonlyargs or args.kwonlyargs
+                or func.name == "main" or not func.body or not isinstance(func.body[-1], ast.Return)):
+            return None
+        if sum(1 for stmt in func.body for _ in ast.walk(stmt)) > budget:
+            return None
+        steps = []
+        for stmt in func.body[:-1]:
+            if not (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                    and isinstance(stmt.targets[0], ast.Name)):
+                return None
+            steps.append((stmt.targets[0].id, stmt.value))
+        steps.append((None, func.body[-1].value or ast.Constant(value=None)))
+        for _, expr in steps:
+            for node in ast.walk(expr):
+                if not isinstance(node, INLINABLE_NODES) or (isinstance(node, ast.Name) and node.id == func.name):
+                    return None
+        if not all(isinstance(d, ast.Constant) for d in args.defaults):
+            return None
+        template = _InlineTemplate(func, _fold_locals(copy.deepcopy(steps)))
+        if template.locals & set(template.params):
+            return None
+        return template
+
+    def expand(self, call, template, caller_locals, allow_temps):
+        """The inlined form of `call`, or None to keep the call."""
+        args = list(call.args)
+        missing = len(template.params) - len(args)
+        if call.keywords or any(isinstance(a, ast.Starred) for a in args) \
+                or missing < 0 or missing > len(template.defaults):
+            return None
+        if template.free & caller_locals:
+            return None
+        args += [copy.deepcopy(d) for d in template.defaults[len(template.defaults) - missing:]]
+
+        arg_stores = set().union(*(_stored_names(a) for a in args))
+        impure = [not _is_pure(a) for a in args]
+        opaque = any(kind == "effect" and self._opaque(node) for kind, node, _ in template.events)
+        direct, pending = {}, []
+        for param, arg, is_impure in zip(template.params, args, impure):
+            if param in template.stored:
+                pending.append((param, arg, True))
+            elif isinstance(arg, ast.Constant) or (
+                    isinstance(arg, ast.Name) and arg.id not in arg_stores
+                    and (arg.id in caller_locals or not (opaque or any(impure)))):
+                direct[param] = arg
+            else:
+                reads = {n.id for n in ast.walk(arg) if isinstance(n, ast.Name)}
+                pending.append((param, arg, is_impure or bool(reads & arg_stores)))
+
+        bound = self._bound(template, pending)
+        for param, arg, _ in pending:
+            if param not in bound:
+                direct[param] = arg
+        n = self.count
+        names = {param: f"_inline{n}_{param}" for param in bound}
+        names.update({local: f"_inline{n}_{local}" for local in template.locals})
+        if names and not allow_temps:
+            return None
+        self.count += 1
+        renamer = _Rename({**direct, **names})
+        prefix = [ast.NamedExpr(target=ast.Name(id=names[param], ctx=ast.Store()), value=arg)
+                  for param, arg, _ in pending if param in bound]
+        for local, expr in template.steps:
+            expr = renamer.visit(copy.deepcopy(expr))
+            if local is None:
+                result = expr
+            else:
+                prefix.append(ast.NamedExpr(target=ast.Name(id=names[local], ctx=ast.Store()), value=expr))
+        if prefix:
+            result = ast.Subscript(value=ast.Tuple(elts=prefix + [result], ctx=ast.Load()),
+                                   slice=ast.Constant(value=-1), ctx=ast.Load())
+        for node in ast.walk(result):
+            if "lineno" in node._attributes:
+                ast.copy_location(node, call)
+        return result
+
+    def _opaque(self, node):
+        """True for calls into program code, which may rebind globals."""
+        return isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in self.stable)
+
+    def _bound(self, template, pending):
+        """Parameters among `pending` that need a temporary.
+
+        An argument is substituted when its parameter is read at most once
+        (exactly once if evaluating it has effects) and nothing the body does
+        before that read can change its value. Arguments whose order matters
+        must also be read unconditionally and in argument order, after
+        nothing but loads of locals and helpers; if one of them needs a
+        temporary, all of them do, so they still run in order.
+        """
+        events = template.events
+        params = set(template.params)
+        bound = set()
+        ordered_at = []
+        for param, arg, ordered in pending:
+            uses = [i for i, (kind, name, _) in enumerate(events) if kind == "load" and name == param]
+            if param in template.stored or len(uses) > 1 or (ordered and not uses):
+                bound.add(param)
+                continue
+            if not uses:
+                continue
+            at = uses[0]
+            before = events[:at]
+            if any(kind == "effect" and self._opaque(node) for kind, node, _ in before):
+                bound.add(param)
+            elif ordered:
+                if events[at][2] or any(
+                        kind == "effect" or (kind == "load" and name not in params
+                                             and name not in template.locals and name not in self.stable)
+                        for kind, name, _ in before):
+                    bound.add(param)
+                else:
+                    ordered_at.append(at)
+        order_kept = ordered_at == sorted(ordered_at)
+        if not order_kept or any(param in bound for param, _, ordered in pending if ordered):
+            bound.update(param for param, _, ordered in pending if ordered)
+        return bound
+
+
+class _CallInliner(ast.NodeTransformer):
+    def __init__(self, inliner):
+        self.inliner = inliner
+        self.scopes = [set()]
+        self.temps_allowed = [True]
+
+    def visit_FunctionDef(self, node):
+        declared = {name for child in ast.walk(node) if isinstance(child, ast.Global) for name in child.names}
+        self.scopes.append(self.scopes[-1] | (_stored_names(node) - declared))
+        self.temps_allowed.append(True)
+        node.body = [self.visit(stmt) for stmt in node.body]
+        self.temps_allowed.pop()
+        self.scopes.pop()
+        return node
+
+    def _nested(self, node):
+        self.scopes.append(self.scopes[-1] | _stored_names(node))
+        self.temps_allowed.append(False)
+        self.generic_visit(node)
+        self.temps_allowed.pop()
+        self.scopes.pop()
+        return node
+
+    visit_Lambda = visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _nested
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in self.inliner.templates and func.id not in self.scopes[-1]:
+            inlined = self.inliner.expand(node, self.inliner.templates[func.id],
+                                          self.scopes[-1], self.temps_allowed[-1])
+            if inlined is not None:
+                return inlined
+        return node
+
+
+@register_pass
+class ConstantPropagation(Pass):
+    """Replaces reads of function locals that are assigned a literal exactly once.
+
+    Only assignments at the top level of the function body qualify, so the
+    store dominates every later statement; reads that come before it are left
+    alone.
+    """
+    name = "constant-propagation"
+    min_level = 2
+
+    def run(self, module, context):
+        for func in _functions(module):
+            self._propagate(func)
+        return module
+
+    def _propagate(self, func):
+        store_counts = {}
+        for child in ast.walk(func):
+            if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+                store_counts[child.id] = store_counts.get(child.id, 0) + 1
+        excluded = {a.arg for a in ast.walk(func.args) if isinstance(a, ast.arg)}
+        for child in ast.walk(func):
+            if isinstance(child, (ast.Global, ast.Nonlocal)):
+                excluded.update(child.names)
+            elif child is not func and isinstance(child, (ast.FunctionDef, ast.Lambda)):
+                excluded.update(n.id for n in ast.walk(child) if isinstance(n, ast.Name))
+
+        for index, stmt in enumerate(func.body):
+            if not (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                    and isinstance(stmt.targets[0], ast.Name) and _is_const(stmt.value)):
+                continue
+            name = stmt.targets[0].id
+            if store_counts.get(name) != 1 or name in excluded:
+                continue
+            folder = _Folder({name: stmt.value.value})
+            func.body[index + 1:] = [folder.visit(s) for s in func.body[index + 1:]]
+
+
+@register_pass
+class ConstantFoldingAfterPropagation(ConstantFolding):
+    name = "constant-folding-2"
+    min_level = 2
+
+
+@register_pass
+class DeadStoreElimination(Pass):
+    """Removes pure assignments to function locals that are never read."""
+    name = "dead-store-elimination"
+    min_level = 2
+
+    def run(self, module, context):
+        for func in _functions(module):
+            loaded = set()
+            for child in ast.walk(func):
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                    loaded.add(child.id)
+                elif isinstance(child, (ast.Global, ast.Nonlocal)):
+                    loaded.update(child.names)
+            _map_blocks(func, lambda stmts: [s for s in stmts if not self._is_dead(s, loaded)])
+        return module
+
+    def _is_dead(self, stmt, loaded):
+        if isinstance(stmt, ast.Assign):
+            targets = stmt.targets
+        elif isinstance(stmt, ast.AugAssign):
+            targets = [stmt.target]
+        else:
+            return False
+        return (all(isinstance(t, ast.Name) and t.id not in loaded for t in targets)
+                and _is_pure(stmt.value))
+
+
+@register_pass
+class CommonSubexpressions(Pass):
+    """Evaluates subscripts repeated within one statement only once.
+
+    In `dp[i][j] = max(dp[i][j], dp[i][j - 1] + 1)` the row `dp[i]` is
+    looked up three times and `dp[i][j]` twice; both are bound to `_cse`
+    temporaries just before the statement, innermost first. Only statements
+    whose evaluation cannot write anything before their own store qualify:
+    no calls besides a few pure builtins, no walrus, no nested scopes.
+    Subscripts under `and`/`or`/`if`-`else` branches are never hoisted since
+    they might not be evaluated at all.
+    """
+    name = "common-subexpressions"
+    min_level = 2
+
+    PURE_CALLS = {"abs", "len", "max", "min"}
+
+    def run(self, module, context):
+        shadowed = set(module_bindings(module)) | (context.module_names or set())
+        self.pure_calls = self.PURE_CALLS - shadowed
+        for func in _functions(module):
+            self.count = 0
+            _map_blocks(func, self._hoist_block)
+        return module
+
+    def _hoist_block(self, stmts):
+        result = []
+        for stmt in stmts:
+            result.extend(self._hoist(stmt))
+            result.append(stmt)
+        return result
+
+    def _regions(self, stmt):
+        """The expressions `stmt` evaluates once, in order, before it stores."""
+        if isinstance(stmt, ast.Assign):
+            return [stmt.value] + [t.value for t in stmt.targets if isinstance(t, (ast.Subscript, ast.Attribute))] \
+                + [t.slice for t in stmt.targets if isinstance(t, ast.Subscript)]
+        if isinstance(stmt, ast.AugAssign):
+            target = stmt.target
+            if isinstance(target, ast.Name):
+                return [stmt.value]
+            parts = [target.value] + ([target.slice] if isinstance(target, ast.Subscript) else [])
+            return parts + [stmt.value]
+        if isinstance(stmt, (ast.Expr, ast.Return)) and stmt.value is not None:
+            return [stmt.value]
+        if isinstance(stmt, ast.If):
+            return [stmt.test]
+        return []
+
+    def _hoist(self, stmt):
+        regions = self._regions(stmt)
+        if not regions or not all(self._safe(r) for r in regions):
+            return []
+        hoisted = []
+        while True:
+            counts = {}
+            for region in self._regions(stmt) + [h.value for h in hoisted]:
+                for sub in self._candidates(region):
+                    key = ast.dump(sub)
+                    counts[key] = counts.get(key, 0) + 1
+            repeated = [key for key, n in counts.items() if n > 1]
+            if not repeated:
+                return hoisted
+            key = min(repeated, key=len)
+            temp = f"_cse{self.count}"
+            self.count += 1
+            value = None
+            for holder in [stmt] + hoisted:
+                value = _Replacer(key, temp).visit_and_capture(holder) or value
+            hoisted.append(ast.copy_location(
+                ast.Assign(targets=[ast.Name(id=temp, ctx=ast.Store())], value=value), stmt))
+
+    def _safe(self, expr):
+        for node in ast.walk(expr):
+            if isinstance(node, (ast.NamedExpr, ast.Lambda, ast.comprehension, ast.Await,
+                                 ast.Yield, ast.YieldFrom)):
+                return False
+            if isinstance(node, ast.Call) and not (
+                    isinstance(node.func, ast.Name) and node.func.id in self.pure_calls):
+                return False
+        return True
+
+    def _candidates(self, expr):
+        """Unconditionally evaluated `a[...]...[...]` subscripts with simple indices."""
+        if isinstance(expr, ast.BoolOp):
+            yield from self._candidates(expr.values[0])
+            return
+        if isinstance(expr, ast.IfExp):
+            yield from self._candidates(expr.test)
+            return
+        if isinstance(expr, ast.Compare):
+            yield from self._candidates(expr.left)
+            yield from self._candidates(expr.comparators[0])
+            return
+        if isinstance(expr, ast.Subscript) and isinstance(expr.ctx, ast.Load) and _is_index_path(expr):
+            yield expr
+        for child in ast.iter_child_nodes(expr):
+            if isinstance(child, ast.expr):
+                yield from self._candidates(child)
+
+
+def _is_index_path(node):
+    """`name[i][j + 1]...` with indices built from names and constants."""
+    while isinstance(node, ast.Subscript):
+        if not all(isinstance(n, (ast.Name, ast.Constant, ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop,
+                                  ast.expr_context))
+                   for n in ast.walk(node.slice)):
+            return False
+        node = node.value
+    return isinstance(node, ast.Name)
+
+
+class _Replacer(ast.NodeTransformer):
+    """Replaces loads of the expression dumped as `key` with the name `temp`."""
+
+    def __init__(self, key, temp):
+        self.key = key
+        self.temp = temp
+        self.captured = None
+
+    def visit_and_capture(self, node):
+        """Rewrites `node` in place; returns the first replaced expression, if any."""
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                setattr(node, field, [self.visit(v) if isinstance(v, ast.expr) else v for v in value])
+            elif isinstance(value, ast.expr):
+                setattr(node, field, self.visit(value))
+        return self.captured
+
+    def visit_Subscript(self, node):
+        if isinstance(node.ctx, ast.Load) and ast.dump(node) == self.key:
+            if self.captured is None:
+                self.captured = node
+            return ast.copy_location(ast.Name(id=self.temp, ctx=ast.Load()), node)
+        return self.generic_visit(node)
+
+    def visit_Lambda(self, node):
+        return node
+
+
+@register_pass
+class FastLocals(Pass):
+    """Binds names a function reads inside its loops to keyword-only defaults.
+
+    `def f(n, *, len=len, _push_back=_push_back)` turns the LOAD_GLOBAL of
+    every loop iteration into a LOAD_FAST. Only names whose binding can never
+    change qualify: builtins and runtime helpers the program does not shadow,
+    and program globals assigned once before the function and never declared
+    `global` anywhere (containers stay shared, only the name is captured).
+    """
+    name = "fast-locals"
+    min_level = 2
+
+    def run(self, module, context):
+        rebound = set()
+        for child in ast.walk(module):
+            if isinstance(child, ast.Global):
+                rebound.update(child.names)
+        module_stores = module_bindings(module)
+        # a function compiled on its own cannot see which globals precede it
+        partial = context.module_names is not None
+        shadowing = context.module_names if partial else set(module_stores)
+        stable = (stable_runtime_names() | set(dir(builtins))) - shadowing
+
+        for index, stmt in enumerate(module.body):
+            if not isinstance(stmt, ast.FunctionDef):
+                continue
+            defined_before = set() if partial else {
+                name for name, at in module_stores.items()
+                if len(at) == 1 and at[0] < index and isinstance(module.body[at[0]], ast.Assign)}
+            bindable = stable | (defined_before - rebound)
+            self._bind(stmt, bindable)
+        return module
+
+    def _bind(self, func, bindable):
+        local = _stored_names(func) | {func.name}
+        hot = set()
+        for loop in ast.walk(func):
+            if isinstance(loop, ast.While):
+                parts = [loop.test] + loop.body
+            elif isinstance(loop, ast.For):
+                # the iterable is evaluated once, only the body is hot
+                parts = loop.body
+            else:
+                continue
+            for part in parts:
+                hot.update(n.id for n in ast.walk(part)
+                           if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load))
+        names = sorted((hot & bindable) - local)
+        for name in names:
+            func.args.kwonlyargs.append(ast.arg(arg=name))
+            func.args.kw_defaults.append(ast.Name(id=name, ctx=ast.Load()))
+
+
+@register_pass
+class TailCallElimination(Pass):
+    """Turns self tail calls into a loop so deep recursion needs no stack.
+
+    `return f(a, b)` inside `f` becomes `n, m = a, b; continue` and the body
+    is wrapped in `while True`. Tail calls inside loops or `try` blocks are
+    left alone (the `continue` or the exception handling would change
+    meaning), as are decorated functions and functions with nested scopes,
+    which could capture the parameters being reassigned.
+    """
+    name = "tail-calls"
+    min_level = None
+
+    def run(self, module, context):
+        for func in module.body:
+            if isinstance(func, ast.FunctionDef):
+                self._eliminate(func)
+        return module
+
+    def _eliminate(self, func):
+        args = func.args
+        if func.decorator_list or args.vararg or args.kwarg or args.posonlyargs:
+            return
+        if any(isinstance(n, (ast.FunctionDef, ast.Lambda, ast.ClassDef))
+               for stmt in func.body for n in ast.walk(stmt)):
+            return
+        params = [a.arg for a in args.args]
+        self.rewritten = 0
+        body = self._rewrite(func.body, func.name, params, nested=False)
+        if not self.rewritten:
+            return
+        globals_ = [s for s in body if isinstance(s, ast.Global)]
+        rest = [s for s in body if not isinstance(s, ast.Global)]
+        if not isinstance(rest[-1], TERMINATORS):
+            rest.append(ast.Return(value=None))
+        loop = ast.While(test=ast.Constant(value=True), body=rest, orelse=[])
+        func.body = globals_ + [loop]
+
+    def _is_self_call(self, node, name, params):
+        return (isinstance(node, ast.Return) and isinstance(node.value, ast.Call)
+                and isinstance(node.value.func, ast.Name) and node.value.func.id == name
+                and not node.value.keywords and len(node.value.args) == len(params)
+                and not any(isinstance(a, ast.Starred) for a in node.value.args))
+
+    def _rewrite(self, stmts, name, params, nested):
+        result = []
+        for stmt in stmts:
+            if not nested and self._is_self_call(stmt, name, params):
+                targets = [ast.Name(id=p, ctx=ast.Store()) for p in params]
+                values = stmt.value.args
+                if len(params) == 1:
+                    assign = ast.Assign(targets=targets, value=values[0])
+                else:
+                    assign = ast.Assign(targets=[ast.Tuple(elts=targets, ctx=ast.Store())],
+                                        value=ast.Tuple(elts=values, ctx=ast.Load()))
+                result.extend([ast.copy_location(assign, stmt), ast.copy_location(ast.Continue(), stmt)])
+                self.rewritten += 1
+                continue
+            inner = nested or isinstance(stmt, (ast.For, ast.While, ast.Try, ast.With))
+            for field in ("body", "orelse"):
+                block = getattr(stmt, field, None)
+                if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+                    setattr(stmt, field, self._rewrite(block, name, params, inner))
+            result.append(stmt)
+        return result
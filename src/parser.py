@@ -1,3 +1,4 @@
+import functools
 from tokens import Token, TokenType
 from typing import List, Optional
 
@@ -21,11 +22,30 @@ COMPLEX_TYPE_NAMES = {
 }
 
 
+def _with_span(method):
+    """Stamp the dict node returned by a parse method with its source span.
+
+    The span is a compact ``(line, col, end_line, end_col)`` tuple taken from
+    the first and last tokens the method consumed. Nodes that already carry a
+    span (built by an inner parse call) are left untouched.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = self.pos
+        result = method(self, *args, **kwargs)
+        return self._stamp_span(result, start)
+    return wrapper
+
+
 class Parser:
     def __init__(self, tokens: List[Token]):
         self.tokens = tokens
         self.pos = 0
         self.current = self.tokens[self.pos] if tokens else None
+        self.last_type_spec = None
+        self.last_type_qualifiers = set()
+        self.last_type_ref = False
+        self.last_type_const = False
 
     def peek(self, offset=0) -> Token:
         idx = self.pos + offset
@@ -51,6 +71,14 @@ class Parser:
             f"Expected {type_.name}, found {self.current} at pos {self.pos}"
         )
 
+    def _stamp_span(self, node, start: int):
+        if not isinstance(node, dict) or "span" in node or start >= len(self.tokens):
+            return node
+        first = self.tokens[start]
+        last = self.tokens[max(start, self.pos - 1)]
+        node["span"] = (first.line, first.column, last.line, last.column + len(last.value))
+        return node
+
     def is_type_token(self):
         if self.current and self.current.type == TokenType.IDENTIFIER and self.current.value in STORAGE_QUALIFIERS:
             return True
@@ -59,51 +87,82 @@ class Parser:
     def is_identifier_type(self):
         if not self.current or self.current.type != TokenType.IDENTIFIER:
             return False
+        if self.current.value == 'std' and self.peek(1) and self.peek(1).type == TokenType.SCOPE:
+            name = self.peek(2)
+            return bool(name and name.type == TokenType.IDENTIFIER and name.value in COMPLEX_TYPE_NAMES)
         return self.current.value in COMPLEX_TYPE_NAMES
 
-    def skip_template_args(self):
+    def skip_template_args(self) -> str:
+        """Consumes `<...>` and returns its source text, e.g. `<pair<int,int>>`."""
+        text = []
         if self.current and self.current.type == TokenType.LESS:
             depth = 0
             while self.current and self.current.type != TokenType.EOF:
                 if self.current.type == TokenType.LESS:
                     depth += 1
-                    self.advance()
+                    text.append(self.advance().value)
                 elif self.current.type == TokenType.GREATER:
                     depth -= 1
-                    self.advance()
+                    text.append(self.advance().value)
                     if depth == 0:
                         break
                 elif self.current.type == TokenType.SHIFT_RIGHT:
                     depth -= 2
-                    self.advance()
+                    text.append(self.advance().value)
                     if depth <= 0:
                         break
                 else:
-                    self.advance()
+                    token = self.advance()
+                    text.append(token.value if token.type != TokenType.SCOPE else '::')
+        return ' '.join(text).replace(' ,', ',').replace('< ', '<').replace(' <', '<').replace(' >', '>')
 
     def parse_type_name(self) -> str:
+        """Parses a type and returns its base name (`int`, `vector`, ...).
+
+        The full spelling, e.g. `unsigned long` or `vector<pair<int,int>>`,
+        is left in `last_type_spec`; `last_type_ref` and `last_type_const`
+        tell whether the type was declared as a reference or as const.
+        """
+        qualifiers = set()
         while self.current and self.current.type == TokenType.IDENTIFIER and self.current.value in STORAGE_QUALIFIERS:
+            qualifiers.add(self.advance().value)
+
+        if (self.current and self.current.type == TokenType.IDENTIFIER and self.current.value == 'std'
+                and self.peek(1) and self.peek(1).type == TokenType.SCOPE):
+            self.advance()
             self.advance()
 
         if self.current and self.current.type in TYPE_TOKENS:
-            type_str = self.advance().value
+            words = [self.advance().value]
+            while self.current and self.current.type in TYPE_TOKENS and self.current.type != TokenType.VOID:
+                words.append(self.advance().value)
+            type_str = words[-1] if words[-1] in ('double', 'float') else words[0]
         elif self.current and self.current.type == TokenType.IDENTIFIER:
-            type_str = self.advance().value
+            words = [self.advance().value]
+            type_str = words[0]
         else:
             raise SyntaxError(f"Expected type, got {self.current}")
 
+        spec = ' '.join(words)
+        is_ref = False
         while self.current and self.current.type in (TokenType.STAR, TokenType.BITWISE_AND):
-            self.advance()
+            is_ref = is_ref or self.current.type == TokenType.BITWISE_AND
+            spec += '*' if self.advance().type == TokenType.STAR else ''
 
         if self.current and self.current.type == TokenType.LESS:
-            self.skip_template_args()
+            spec += self.skip_template_args()
 
         while self.current and self.current.type in (TokenType.STAR, TokenType.BITWISE_AND):
-            self.advance()
+            is_ref = is_ref or self.current.type == TokenType.BITWISE_AND
+            spec += '*' if self.advance().type == TokenType.STAR else ''
 
         while self.current and self.current.type == TokenType.IDENTIFIER and self.current.value in STORAGE_QUALIFIERS:
-            self.advance()
+            qualifiers.add(self.advance().value)
 
+        self.last_type_spec = spec
+        self.last_type_qualifiers = qualifiers
+        self.last_type_ref = is_ref
+        self.last_type_const = bool(qualifiers & {'const', 'constexpr'}) and '*' not in spec
         return type_str
 
     def parse(self):
@@ -114,6 +173,7 @@ class Parser:
                 ast.append(node)
         return ast
 
+    @_with_span
     def parse_top_level(self):
         if self.current.type == TokenType.IDENTIFIER and self.current.value in ('class', 'struct'):
             self.skip_class_or_struct()
@@ -155,6 +215,7 @@ class Parser:
         if self.current and self.current.type == TokenType.LESS:
             self.skip_template_args()
 
+    @_with_span
     def parse_namespace(self):
         self.advance()
         if self.current and self.current.type == TokenType.IDENTIFIER:
@@ -192,6 +253,7 @@ class Parser:
             return {"type": "Namespace", "body": stmts} if stmts else None
         return None
 
+    @_with_span
     def parse_enum(self):
         self.advance()
         is_class = False
@@ -243,14 +305,35 @@ class Parser:
                     return
             self.advance()
 
+    @_with_span
     def parse_function_or_variable(self):
         type_name = self.parse_type_name()
+        type_spec = self.last_type_spec
+        is_const = self.last_type_const
+        is_ref = self.last_type_ref
+        is_inline = bool(self.last_type_qualifiers & {'inline', 'constexpr'})
 
         if not self.current or self.current.type not in (TokenType.IDENTIFIER,):
             raise SyntaxError(f"Expected identifier after type, got {self.current}")
 
         name = self.advance().value
 
+        if (self.current and self.current.type == TokenType.LPAREN and self.peek(1)
+                and self.peek(1).type != TokenType.RPAREN
+                and self.peek(1).type not in TYPE_TOKENS
+                and not (self.peek(1).type == TokenType.IDENTIFIER
+                         and self.peek(1).value in STORAGE_QUALIFIERS | COMPLEX_TYPE_NAMES | {'std'})):
+            # constructor-style declaration: `vector<int> v(n, 0);`
+            self.advance()
+            args = self._parse_call_args()
+            if type_name in COMPLEX_TYPE_NAMES:
+                init = {"type": "CallExpr", "callee": type_name, "args": args, "typeSpec": type_spec}
+            else:
+                init = args[0] if args else None
+            self.expect(TokenType.SEMICOLON)
+            return {"type": "VarDecl", "varType": type_name, "typeSpec": type_spec, "name": name,
+                    "init": init, "arraySize": None, "isConst": is_const, "isRef": is_ref}
+
         if self.match(TokenType.LPAREN):
             params = self.parse_param_list()
             self.expect(TokenType.RPAREN)
@@ -265,9 +348,11 @@ class Parser:
                 return {
                     "type": "FunctionDecl",
                     "returnType": type_name,
+                    "returnSpec": type_spec,
                     "name": name,
                     "params": params,
-                    "body": body
+                    "body": body,
+                    "inline": is_inline,
                 }
             self.match(TokenType.SEMICOLON)
             return None
@@ -286,7 +371,8 @@ class Parser:
         if self.current and self.current.type == TokenType.LBRACE:
             init = self.parse_brace_initializer()
 
-        decls = [{"type": "VarDecl", "varType": type_name, "name": name, "init": init, "arraySize": array_size}]
+        decls = [{"type": "VarDecl", "varType": type_name, "typeSpec": type_spec, "name": name,
+                  "init": init, "arraySize": array_size, "isConst": is_const, "isRef": is_ref}]
         while self.match(TokenType.COMMA):
             extra_name = self.advance().value if self.current.type == TokenType.IDENTIFIER else None
             if not extra_name:
@@ -302,11 +388,13 @@ class Parser:
                 extra_init = self.parse_expression()
             if self.current and self.current.type == TokenType.LBRACE:
                 extra_init = self.parse_brace_initializer()
-            decls.append({"type": "VarDecl", "varType": type_name, "name": extra_name, "init": extra_init, "arraySize": extra_array})
+            decls.append({"type": "VarDecl", "varType": type_name, "typeSpec": type_spec, "name": extra_name,
+                          "init": extra_init, "arraySize": extra_array, "isConst": is_const, "isRef": is_ref})
 
         self.expect(TokenType.SEMICOLON)
         return decls[0] if len(decls) == 1 else {"type": "MultiVarDecl", "decls": decls}
 
+    @_with_span
     def parse_brace_initializer(self):
         self.expect(TokenType.LBRACE)
         elements = []
@@ -329,10 +417,11 @@ class Parser:
             if not (self.is_type_token() or self.is_identifier_type()):
                 break
             param_type = self.parse_type_name()
+            param_info = {"typeSpec": self.last_type_spec, "ref": self.last_type_ref}
             if not self.current or self.current.type not in (TokenType.IDENTIFIER, TokenType.RPAREN, TokenType.COMMA):
                 break
             if self.current.type in (TokenType.RPAREN, TokenType.COMMA):
-                params.append({"type": param_type, "name": f"_p{len(params)}"})
+                params.append({"type": param_type, "name": f"_p{len(params)}", **param_info})
             else:
                 param_name = self.advance().value
                 if self.current and self.current.type == TokenType.LBRACKET:
@@ -340,12 +429,14 @@ class Parser:
                     if self.current.type != TokenType.RBRACKET:
                         self.parse_expression()
                     self.expect(TokenType.RBRACKET)
+                    # array parameters decay to pointers and alias the caller's array
+                    param_info = {"typeSpec": param_info["typeSpec"] + '[]', "ref": True}
                 if self.current and self.current.type == TokenType.ASSIGN:
                     self.advance()
                     default_val = self.parse_expression()
-                    params.append({"type": param_type, "name": param_name, "default": default_val})
+                    params.append({"type": param_type, "name": param_name, "default": default_val, **param_info})
                 else:
-                    params.append({"type": param_type, "name": param_name})
+                    params.append({"type": param_type, "name": param_name, **param_info})
             if not self.match(TokenType.COMMA):
                 break
         return params
@@ -362,6 +453,7 @@ class Parser:
         self.expect(TokenType.RBRACE)
         return statements
 
+    @_with_span
     def parse_statement(self):
         if self.match(TokenType.SEMICOLON):
             return None
@@ -565,6 +657,7 @@ class Parser:
                 saved_pos = self.pos
                 try:
                     type_name = self.parse_type_name()
+                    type_spec = self.last_type_spec
                     if self.current and self.current.type == TokenType.IDENTIFIER:
                         var_name = self.advance().value
                         if self.current and self.current.type == TokenType.COLON:
@@ -574,7 +667,8 @@ class Parser:
                             body = self.parse_statement()
                             if not isinstance(body, list):
                                 body = [body] if body else []
-                            return {"type": "RangeForStmt", "varType": type_name, "varName": var_name, "iterable": iterable, "body": body}
+                            return {"type": "RangeForStmt", "varType": type_name, "typeSpec": type_spec,
+                                    "varName": var_name, "iterable": iterable, "body": body}
                         else:
                             self.pos = saved_pos
                             self.current = self.tokens[self.pos]
@@ -615,6 +709,7 @@ class Parser:
     def parse_expression(self):
         return self.parse_ternary()
 
+    @_with_span
     def parse_ternary(self):
         expr = self.parse_assignment()
         if self.match(TokenType.QUESTION):
@@ -624,6 +719,7 @@ class Parser:
             return {"type": "TernaryExpr", "condition": expr, "then": then_expr, "else": else_expr}
         return expr
 
+    @_with_span
     def parse_assignment(self):
         left = self.parse_logical_or()
 
@@ -652,80 +748,91 @@ class Parser:
         return left
 
     def parse_logical_or(self):
+        start = self.pos
         expr = self.parse_logical_and()
         while self.match(TokenType.OR):
             right = self.parse_logical_and()
-            expr = {"type": "BinaryExpr", "op": "OR", "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": "OR", "left": expr, "right": right}, start)
         return expr
 
     def parse_logical_and(self):
+        start = self.pos
         expr = self.parse_bitwise_or()
         while self.match(TokenType.AND):
             right = self.parse_bitwise_or()
-            expr = {"type": "BinaryExpr", "op": "AND", "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": "AND", "left": expr, "right": right}, start)
         return expr
 
     def parse_bitwise_or(self):
+        start = self.pos
         expr = self.parse_bitwise_xor()
         while self.match(TokenType.BITWISE_OR):
             right = self.parse_bitwise_xor()
-            expr = {"type": "BinaryExpr", "op": "BITWISE_OR", "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": "BITWISE_OR", "left": expr, "right": right}, start)
         return expr
 
     def parse_bitwise_xor(self):
+        start = self.pos
         expr = self.parse_bitwise_and()
         while self.match(TokenType.BITWISE_XOR):
             right = self.parse_bitwise_and()
-            expr = {"type": "BinaryExpr", "op": "BITWISE_XOR", "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": "BITWISE_XOR", "left": expr, "right": right}, start)
         return expr
 
     def parse_bitwise_and(self):
+        start = self.pos
         expr = self.parse_equality()
         while self.match(TokenType.BITWISE_AND):
             right = self.parse_equality()
-            expr = {"type": "BinaryExpr", "op": "BITWISE_AND", "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": "BITWISE_AND", "left": expr, "right": right}, start)
         return expr
 
     def parse_equality(self):
+        start = self.pos
         expr = self.parse_relational()
         while self.match(TokenType.EQUAL, TokenType.NOT_EQUAL):
             op = self.tokens[self.pos - 1].type
             right = self.parse_relational()
-            expr = {"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}, start)
         return expr
 
     def parse_relational(self):
+        start = self.pos
         expr = self.parse_shift()
         while self.match(TokenType.LESS, TokenType.LESS_EQUAL, TokenType.GREATER, TokenType.GREATER_EQUAL):
             op = self.tokens[self.pos - 1].type
             right = self.parse_shift()
-            expr = {"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}, start)
         return expr
 
     def parse_shift(self):
+        start = self.pos
         expr = self.parse_term()
         while self.match(TokenType.SHIFT_LEFT, TokenType.SHIFT_RIGHT):
             op = self.tokens[self.pos - 1].type
             right = self.parse_term()
-            expr = {"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}, start)
         return expr
 
     def parse_term(self):
+        start = self.pos
         expr = self.parse_factor()
         while self.match(TokenType.PLUS, TokenType.MINUS):
             op = self.tokens[self.pos - 1].type
             right = self.parse_factor()
-            expr = {"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}, start)
         return expr
 
     def parse_factor(self):
+        start = self.pos
         expr = self.parse_unary()
         while self.match(TokenType.STAR, TokenType.SLASH, TokenType.PERCENT):
             op = self.tokens[self.pos - 1].type
             right = self.parse_unary()
-            expr = {"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}
+            expr = self._stamp_span({"type": "BinaryExpr", "op": op.name, "left": expr, "right": right}, start)
         return expr
 
+    @_with_span
     def parse_unary(self):
         if self.match(TokenType.INCREMENT, TokenType.DECREMENT):
             op = self.tokens[self.pos - 1].type
@@ -753,10 +860,11 @@ class Parser:
             self.advance()
             if self.is_type_token():
                 self.parse_type_name()
+                target_spec = self.last_type_spec
                 if self.current and self.current.type == TokenType.RPAREN:
                     self.advance()
                     operand = self.parse_unary()
-                    return {"type": "CastExpr", "expr": operand}
+                    return {"type": "CastExpr", "expr": operand, "targetType": target_spec}
             self.pos = saved_pos
             self.current = self.tokens[self.pos]
 
@@ -798,6 +906,7 @@ class Parser:
 
         return self.parse_postfix()
 
+    @_with_span
     def parse_new_expr(self):
         self.advance()
         if self.current and self.current.type == TokenType.LBRACKET:
@@ -827,18 +936,19 @@ class Parser:
         return {"type": "NewExpr", "newType": type_name, "args": args}
 
     def parse_postfix(self):
+        start = self.pos
         expr = self.parse_primary()
 
         while True:
             if self.current and self.current.type in (TokenType.INCREMENT, TokenType.DECREMENT):
                 op = self.advance().type
-                expr = {"type": "UpdateExpr", "op": op.name, "expr": expr, "prefix": False}
+                expr = self._stamp_span({"type": "UpdateExpr", "op": op.name, "expr": expr, "prefix": False}, start)
 
             elif self.current and self.current.type == TokenType.LBRACKET:
                 self.advance()
                 index = self.parse_expression()
                 self.expect(TokenType.RBRACKET)
-                expr = {"type": "IndexExpr", "array": expr, "index": index}
+                expr = self._stamp_span({"type": "IndexExpr", "array": expr, "index": index}, start)
 
             elif self.current and self.current.type == TokenType.DOT:
                 self.advance()
@@ -848,9 +958,9 @@ class Parser:
                 if self.current and self.current.type == TokenType.LPAREN:
                     self.advance()
                     args = self._parse_call_args()
-                    expr = {"type": "MethodCall", "object": expr, "method": member, "args": args}
+                    expr = self._stamp_span({"type": "MethodCall", "object": expr, "method": member, "args": args}, start)
                 else:
-                    expr = {"type": "MemberAccess", "object": expr, "member": member}
+                    expr = self._stamp_span({"type": "MemberAccess", "object": expr, "member": member}, start)
 
             elif self.current and self.current.type == TokenType.ARROW:
                 self.advance()
@@ -858,9 +968,9 @@ class Parser:
                 if self.current and self.current.type == TokenType.LPAREN:
                     self.advance()
                     args = self._parse_call_args()
-                    expr = {"type": "MethodCall", "object": expr, "method": member, "args": args}
+                    expr = self._stamp_span({"type": "MethodCall", "object": expr, "method": member, "args": args}, start)
                 else:
-                    expr = {"type": "MemberAccess", "object": expr, "member": member}
+                    expr = self._stamp_span({"type": "MemberAccess", "object": expr, "member": member}, start)
 
             elif self.current and self.current.type == TokenType.SCOPE:
                 self.advance()
@@ -868,9 +978,9 @@ class Parser:
                 if self.current and self.current.type == TokenType.LPAREN:
                     self.advance()
                     args = self._parse_call_args()
-                    expr = {"type": "CallExpr", "callee": member, "args": args}
+                    expr = self._stamp_span({"type": "CallExpr", "callee": member, "args": args}, start)
                 else:
-                    expr = {"type": "Identifier", "name": member}
+                    expr = self._stamp_span({"type": "Identifier", "name": member}, start)
             else:
                 break
 
@@ -889,6 +999,7 @@ class Parser:
         self.expect(TokenType.RPAREN)
         return args
 
+    @_with_span
     def parse_primary(self):
         if self.current and self.current.type == TokenType.IDENTIFIER and self.current.value == 'decltype':
             self.advance()
@@ -960,14 +1071,15 @@ class Parser:
 
             if self.current and self.current.type == TokenType.LESS:
                 if name in COMPLEX_TYPE_NAMES:
-                    self.skip_template_args()
+                    type_spec = name + self.skip_template_args()
                     if self.current and self.current.type == TokenType.LPAREN:
                         self.advance()
                         args = self._parse_call_args()
-                        return {"type": "CallExpr", "callee": name, "args": args}
+                        return {"type": "CallExpr", "callee": name, "args": args, "typeSpec": type_spec}
                     elif self.current and self.current.type == TokenType.LBRACE:
                         init = self.parse_brace_initializer()
-                        return {"type": "CallExpr", "callee": name, "args": init.get("elements", [])}
+                        return {"type": "CallExpr", "callee": name, "args": init.get("elements", []),
+                                "typeSpec": type_spec}
 
             if self.current and self.current.type == TokenType.LPAREN:
                 self.advance()
@@ -0,0 +1,841 @@
+"""Value-range analysis over the typed dict AST.
+
+Translated code computes with unbounded Python ints, so C++ overflow,
+unsigned wraparound and truncating division only happen where codegen
+spells them out. This pass tracks an interval for every integer local
+through each function (joining at merges, widening loop-carried growth to
+the type's range and narrowing on branch conditions) and marks the nodes
+that need help:
+
+  "overflow"  arithmetic whose exact result may not fit its C++ type
+  "truncate"  integer `/` or `%` whose operands may have different signs
+  "narrow"    VarDecl, AssignExpr, ReturnStmt or CastExpr storing a value
+              that may not fit the destination; holds the destination type
+  "convert"   operand of an unsigned `/`, `%`, `>>` or bitwise op that may
+              be negative; holds the unsigned type it converts to
+
+Every integer expression also gets its "range" as a (lo, hi) pair. The
+intervals describe the translated program, so they already account for
+the wraps codegen inserts because of these marks.
+"""
+import sys
+
+from cpp_analysis import (cin_targets, iter_children, root_name, top_level_functions, walk, written_names,
+                          LOOP_STATEMENTS, PURE_FUNCTIONS)
+from type_checker import BOOL, CppType, parse_type_spec
+
+# (bits, signed) of the integer types codegen wraps to
+INTEGER_WIDTHS = {
+    'short': (16, True), 'int': (32, True), 'unsigned': (32, False),
+    'long': (64, True), 'unsigned long': (64, False), 'size_t': (64, False),
+}
+
+LIMIT_VALUES = {
+    'INT_MAX': 2**31 - 1, 'INT_MIN': -2**31, 'UINT_MAX': 2**32 - 1,
+    'LONG_MAX': 2**63 - 1, 'LONG_MIN': -2**63, 'SIZE_MAX': 2**64 - 1, 'EOF': -1,
+}
+
+# len() of anything Python can hold
+SIZE_RANGE = (0, sys.maxsize)
+
+SIZE_METHODS = {'size', 'length', 'count', 'capacity'}
+COMPARISONS = {'LESS', 'LESS_EQUAL', 'GREATER', 'GREATER_EQUAL', 'EQUAL', 'NOT_EQUAL'}
+MIRRORED = {'LESS': 'GREATER', 'LESS_EQUAL': 'GREATER_EQUAL', 'GREATER': 'LESS',
+            'GREATER_EQUAL': 'LESS_EQUAL', 'EQUAL': 'EQUAL', 'NOT_EQUAL': 'NOT_EQUAL'}
+NEGATED = {'LESS': 'GREATER_EQUAL', 'LESS_EQUAL': 'GREATER', 'GREATER': 'LESS_EQUAL',
+           'GREATER_EQUAL': 'LESS', 'EQUAL': 'NOT_EQUAL', 'NOT_EQUAL': 'EQUAL'}
+# ops whose result on a negative operand differs once it is converted to unsigned
+UNSIGNED_SENSITIVE = {'SLASH', 'PERCENT', 'SHIFT_RIGHT', 'BITWISE_AND', 'BITWISE_OR', 'BITWISE_XOR'}
+RING_OPS = {'PLUS', 'MINUS', 'STAR'}
+
+MARKS = ('overflow', 'truncate', 'narrow', 'convert', 'range')
+
+# loop iterations before every still-changing variable is given up on
+MAX_LOOP_PASSES = 20
+
+
+def type_range(ctype):
+    """(lo, hi) of an integer CppType; None for anything else (chars are strings at run time)."""
+    if ctype == BOOL:
+        return (0, 1)
+    if ctype.name not in INTEGER_WIDTHS:
+        return None
+    bits, signed = INTEGER_WIDTHS[ctype.name]
+    return (-(1 << bits - 1), (1 << bits - 1) - 1) if signed else (0, (1 << bits) - 1)
+
+
+def fits(interval, ctype):
+    bounds = type_range(ctype)
+    return interval is not None and bounds is not None and bounds[0] <= interval[0] and interval[1] <= bounds[1]
+
+
+def _hull(a, b):
+    if a is None or b is None:
+        return None
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+
+def _join(*envs):
+    """Merges environments at a control-flow join; None means unreachable."""
+    live = [env for env in envs if env is not None]
+    if not live:
+        return None
+    merged = dict(live[0])
+    for env in live[1:]:
+        for name in list(merged):
+            if name in env:
+                merged[name] = _hull(merged[name], env[name])
+            else:
+                del merged[name]
+    return merged
+
+
+def _literal_value(raw):
+    raw = raw.lower()
+    try:
+        if raw.startswith(('0x', '0b')):
+            return int(raw.rstrip('ul'), 0)
+        if '.' in raw or 'e' in raw or raw.endswith('f'):
+            return None
+        return int(raw.rstrip('ul'))
+    except ValueError:
+        return None
+
+
+def _bit_span(*bounds):
+    return max(abs(b).bit_length() for b in bounds)
+
+
+def _clear_marks(nodes):
+    for node in walk([n for n in nodes if n]):
+        for mark in MARKS:
+            node.pop(mark, None)
+
+
+def _is_increment(update, name):
+    """Whether `update` is `++name`, `name++` or `name += 1`."""
+    if not update:
+        return False
+    if update.get("type") == "UpdateExpr":
+        target = update["expr"]
+        return update["op"] == "INCREMENT" and target.get("type") == "Identifier" and target["name"] == name
+    return update.get("type") == "AssignExpr" and _bump(update, name) == (1, 1)
+
+
+def _bump(node, name):
+    """Interval `node` adds to `name` if it is `name++`, `name--` or `name = name +/- e`, else None."""
+    if node.get("type") == "UpdateExpr":
+        if node["expr"].get("type") != "Identifier":
+            return None
+        return (1, 1) if node["op"] == "INCREMENT" else (-1, -1)
+    left, right = node["left"], node["right"]
+    if (left.get("type") != "Identifier" or right.get("type") != "BinaryExpr"
+            or right["op"] not in ("PLUS", "MINUS") or node.get("narrow")):
+        return None
+    base, delta = right["left"], right["right"]
+    if base.get("type") != "Identifier" or base["name"] != name:
+        return None
+    if any(sub.get("type") == "Identifier" and sub["name"] == name for sub in walk([delta])):
+        return None
+    span = delta.get("range")
+    if span is None:
+        return None
+    return span if right["op"] == "PLUS" else (-span[1], -span[0])
+
+
+def _walk_loop_body(nodes):
+    """(node, inside a nested loop or lambda) for every node under `nodes`."""
+    stack = [(node, False) for node in nodes if node]
+    while stack:
+        node, nested = stack.pop()
+        yield node, nested
+        inner = nested or node.get("type") in LOOP_STATEMENTS or node.get("type") == "LambdaExpr"
+        stack.extend((child, inner) for child in iter_children(node) if isinstance(child, dict))
+
+
+class _Flow:
+    """Environments that leave a loop or switch through break/continue."""
+
+    def __init__(self, is_loop):
+        self.is_loop = is_loop
+        self.breaks = []
+        self.continues = []
+
+
+class RangeAnalyzer:
+    def __init__(self):
+        self.flows = []
+        self.tracked = {}
+        self.return_type = None
+        self.functions = {}
+
+    def analyze(self, nodes):
+        self.functions = top_level_functions(nodes)
+        self._top_level(nodes)
+        return nodes
+
+    def _top_level(self, nodes):
+        for node in nodes:
+            if not node:
+                continue
+            kind = node.get("type")
+            if kind == "FunctionDecl" and node.get("body") is not None:
+                self._function(node)
+            elif kind == "Namespace":
+                self._top_level(node.get("body", []))
+            elif kind in ("VarDecl", "MultiVarDecl"):
+                self.tracked = {}
+                self._stmt(node, {})
+
+    def _function(self, node):
+        body = node.get("body", [])
+        types = {}
+        for p in node.get("params", []):
+            if p.get("type") != "...":
+                types.setdefault(p["name"], set()).add(parse_type_spec(p.get("typeSpec")))
+        for decl in walk(body):
+            if decl.get("type") == "VarDecl" and not decl.get("arraySize"):
+                types.setdefault(decl["name"], set()).add(decl.get("ctype"))
+            elif decl.get("type") == "RangeForStmt":
+                types.setdefault(decl["varName"], set()).add(decl.get("ctype"))
+        escaped = set()
+        for sub in walk(body):
+            if sub.get("type") == "AddressOfExpr":
+                escaped.add(root_name(sub["expr"]))
+            elif sub.get("type") == "LambdaExpr":
+                escaped |= written_names(sub.get("body", []))
+        # one C++ type per flattened Python name, or it is not tracked
+        self.tracked = {name: next(iter(ts)) for name, ts in types.items()
+                        if len(ts) == 1 and name not in escaped and type_range(next(iter(ts)) or CppType('?'))}
+        self.return_type = parse_type_spec(node.get("returnSpec"))
+        env = {}
+        for p in node.get("params", []):
+            if p.get("name") in self.tracked:
+                env[p["name"]] = type_range(self.tracked[p["name"]])
+        self._block(body, env)
+        self.tracked = {}
+        self.return_type = None
+
+    # --- annotations -----------------------------------------------------
+
+    def _note(self, node, key, value=True):
+        if key == "range":
+            node[key] = value if key not in node else _hull(node[key], value)
+        else:
+            node[key] = value
+
+    def _convert(self, node, interval, ctype, key="narrow"):
+        """Value stored into `ctype`: wraps (and marks `node`) if it may not fit."""
+        bounds = type_range(ctype)
+        if bounds is None or ctype == BOOL:
+            return interval
+        if fits(interval, ctype):
+            return interval
+        self._note(node, key, ctype)
+        return bounds
+
+    def _stored(self, node, value, source, target):
+        """Interval after converting `source`'s value to `target` at `node`.
+
+        Floating values are truncated by codegen's int() and chars are left
+        alone, so neither is wrapped.
+        """
+        bounds = type_range(target) if target is not None else None
+        if bounds is None or target == BOOL:
+            return value
+        if value is None:
+            return bounds
+        source_type = source.get("ctype")
+        if source_type is not None and source_type.is_floating:
+            return bounds
+        return self._convert(node, value, target)
+
+    def _result(self, node, exact):
+        """Interval of arithmetic `node` given its exact value; marks overflow."""
+        ctype = node.get("ctype")
+        bounds = type_range(ctype) if ctype is not None else None
+        if bounds is None or ctype == BOOL:
+            return None
+        if exact is None or not fits(exact, ctype):
+            self._note(node, "overflow")
+            exact = bounds
+        self._note(node, "range", exact)
+        return exact
+
+    # --- statements ------------------------------------------------------
+
+    def _block(self, stmts, env):
+        for stmt in stmts or []:
+            if stmt is not None:
+                env = self._stmt(stmt, env)
+        return env
+
+    def _stmt(self, node, env):
+        """Environment after `node`; None once control cannot reach past it."""
+        if env is None:
+            env = {}  # unreachable code still gets translated; be conservative
+        handler = getattr(self, f"_stmt_{node.get('type')}", None)
+        if handler is None:
+            for child in iter_children(node):
+                self._expr(child, env)
+            return env
+        return handler(node, env)
+
+    def _stmt_VarDecl(self, node, env):
+        if node.get("arraySize"):
+            self._expr(node["arraySize"], env)
+            return env
+        value = (0, 0)
+        if node.get("init"):
+            value = self._stored(node, self._expr(node["init"], env), node["init"], node.get("ctype"))
+        if node["name"] in self.tracked:
+            env[node["name"]] = value if value is not None else type_range(self.tracked[node["name"]])
+        return env
+
+    def _stmt_MultiVarDecl(self, node, env):
+        for decl in node["decls"]:
+            env = self._stmt_VarDecl(decl, env)
+        return env
+
+    def _stmt_ExprStmt(self, node, env):
+        self._expr(node["expr"], env)
+        return env
+
+    def _stmt_ReturnStmt(self, node, env):
+        if node.get("expr"):
+            self._stored(node, self._expr(node["expr"], env), node["expr"], self.return_type)
+        return None
+
+    def _stmt_ThrowStmt(self, node, env):
+        if node.get("expr"):
+            self._expr(node["expr"], env)
+        return None
+
+    def _stmt_BreakContinueStmt(self, node, env):
+        if node["keyword"] == "break":
+            if self.flows:
+                self.flows[-1].breaks.append(env)
+        else:
+            loops = [flow for flow in self.flows if flow.is_loop]
+            if loops:
+                loops[-1].continues.append(env)
+        return None
+
+    def _stmt_BlockStmt(self, node, env):
+        return self._block(node.get("body"), env)
+
+    def _stmt_IfStmt(self, node, env):
+        if node.get("init"):
+            env = self._stmt(node["init"], env)
+        self._expr(node["condition"], env)
+        then_env = self._block(node.get("then"), self._refine(env, node["condition"], True))
+        else_env = self._block(node.get("else"), self._refine(env, node["condition"], False))
+        return _join(then_env, else_env)
+
+    def _stmt_WhileStmt(self, node, env):
+        return self._loop(env, node.get("condition"), node.get("body"))
+
+    def _stmt_DoWhileStmt(self, node, env):
+        return self._loop(env, node.get("condition"), node.get("body"), test_first=False)
+
+    def _stmt_ForStmt(self, node, env):
+        init = node.get("init")
+        if init:
+            if init.get("type") in ("VarDecl", "MultiVarDecl", "ExprStmt"):
+                env = self._stmt(init, env)
+            else:
+                self._expr(init, env)
+        return self._loop(env, node.get("condition"), node.get("body"), update=node.get("update"))
+
+    def _stmt_RangeForStmt(self, node, env):
+        self._expr(node["iterable"], env)
+        name = node["varName"]
+
+        def bind(head):
+            head = dict(head)
+            if name in self.tracked:
+                head[name] = type_range(self.tracked[name])
+            return head
+
+        return self._loop(env, None, node.get("body"), enter=bind, may_skip=True)
+
+    def _stmt_SwitchStmt(self, node, env):
+        self._expr(node["expr"], env)
+        flow = _Flow(is_loop=False)
+        self.flows.append(flow)
+        falling = None
+        has_default = False
+        for case in node.get("cases", []):
+            if case.get("value") is None:
+                has_default = True
+            else:
+                self._expr(case["value"], dict(env))
+            falling = self._block(case.get("body"), _join(dict(env), falling))
+        self.flows.pop()
+        return _join(falling, *flow.breaks, None if has_default else env)
+
+    def _stmt_TryStmt(self, node, env):
+        written = written_names(node.get("body", []))
+        body_env = self._block(node.get("body"), dict(env))
+        outs = [body_env]
+        for catch in node.get("catches", []):
+            catch_env = {name: value for name, value in env.items() if name not in written}
+            outs.append(self._block(catch.get("body"), catch_env))
+        return _join(*outs)
+
+    def _stmt_FunctionDecl(self, node, env):
+        return env
+
+    def _loop(self, env, condition, body, update=None, test_first=True, enter=None, may_skip=False):
+        """Iterates the loop to a fixpoint, widening bounds that keep moving."""
+        head = dict(env)
+        for iteration in range(MAX_LOOP_PASSES + 1):
+            if iteration == MAX_LOOP_PASSES:
+                written = written_names(body or []) | written_names([update] if update else [])
+                head = {name: value for name, value in head.items() if name not in written}
+            flow, back, cond_env = self._loop_pass(head, condition, body, update, test_first, enter)
+            new_head = _join(env, back)
+            if iteration:
+                new_head = self._widen(head, new_head)
+            if new_head == head or iteration == MAX_LOOP_PASSES:
+                break
+            head = new_head
+        if test_first and update is not None:
+            bounded = self._counted(env, head, condition, body, update)
+            if bounded is not None:
+                flow, back, cond_env = bounded
+        exits = list(flow.breaks)
+        if condition is not None and cond_env is not None:
+            exits.append(self._refine(cond_env, condition, False))
+        if may_skip:
+            exits += [head, back]
+        return _join(*exits)
+
+    def _loop_pass(self, head, condition, body, update, test_first, enter):
+        """One trip around the loop from `head`: (flow, back edge env, env the exit test sees)."""
+        flow = _Flow(is_loop=True)
+        self.flows.append(flow)
+        body_in = enter(head) if enter else dict(head)
+        cond_env = None
+        if test_first and condition is not None:
+            self._expr(condition, body_in)
+            cond_env = body_in
+            body_in = self._refine(body_in, condition, True)
+        out = self._block(body, body_in)
+        back = _join(out, *flow.continues)
+        self.flows.pop()
+        if back is not None and update is not None:
+            self._expr(update, back)
+        if not test_first and condition is not None and back is not None:
+            self._expr(condition, back)
+            cond_env = back
+            back = self._refine(back, condition, True)
+        return flow, back, cond_env
+
+    # --- counted loops ---------------------------------------------------
+
+    def _counted(self, env, head, condition, body, update):
+        """Re-runs a counted `for` with its accumulators bounded by the trip count.
+
+        Widening sends `s += e` to the type's limits, so every such sum would
+        be wrapped. When the loop runs at most `trips` times and `s` changes
+        only by `e` each time, `s` stays within `s0 + trips * e`; if that fits
+        the type the loop is analyzed once more from that head. The marks of
+        the widened passes are dropped first and restored if the bounds do
+        not hold up.
+        """
+        trips = self._trip_count(env, condition, body, update)
+        if trips is None:
+            return None
+        nodes = [condition, update] + list(body or [])
+        steps = self._accumulator_steps(body, env, head)
+        bounds = self._accumulated(env, steps, trips)
+        if not bounds:
+            return None
+        guess = dict(head)
+        guess.update(bounds)
+        _clear_marks(nodes)
+        result = self._loop_pass(guess, condition, body, update, True, None)
+        back = result[1]
+        rechecked = self._accumulated(env, self._accumulator_steps(body, env, guess), trips)
+        joined = _join(env, back) or {}
+        stable = back is None or all(
+            name in bounds or (name in joined and _hull(guess[name], joined[name]) == guess[name])
+            for name in head)
+        if stable and all(name in rechecked and _hull(rechecked[name], bounds[name]) == bounds[name]
+                          for name in bounds):
+            return result
+        _clear_marks(nodes)
+        self._loop_pass(head, condition, body, update, True, None)
+        return None
+
+    def _trip_count(self, env, condition, body, update):
+        """Most times the body of `for (...; i < n; ++i)` can run, or None."""
+        if condition is None or condition.get("type") != "BinaryExpr":
+            return None
+        op, left, right = condition["op"], condition["left"], condition["right"]
+        if op in ("GREATER", "GREATER_EQUAL"):
+            op, left, right = MIRRORED[op], right, left
+        if op not in ("LESS", "LESS_EQUAL", "NOT_EQUAL") or left.get("type") != "Identifier":
+            return None
+        name = left["name"]
+        if name not in env or name not in self.tracked or not _is_increment(update, name):
+            return None
+        written = written_names(body or [])
+        if name in written or right.get("type") not in ("NumberLiteral", "Identifier"):
+            return None
+        if right.get("type") == "Identifier" and (right["name"] in written or right["name"] == name):
+            return None
+        limit = self._peek(right, env)
+        if limit is None:
+            return None
+        start = env[name]
+        if op == "NOT_EQUAL" and start[1] > limit[0]:
+            return None  # might start past the limit and never meet it
+        trips = limit[1] - start[0] + (op == "LESS_EQUAL")
+        return max(trips, 0)
+
+    def _accumulator_steps(self, body, env, head):
+        """{name: (lo, hi)} change per trip of each variable only ever bumped by `+=`/`-=`."""
+        steps = {}
+        excluded = set()
+        for node, nested in _walk_loop_body(body or []):
+            kind = node.get("type")
+            if kind in ("AssignExpr", "UpdateExpr"):
+                target = node["left"] if kind == "AssignExpr" else node["expr"]
+                name = root_name(target)
+                if name is None:
+                    continue
+                delta = None if nested else _bump(node, name)
+                if delta is None:
+                    excluded.add(name)
+                    continue
+                lo, hi = steps.get(name, (0, 0))
+                steps[name] = (lo + min(delta[0], 0), hi + max(delta[1], 0))
+        excluded |= written_names(body or []) - set(steps)
+        declared = {node["name"] for node, _ in _walk_loop_body(body or []) if node.get("type") == "VarDecl"}
+        return {name: step for name, step in steps.items()
+                if name not in excluded and name not in declared and name in env and name in head
+                and name in self.tracked}
+
+    def _accumulated(self, env, steps, trips):
+        bounds = {}
+        for name, (lo, hi) in steps.items():
+            bound = (env[name][0] + trips * lo, env[name][1] + trips * hi)
+            if fits(bound, self.tracked[name]):
+                bounds[name] = bound
+        return bounds
+
+    def _widen(self, old, new):
+        widened = {}
+        for name, value in new.items():
+            if name not in old:
+                continue
+            lo, hi = value
+            bounds = type_range(self.tracked[name])
+            if lo < old[name][0]:
+                lo = bounds[0]
+            if hi > old[name][1]:
+                hi = bounds[1]
+            widened[name] = (lo, hi)
+        return widened
+
+    # --- conditions ------------------------------------------------------
+
+    def _refine(self, env, cond, truth):
+        """Copy of `env` narrowed by knowing `cond` evaluated to `truth`."""
+        if env is None:
+            return None
+        env = dict(env)
+        kind = cond.get("type")
+        if kind == "UnaryExpr" and cond["op"] == "LOGICAL_NOT":
+            return self._refine(env, cond["expr"], not truth)
+        if kind == "BinaryExpr" and cond["op"] in ("AND", "OR"):
+            if truth == (cond["op"] == "AND"):
+                return self._refine(self._refine(env, cond["left"], truth), cond["right"], truth)
+            return _join(self._refine(env, cond["left"], truth),
+                         self._refine(self._refine(env, cond["left"], not truth), cond["right"], truth))
+        if kind == "Identifier" and cond["name"] in env and not truth:
+            return self._narrow(env, cond["name"], (0, 0))
+        if kind != "BinaryExpr" or cond["op"] not in COMPARISONS:
+            return env
+        op = cond["op"] if truth else NEGATED[cond["op"]]
+        left, right = cond["left"], cond["right"]
+        for var, other, rel in ((left, right, op), (right, left, MIRRORED[op])):
+            if env is not None and var.get("type") == "Identifier" and var["name"] in env:
+                bound = self._peek(other, env)
+                if bound is not None:
+                    env = self._narrow(env, var["name"], self._bound(rel, bound))
+        return env
+
+    def _bound(self, rel, other):
+        """Interval `x` must lie in for `x rel other` to hold."""
+        lo, hi = other
+        unbounded = float('inf')
+        return {
+            'LESS': (-unbounded, hi - 1), 'LESS_EQUAL': (-unbounded, hi),
+            'GREATER': (lo + 1, unbounded), 'GREATER_EQUAL': (lo, unbounded),
+            'EQUAL': (lo, hi), 'NOT_EQUAL': (-unbounded, unbounded),
+        }[rel]
+
+    def _narrow(self, env, name, bound):
+        if env is None:
+            return None
+        lo, hi = env[name]
+        lo, hi = max(lo, bound[0]), min(hi, bound[1])
+        if lo > hi:
+            return None  # this branch cannot be taken
+        env[name] = (int(lo), int(hi))
+        return env
+
+    def _peek(self, expr, env):
+        """Interval of a side-effect-free operand, without evaluating it again."""
+        kind = expr.get("type")
+        if kind == "NumberLiteral":
+            value = _literal_value(expr["value"])
+            return None if value is None else (value, value)
+        if kind == "Identifier":
+            if expr["name"] in env:
+                return env[expr["name"]]
+            if expr["name"] in LIMIT_VALUES:
+                return (LIMIT_VALUES[expr["name"]],) * 2
+        return expr.get("range")
+
+    # --- expressions -----------------------------------------------------
+
+    def _expr(self, node, env):
+        """Interval of `node`'s value (None if not an integer); applies its writes to `env`."""
+        if not isinstance(node, dict):
+            return None
+        handler = getattr(self, f"_expr_{node.get('type')}", None)
+        if handler is None:
+            if node.get("type") != "LambdaExpr":
+                for child in iter_children(node):
+                    self._expr(child, env)
+            return self._typed(node)
+        value = handler(node, env)
+        if value is not None:
+            self._note(node, "range", value)
+        return value
+
+    def _typed(self, node):
+        """Whatever the node's integer type allows."""
+        ctype = node.get("ctype")
+        return type_range(ctype) if ctype is not None else None
+
+    def _forget(self, env, expr):
+        name = root_name(expr)
+        env.pop(name, None)
+
+    def _expr_NumberLiteral(self, node, env):
+        value = _literal_value(node["value"])
+        return None if value is None else (value, value)
+
+    def _expr_Identifier(self, node, env):
+        name = node["name"]
+        if name == "true":
+            return (1, 1)
+        if name == "false":
+            return (0, 0)
+        if name in self.tracked and name in env:
+            return env[name]
+        if name in LIMIT_VALUES and name not in self.tracked:
+            return (LIMIT_VALUES[name],) * 2
+        return self._typed(node)
+
+    def _expr_BinaryExpr(self, node, env):
+        op = node["op"]
+        if op == "SHIFT_RIGHT":
+            targets = cin_targets(node)
+            if targets is not None:
+                for target in targets:
+                    self._expr(target, env)
+                    self._forget(env, target)
+                return None
+        if op in ("AND", "OR"):
+            self._expr(node["left"], env)
+            right_env = self._refine(env, node["left"], op == "AND")
+            skipped = self._refine(env, node["left"], op != "AND")
+            if right_env is not None:
+                self._expr(node["right"], right_env)
+            merged = _join(skipped, right_env)
+            env.clear()
+            env.update(merged or {})
+            return (0, 1)
+        left = self._expr(node["left"], env)
+        right = self._expr(node["right"], env)
+        if op in COMPARISONS:
+            return (0, 1)
+        ctype = node.get("ctype")
+        if ctype is None or type_range(ctype) is None or ctype == BOOL:
+            return None
+        if left is None or right is None:
+            return None  # chars are strings at run time; nothing to wrap
+        if not INTEGER_WIDTHS[ctype.name][1] and op in UNSIGNED_SENSITIVE:
+            left = self._convert(node["left"], left, ctype, "convert")
+            right = self._convert(node["right"], right, ctype, "convert")
+        if op in RING_OPS and self._defer_wrap(node, ctype):
+            return self._result(node, None)
+        return self._result(node, self._arith(node, op, left, right))
+
+    def _defer_wrap(self, node, ctype):
+        """Moves overflow wraps of ring-op operands up to `node`.
+
+        Reducing modulo 2**n commutes with + - *, so `x * a + b` needs one
+        wrap at the top rather than one per operator.
+        """
+        deferred = False
+        for side in (node["left"], node["right"]):
+            if (side.get("type") == "BinaryExpr" and side["op"] in RING_OPS
+                    and side.get("overflow") and side.get("ctype") == ctype):
+                del side["overflow"]
+                deferred = True
+        return deferred
+
+    def _arith(self, node, op, a, b):
+        """Exact interval of `a op b`; None when it cannot be bounded."""
+        (a0, a1), (b0, b1) = a, b
+        if op == "PLUS":
+            return (a0 + b0, a1 + b1)
+        if op == "MINUS":
+            return (a0 - b1, a1 - b0)
+        if op == "STAR":
+            products = (a0 * b0, a0 * b1, a1 * b0, a1 * b1)
+            return (min(products), max(products))
+        if op in ("SLASH", "PERCENT"):
+            same_sign = (a0 >= 0 and b0 >= 0) or (a1 <= 0 and b1 <= 0)
+            if not same_sign:
+                self._note(node, "truncate")
+            magnitude = max(abs(a0), abs(a1))
+            if op == "SLASH":
+                lo = 0 if same_sign else -magnitude
+                return (lo, magnitude)
+            divisor = max(abs(b0), abs(b1)) - 1
+            reach = min(magnitude, max(divisor, 0))
+            return (0 if a0 >= 0 else -reach, 0 if a1 <= 0 else reach)
+        if op == "SHIFT_LEFT":
+            if b0 < 0 or b1 >= 64:
+                return None
+            ends = (a0 << b0, a0 << b1, a1 << b0, a1 << b1)
+            return (min(ends), max(ends))
+        if op == "SHIFT_RIGHT":
+            if b0 < 0:
+                return None
+            b1 = min(b1, 64)
+            ends = (a0 >> b0, a0 >> b1, a1 >> b0, a1 >> b1)
+            return (min(ends), max(ends))
+        if op in ("BITWISE_AND", "BITWISE_OR", "BITWISE_XOR"):
+            span = _bit_span(a0, a1, b0, b1)
+            if a0 >= 0 and b0 >= 0:
+                return (0, min(a1, b1) if op == "BITWISE_AND" else (1 << span) - 1)
+            if op == "BITWISE_AND" and (a0 >= 0 or b0 >= 0):
+                return (0, a1 if a0 >= 0 else b1)
+            return (-(1 << span), (1 << span) - 1)
+        return None
+
+    def _expr_UnaryExpr(self, node, env):
+        value = self._expr(node["expr"], env)
+        op = node["op"]
+        if op == "LOGICAL_NOT":
+            return (0, 1)
+        ctype = node.get("ctype")
+        if ctype is None or type_range(ctype) is None or ctype == BOOL or value is None:
+            return None
+        if op == "MINUS":
+            return self._result(node, (-value[1], -value[0]))
+        if op == "PLUS":
+            return self._result(node, value)
+        if op == "BITWISE_NOT":
+            bits, signed = INTEGER_WIDTHS[ctype.name]
+            if not signed:
+                # codegen emits x ^ mask, which stays in range
+                return self._result(node, type_range(ctype))
+            return self._result(node, (~value[1], ~value[0]))
+        return None
+
+    def _expr_UpdateExpr(self, node, env):
+        target = node["expr"]
+        old = self._expr(target, env)
+        ctype = target.get("ctype")
+        if ctype is None or type_range(ctype) is None or ctype == BOOL:
+            return None
+        step = 1 if node["op"] == "INCREMENT" else -1
+        if old is None:
+            return None
+        exact = (old[0] + step, old[1] + step)
+        if not fits(exact, ctype):
+            self._note(node, "overflow")
+            exact = type_range(ctype)
+        if target.get("type") == "Identifier" and target["name"] in self.tracked:
+            env[target["name"]] = exact
+        else:
+            self._forget(env, target)
+        return exact if node.get("prefix") else old
+
+    def _expr_AssignExpr(self, node, env):
+        left = node["left"]
+        if left.get("type") != "Identifier":
+            for child in iter_children(left):
+                self._expr(child, env)
+        value = self._stored(node, self._expr(node["right"], env), node["right"], left.get("ctype"))
+        if left.get("type") == "Identifier" and left["name"] in self.tracked:
+            if value is None:
+                value = type_range(self.tracked[left["name"]])
+            env[left["name"]] = value
+        else:
+            self._forget(env, left)
+        return value
+
+    def _expr_TernaryExpr(self, node, env):
+        self._expr(node["condition"], env)
+        then_env = self._refine(env, node["condition"], True)
+        else_env = self._refine(env, node["condition"], False)
+        then_value = self._expr(node["then"], then_env) if then_env is not None else None
+        else_value = self._expr(node["else"], else_env) if else_env is not None else None
+        merged = _join(then_env, else_env)
+        env.clear()
+        env.update(merged or {})
+        if then_env is None:
+            return else_value
+        if else_env is None:
+            return then_value
+        return _hull(then_value, else_value)
+
+    def _expr_CastExpr(self, node, env):
+        value = self._expr(node["expr"], env)
+        return self._stored(node, value, node["expr"], node.get("ctype"))
+
+    def _expr_CallExpr(self, node, env):
+        args = [self._expr(arg, env) for arg in node.get("args", [])]
+        callee = node["callee"]
+        if callee not in PURE_FUNCTIONS:
+            params = self.functions[callee].get("params", []) if callee in self.functions else None
+            for index, arg in enumerate(node.get("args", [])):
+                # tracked locals never escape, so only a reference parameter can write them
+                if params is None or index >= len(params) or params[index].get("ref"):
+                    self._forget(env, arg)
+        if callee == "abs" and len(args) == 1 and args[0] is not None:
+            lo, hi = args[0]
+            top = max(abs(lo), abs(hi))
+            return (0 if lo <= 0 <= hi else min(abs(lo), abs(hi)), top)
+        if callee in ("max", "min") and args and all(a is not None for a in args):
+            pick = max if callee == "max" else min
+            return (pick(a[0] for a in args), pick(a[1] for a in args))
+        return self._typed(node)
+
+    def _expr_MethodCall(self, node, env):
+        self._expr(node["object"], env)
+        for arg in node.get("args", []):
+            self._expr(arg, env)
+        if node["method"] == "swap":
+            for arg in node.get("args", []):
+                self._forget(env, arg)
+            self._forget(env, node["object"])
+        if node["method"] in SIZE_METHODS:
+            return SIZE_RANGE
+        return self._typed(node)
+
+    def _expr_AddressOfExpr(self, node, env):
+        self._expr(node["expr"], env)
+        self._forget(env, node["expr"])
+        return None
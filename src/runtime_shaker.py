@@ -0,0 +1,112 @@
+import ast
+import copy
+import functools
+
+import cpp_runtime
+
+
+@functools.lru_cache(maxsize=None)
+def _runtime_graph():
+    """Parses cpp_runtime once and indexes its top-level statements.
+
+    Returns a list of ``(stmt, defines, uses)`` tuples in source order, where
+    ``defines`` are the module-level names the statement binds and ``uses``
+    are all names it mentions (including inside nested function bodies).
+    """
+    with open(cpp_runtime.__file__, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=cpp_runtime.__file__)
+
+    graph = []
+    for stmt in tree.body:
+        defines = _defined_names(stmt)
+        if not defines:
+            continue
+        graph.append((stmt, defines, frozenset(_used_names(stmt))))
+    return graph
+
+
+def _defined_names(stmt):
+    if isinstance(stmt, (ast.FunctionDef, ast.ClassDef)):
+        return frozenset([stmt.name])
+    if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+        return frozenset((a.asname or a.name).split(".")[0] for a in stmt.names)
+    if isinstance(stmt, ast.Assign):
+        names = set()
+        for target in stmt.targets:
+            # `std.cout = cout` belongs to whoever needs `std`
+            while isinstance(target, (ast.Attribute, ast.Subscript)):
+                target = target.value
+            if isinstance(target, ast.Name) and target.id != "__all__":
+                names.add(target.id)
+        return frozenset(names)
+    return frozenset()
+
+
+def _used_names(node):
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            yield child.id
+        elif isinstance(child, ast.Global):
+            yield from child.names
+
+
+def runtime_names():
+    """All names the runtime library can provide."""
+    names = set()
+    for _, defines, _ in _runtime_graph():
+        names |= defines
+    return names
+
+
+def stable_runtime_names():
+    """Runtime names that are never rebound after import.
+
+    Anything the runtime reassigns through a `global` statement (such as the
+    cin token buffer) is excluded, so the rest can safely be captured by value.
+    """
+    rebound = set()
+    for stmt, _, _ in _runtime_graph():
+        for child in ast.walk(stmt):
+            if isinstance(child, ast.Global):
+                rebound.update(child.names)
+    return runtime_names() - rebound
+
+
+def required_runtime_names(module: ast.Module):
+    """Transitive set of runtime names that `module` references."""
+    graph = _runtime_graph()
+    providers = {}
+    for stmt, defines, uses in graph:
+        for name in defines:
+            providers.setdefault(name, []).append(uses)
+
+    needed = set()
+    pending = [n for n in set(_used_names(module)) if n in providers]
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        for uses in providers[name]:
+            pending.extend(n for n in uses if n in providers and n not in needed)
+    return needed
+
+
+def shake_runtime(module: ast.Module):
+    """Returns copies of only the runtime statements `module` depends on.
+
+    Imports are trimmed down to the aliases that are actually needed, so a
+    program that never touches `itertools` or `OrderedDict` does not import
+    them.
+    """
+    needed = required_runtime_names(module)
+    prelude = []
+    for stmt, defines, _ in _runtime_graph():
+        if not defines & needed:
+            continue
+        stmt = copy.deepcopy(stmt)
+        if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+            stmt.names = [a for a in stmt.names
+                          if (a.asname or a.name).split(".")[0] in needed]
+        prelude.append(stmt)
+    return prelude
@@ -1,3 +1,5 @@
+import re
+
 from tokens import TokenType, Token
 
 # ------------------------------
@@ -74,6 +76,17 @@ class SymbolTable:
                 return scope[name]
         raise TypeError(f"Undeclared variable '{name}'.")
 
+    def bind(self, name, type_):
+        """Like declare(), but silently shadows an earlier binding in the same scope."""
+        self.scopes[-1][name] = type_
+
+    def resolve(self, name, default=None):
+        """Like lookup(), but returns `default` for undeclared names."""
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return default
+
 
 # ------------------------------
 # Type Checker
@@ -201,3 +214,490 @@ class TypeChecker:
 
 
 
+
+
+# ------------------------------
+# Types for the parser's dict AST
+# ------------------------------
+
+INTEGER_RANKS = {'bool': 0, 'char': 1, 'short': 2, 'int': 3, 'unsigned': 3,
+                 'long': 4, 'unsigned long': 4, 'size_t': 4}
+FLOAT_NAMES = {'float', 'double'}
+SEQUENCE_NAMES = {'vector', 'array', 'deque', 'list', 'forward_list', 'valarray'}
+SET_NAMES = {'set', 'unordered_set', 'multiset', 'unordered_multiset'}
+MAP_NAMES = {'map', 'unordered_map', 'multimap', 'unordered_multimap'}
+ADAPTER_NAMES = {'stack', 'queue', 'priority_queue'}
+ORDERED_NAMES = {'map', 'multimap', 'set', 'multiset'}
+# methods of an ordered container that return an iterator into it
+ITERATOR_METHODS = {'begin', 'end', 'cbegin', 'cend', 'rbegin', 'rend', 'find', 'lower_bound', 'upper_bound'}
+STREAM_NAMES = {'ostream', 'istream'}
+
+
+class CppType:
+    """A C++ type as seen by codegen: a base name plus template arguments."""
+
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name: str, args: tuple = ()):
+        self.name = name
+        self.args = tuple(args)
+
+    def __eq__(self, other):
+        return isinstance(other, CppType) and (self.name, self.args) == (other.name, other.args)
+
+    def __hash__(self):
+        return hash((self.name, self.args))
+
+    def __repr__(self):
+        if not self.args:
+            return self.name
+        return f"{self.name}<{', '.join(map(repr, self.args))}>"
+
+    @property
+    def is_integral(self):
+        return self.name in INTEGER_RANKS
+
+    @property
+    def is_floating(self):
+        return self.name in FLOAT_NAMES
+
+    @property
+    def is_arithmetic(self):
+        return self.is_integral or self.is_floating
+
+    @property
+    def is_unsigned(self):
+        return self.name in ('unsigned', 'unsigned long', 'size_t')
+
+    @property
+    def is_known(self):
+        return self.name != 'unknown'
+
+    @property
+    def is_ordered(self):
+        return self.name in ORDERED_NAMES
+
+    @property
+    def container_kind(self):
+        """'sequence', 'set', 'map', 'string' or an adapter name; None otherwise."""
+        if self.name in SEQUENCE_NAMES:
+            return 'sequence'
+        if self.name in SET_NAMES:
+            return 'set'
+        if self.name in MAP_NAMES:
+            return 'map'
+        if self.name == 'string' or self.name in ADAPTER_NAMES:
+            return self.name
+        return None
+
+    def element(self):
+        """Type produced by indexing or iterating this type."""
+        if self.name == 'string':
+            return CHAR
+        if self.name == 'iterator':
+            return self.args[0].element()
+        if self.name in MAP_NAMES:
+            # iteration yields pairs; indexing is handled by mapped()
+            return CppType('pair', self.args[:2]) if len(self.args) >= 2 else UNKNOWN
+        if self.args and (self.container_kind or self.name == 'pointer'):
+            return self.args[0]
+        return UNKNOWN
+
+    def mapped(self):
+        if self.name in MAP_NAMES and len(self.args) >= 2:
+            return self.args[1]
+        return self.element()
+
+
+UNKNOWN = CppType('unknown')
+VOID = CppType('void')
+BOOL = CppType('bool')
+CHAR = CppType('char')
+INT = CppType('int')
+LONG = CppType('long')
+SIZE_T = CppType('size_t')
+DOUBLE = CppType('double')
+STRING = CppType('string')
+
+
+def parse_type_spec(spec) -> CppType:
+    """Turns a parser type spelling such as `unsigned long long`,
+    `vector<pair<int, int>>` or `int*` into a CppType."""
+    if not spec:
+        return UNKNOWN
+    tokens = re.findall(r'[A-Za-z_][A-Za-z0-9_]*|[<>,*\[\]]', spec)
+    pos = 0
+
+    def parse():
+        nonlocal pos
+        words = []
+        while pos < len(tokens) and tokens[pos] not in '<>,*[]':
+            if tokens[pos] not in ('std', 'const', 'volatile', 'struct'):
+                words.append(tokens[pos])
+            pos += 1
+        args = []
+        if pos < len(tokens) and tokens[pos] == '<':
+            pos += 1
+            while pos < len(tokens) and tokens[pos] != '>':
+                args.append(parse())
+                if pos < len(tokens) and tokens[pos] == ',':
+                    pos += 1
+            pos += 1
+        result = CppType(_canonical_name(words), args)
+        while pos < len(tokens) and tokens[pos] in ('*', '['):
+            pos += 2 if tokens[pos] == '[' else 1
+            result = CppType('pointer', (result,))
+        return result
+
+    return parse()
+
+
+def _canonical_name(words):
+    if not words:
+        return 'unknown'
+    unsigned = 'unsigned' in words
+    rest = [w for w in words if w not in ('signed', 'unsigned')]
+    if 'double' in rest or 'float' in rest:
+        return 'double'
+    if 'char' in rest:
+        return 'char'
+    if 'bool' in rest:
+        return 'bool'
+    if 'long' in rest:
+        return 'unsigned long' if unsigned else 'long'
+    if 'short' in rest:
+        return 'short'
+    if not rest or rest == ['int']:
+        return 'unsigned' if unsigned else 'int'
+    if rest[0] in ('size_t', 'uint64_t', 'uint32_t', 'int64_t', 'int32_t'):
+        return {'size_t': 'size_t', 'uint64_t': 'unsigned long', 'uint32_t': 'unsigned',
+                'int64_t': 'long', 'int32_t': 'int'}[rest[0]]
+    return rest[0]
+
+
+def common_type(a: CppType, b: CppType) -> CppType:
+    """Result type of a binary arithmetic expression (usual arithmetic conversions)."""
+    if a.is_floating or b.is_floating:
+        return DOUBLE if a.is_arithmetic and b.is_arithmetic else UNKNOWN
+    if not (a.is_integral and b.is_integral):
+        return UNKNOWN
+    rank = max(INTEGER_RANKS[a.name], INTEGER_RANKS[b.name], INTEGER_RANKS['int'])
+    if rank == INTEGER_RANKS['int']:
+        return CppType('unsigned') if 'unsigned' in (a.name, b.name) else INT
+    if a.is_unsigned and INTEGER_RANKS[a.name] == rank or b.is_unsigned and INTEGER_RANKS[b.name] == rank:
+        return CppType('unsigned long')
+    return LONG
+
+
+MATH_FUNCTIONS = {'sqrt', 'pow', 'floor', 'ceil', 'log', 'log2', 'log10', 'exp', 'sin',
+                  'cos', 'tan', 'asin', 'acos', 'atan', 'atan2', 'fabs', 'stof', 'stod', 'atof'}
+INT_FUNCTIONS = {'stoi': INT, 'atoi': INT, 'stol': LONG, 'stoll': LONG, 'gcd': LONG, 'lcm': LONG}
+LIMIT_TYPES = {'INT_MAX': INT, 'INT_MIN': INT, 'LONG_MAX': LONG, 'LONG_MIN': LONG,
+               'UINT_MAX': CppType('unsigned'), 'SIZE_MAX': SIZE_T}
+
+
+class TypeInferencer:
+    """Infers C++ types over the parser's dict AST.
+
+    Every declaration and expression node gets a ``"ctype"`` entry holding a
+    CppType (UNKNOWN when nothing better can be said). Scoping follows C++
+    blocks; `auto` takes the type of its initializer and range-for variables
+    take the element type of what they iterate.
+    """
+
+    def __init__(self):
+        self.symbols = SymbolTable()
+        self.functions = {}
+
+    def infer(self, nodes):
+        for node in nodes:
+            if node and node.get("type") == "FunctionDecl":
+                self.functions[node["name"]] = parse_type_spec(node.get("returnSpec"))
+        self._block(nodes, new_scope=False)
+        return nodes
+
+    # -- statements -------------------------------------------------------
+
+    def _block(self, stmts, new_scope=True):
+        if new_scope:
+            self.symbols.enter_scope()
+        for stmt in stmts or []:
+            if stmt is not None:
+                self._stmt(stmt)
+        if new_scope:
+            self.symbols.exit_scope()
+
+    def _stmt(self, node):
+        kind = node.get("type")
+        if kind == "FunctionDecl":
+            self.symbols.enter_scope()
+            for p in node.get("params", []):
+                if p.get("type") == "...":
+                    continue
+                if p.get("default"):
+                    self._expr(p["default"])
+                self.symbols.bind(p["name"], parse_type_spec(p.get("typeSpec")))
+            self._block(node.get("body", []), new_scope=False)
+            self.symbols.exit_scope()
+        elif kind == "VarDecl":
+            self._var_decl(node)
+        elif kind == "MultiVarDecl":
+            for decl in node["decls"]:
+                self._var_decl(decl)
+        elif kind in ("ExprStmt", "ReturnStmt", "ThrowStmt"):
+            if node.get("expr"):
+                self._expr(node["expr"])
+        elif kind == "IfStmt":
+            self.symbols.enter_scope()
+            if node.get("init"):
+                self._stmt(node["init"])
+            self._expr(node["condition"])
+            self._block(node.get("then"))
+            self._block(node.get("else"))
+            self.symbols.exit_scope()
+        elif kind in ("WhileStmt", "DoWhileStmt"):
+            self._expr(node["condition"])
+            self._block(node.get("body"))
+        elif kind == "ForStmt":
+            self.symbols.enter_scope()
+            init = node.get("init")
+            if init and init.get("type") in ("VarDecl", "MultiVarDecl"):
+                self._stmt(init)
+            elif init:
+                self._expr(init)
+            for key in ("condition", "update"):
+                if node.get(key):
+                    self._expr(node[key])
+            self._block(node.get("body"))
+            self.symbols.exit_scope()
+        elif kind == "RangeForStmt":
+            iterable = self._expr(node["iterable"])
+            declared = parse_type_spec(node.get("typeSpec"))
+            var_type = iterable.element() if declared.name == 'auto' else declared
+            node["ctype"] = var_type
+            self.symbols.enter_scope()
+            self.symbols.bind(node["varName"], var_type)
+            self._block(node.get("body"), new_scope=False)
+            self.symbols.exit_scope()
+        elif kind == "BlockStmt":
+            self._block(node.get("body"))
+        elif kind == "SwitchStmt":
+            self._expr(node["expr"])
+            self.symbols.enter_scope()
+            for case in node.get("cases", []):
+                if case.get("value"):
+                    self._expr(case["value"])
+                self._block(case.get("body"), new_scope=False)
+            self.symbols.exit_scope()
+        elif kind == "TryStmt":
+            self._block(node.get("body"))
+            for catch in node.get("catches", []):
+                self.symbols.enter_scope()
+                self.symbols.bind(catch["name"], UNKNOWN)
+                self._block(catch.get("body"), new_scope=False)
+                self.symbols.exit_scope()
+        elif kind == "Namespace":
+            self._block(node.get("body"), new_scope=False)
+        elif kind == "EnumDecl":
+            for e in node.get("enumerators", []):
+                self.symbols.bind(e["name"], INT)
+
+    def _var_decl(self, node):
+        declared = parse_type_spec(node.get("typeSpec") or node.get("varType"))
+        init_type = self._expr(node["init"]) if node.get("init") else UNKNOWN
+        if node.get("arraySize"):
+            self._expr(node["arraySize"])
+            declared = CppType('array', (declared,))
+        elif declared.name == 'auto':
+            declared = init_type
+        node["ctype"] = declared
+        self.symbols.bind(node["name"], declared)
+
+    # -- expressions ------------------------------------------------------
+
+    def _expr(self, node) -> CppType:
+        if not isinstance(node, dict):
+            return UNKNOWN
+        handler = getattr(self, f"_expr_{node.get('type')}", None)
+        result = handler(node) if handler else UNKNOWN
+        node["ctype"] = result
+        return result
+
+    def _expr_NumberLiteral(self, node):
+        raw = node["value"].lower()
+        if raw.startswith(('0x', '0b')):
+            return LONG if 'l' in raw else INT
+        if '.' in raw or 'e' in raw or raw.endswith('f'):
+            return DOUBLE
+        if 'u' in raw:
+            return CppType('unsigned long') if 'l' in raw else CppType('unsigned')
+        if 'l' in raw or abs(int(raw)) > 2147483647:
+            return LONG
+        return INT
+
+    def _expr_StringLiteral(self, node):
+        return STRING
+
+    def _expr_CharLiteral(self, node):
+        return CHAR
+
+    def _expr_Identifier(self, node):
+        name = node["name"]
+        if name in ("cout", "cerr", "std::cout", "std::cerr"):
+            return CppType('ostream')
+        if name in ("cin", "std::cin"):
+            return CppType('istream')
+        return self.symbols.resolve(name, LIMIT_TYPES.get(name, UNKNOWN))
+
+    def _expr_BinaryExpr(self, node):
+        left = self._expr(node["left"])
+        right = self._expr(node["right"])
+        op = node["op"]
+        if op in ("EQUAL", "NOT_EQUAL", "LESS", "LESS_EQUAL", "GREATER", "GREATER_EQUAL", "AND", "OR"):
+            return BOOL
+        if op in ("SHIFT_LEFT", "SHIFT_RIGHT") and left.name in STREAM_NAMES:
+            return left
+        if op in ("SHIFT_LEFT", "SHIFT_RIGHT"):
+            return common_type(left, INT) if left.is_integral else UNKNOWN
+        if op == "PLUS" and STRING in (left, right):
+            return STRING
+        if op in ("PERCENT", "BITWISE_AND", "BITWISE_OR", "BITWISE_XOR") and left.is_floating:
+            return UNKNOWN
+        return common_type(left, right)
+
+    def _expr_UnaryExpr(self, node):
+        operand = self._expr(node["expr"])
+        if node["op"] == "LOGICAL_NOT":
+            return BOOL
+        return common_type(operand, INT) if operand.is_integral else operand
+
+    def _expr_UpdateExpr(self, node):
+        return self._expr(node["expr"])
+
+    def _expr_AssignExpr(self, node):
+        left = self._expr(node["left"])
+        self._expr(node["right"])
+        return left
+
+    def _expr_TernaryExpr(self, node):
+        self._expr(node["condition"])
+        then_t = self._expr(node["then"])
+        else_t = self._expr(node["else"])
+        if then_t == else_t:
+            return then_t
+        return common_type(then_t, else_t)
+
+    def _expr_CastExpr(self, node):
+        operand = self._expr(node["expr"])
+        target = parse_type_spec(node.get("targetType"))
+        return target if target.is_known else operand
+
+    def _expr_DerefExpr(self, node):
+        return self._expr(node["expr"]).element()
+
+    def _expr_AddressOfExpr(self, node):
+        return CppType('pointer', (self._expr(node["expr"]),))
+
+    def _expr_IndexExpr(self, node):
+        container = self._expr(node["array"])
+        self._expr(node["index"])
+        return container.mapped()
+
+    def _expr_MemberAccess(self, node):
+        obj = self._expr(node["object"])
+        return self._member_type(obj, node["member"])
+
+    def _member_type(self, obj, member):
+        if obj.name == 'iterator':
+            obj = obj.element()
+        if member in ("first", "second") and obj.name == 'pair' and len(obj.args) == 2:
+            return obj.args[0 if member == "first" else 1]
+        if member in ("size", "length"):
+            return SIZE_T
+        if member == "empty":
+            return BOOL
+        return UNKNOWN
+
+    def _expr_MethodCall(self, node):
+        obj = self._expr(node["object"])
+        for arg in node.get("args", []):
+            self._expr(arg)
+        method = node["method"]
+        if obj.is_ordered and method in ITERATOR_METHODS:
+            return CppType('iterator', (obj,))
+        if method in ("size", "length", "count", "capacity"):
+            return SIZE_T
+        if method in ("empty", "contains", "starts_with", "ends_with"):
+            return BOOL
+        if method in ("front", "back", "top"):
+            return obj.element() if obj.name != 'string' else CHAR
+        if method == "at":
+            return obj.mapped()
+        if method in ("substr", "c_str"):
+            return STRING
+        if method == "find" and obj.name == 'string':
+            return SIZE_T
+        return self._member_type(obj, method)
+
+    def _expr_CallExpr(self, node):
+        arg_types = [self._expr(a) for a in node.get("args", [])]
+        callee = node["callee"]
+        if node.get("typeSpec"):
+            return parse_type_spec(node["typeSpec"])
+        if callee in self.functions:
+            return self.functions[callee]
+        if callee in ("next", "prev") and arg_types and arg_types[0].name == 'iterator':
+            return arg_types[0]
+        if callee in MATH_FUNCTIONS:
+            return DOUBLE
+        if callee in INT_FUNCTIONS:
+            return INT_FUNCTIONS[callee]
+        if callee in ("abs", "max", "min") and arg_types:
+            result = arg_types[0]
+            for t in arg_types[1:]:
+                result = result if t == result else common_type(result, t)
+            return result
+        if callee in ("to_string", "string"):
+            return STRING
+        if callee in ("make_pair", "pair") and len(arg_types) == 2:
+            return CppType('pair', arg_types)
+        if callee in ("round", "floor", "ceil"):
+            return LONG
+        return UNKNOWN
+
+    def _expr_InitializerList(self, node):
+        elems = [self._expr(e) for e in node.get("elements", [])]
+        if elems and all(e == elems[0] for e in elems):
+            return CppType('vector', (elems[0],))
+        return UNKNOWN
+
+    def _expr_LambdaExpr(self, node):
+        self.symbols.enter_scope()
+        for p in node.get("params", []):
+            if p.get("name"):
+                self.symbols.bind(p["name"], parse_type_spec(p.get("typeSpec")))
+        self._block(node.get("body"), new_scope=False)
+        self.symbols.exit_scope()
+        return CppType('function')
+
+    def _expr_NewExpr(self, node):
+        for a in node.get("args", []):
+            self._expr(a)
+        return CppType('pointer', (parse_type_spec(node.get("newType")),))
+
+    def _expr_NewArrayExpr(self, node):
+        self._expr(node["size"])
+        return CppType('pointer', (UNKNOWN,))
+
+    def _expr_DeleteExpr(self, node):
+        self._expr(node["expr"])
+        return VOID
+
+    def _expr_DecltypeExpr(self, node):
+        return self._expr(node["expr"])
+
+    def _expr_ExprList(self, node):
+        result = UNKNOWN
+        for e in node.get("exprs", []):
+            result = self._expr(e)
+        return result